@@ -17,6 +17,36 @@ class Settings(BaseSettings):
     aws_region: str = "us-west-2"
     titan_embed_model_id: str = "amazon.titan-embed-text-v2:0"
 
+    # Deep match embedding pre-filter: only the top-K most similar jobs per user go to the LLM
+    deep_match_prefilter_enabled: bool = False
+    deep_match_prefilter_top_k: int = 30
+    deep_match_prefilter_min_similarity: float = 0.2
+    embedding_retention_days: int = 14  # stored job vectors older than this are pruned by the scheduler
+
+    # Deep match LLM scoring: max Bedrock calls in flight per scoring run
+    deep_match_concurrency: int = 4
+    deep_match_flush_batch_size: int = 100  # above-threshold matches inserted per statement/commit
+    # Pending pairs are scored highest expected value first (keyword overlap, similarity, freshness, activity).
+    deep_match_priority_enabled: bool = True
+    deep_match_max_pairs_per_category: int = 0  # 0 = no cap; lower-priority pairs beyond it are deferred
+    deep_match_time_budget_seconds: int = 0  # 0 = no limit; stop starting new pairs in a category after this
+    deep_match_llm_batch_size: int = 1  # jobs per LLM scoring prompt for one resume; 1 = one job per prompt
+
+    # LLM match result cache (in-memory LRU + llm_match_cache table)
+    match_cache_ttl_seconds: int = 7 * 24 * 3600
+    match_cache_max_entries: int = 20000
+    # Bedrock call governor shared by every LLM call site (0 = unlimited)
+    llm_rate_per_second: float = 5.0
+    llm_burst: int = 5
+    llm_max_concurrency: int = 8
+    llm_run_call_budget: int = 0  # max match-scoring LLM calls per pipeline run; the rest are deferred
+    # Retries (throttling / transient errors only) with jittered exponential backoff, then a circuit breaker
+    llm_max_retries: int = 3
+    llm_retry_base_seconds: float = 0.5
+    llm_retry_max_seconds: float = 8.0
+    llm_circuit_failure_threshold: int = 5  # consecutive failed calls before fast-failing; 0 = disabled
+    llm_circuit_reset_seconds: int = 60
+
     # CORS origins as comma-separated values
     # Example: "https://app.example.com,https://admin.example.com"
     cors_allow_origins: str = "http://localhost:4200"
@@ -32,9 +62,26 @@ class Settings(BaseSettings):
     job_hours_old: int = 2
     job_site_names: str = "indeed,linkedin,zip_recruiter,google"
     job_country_indeed: str = "USA"
+    # Each site is scraped in its own task; caps/timeouts accept "site:value" overrides, e.g. "linkedin:1"
+    job_site_max_concurrency: int = 2  # concurrent scrapes per site across all categories
+    job_site_concurrency_overrides: str = "linkedin:1"
+    job_site_timeout_seconds: int = 180
+    job_site_timeout_overrides: str = "linkedin:300"
+    # Incremental collection: per (category, site) watermarks narrow hours_old and skip recently seen jobs
+    collector_incremental_enabled: bool = True
+    collector_watermark_overlap_hours: int = 1  # re-scan margin before the watermark
+    collector_watermark_max_hashes: int = 2000  # recent job_hashes kept per (category, site)
+    # Near-duplicate collapse of cross-posted jobs (MinHash estimate of title + description shingle overlap)
+    near_duplicate_enabled: bool = True
+    near_duplicate_threshold: float = 0.8
 
     # Scheduler interval (seconds)
     pipeline_interval_seconds: int = 2 * 3600
+    # Overlap scraping with per-category upsert + deep match (app/services/pipeline_engine.py)
+    pipeline_staged_enabled: bool = True
+    # Multi-instance safety: one instance holds the DB lease per cycle; others poll for due/orphaned runs
+    pipeline_lease_seconds: int = 15 * 60  # renewed every third of this while a run is active
+    pipeline_poll_seconds: int = 60
 
     # Upload and request guards
     max_resume_upload_mb: int = 10
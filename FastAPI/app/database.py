@@ -33,6 +33,13 @@ def init_db():
         Resume,
         Job,
         UserJobMatch,
+        JobListingEmbedding,
+        ResumeEmbedding,
+        LlmMatchCache,
+        CollectorWatermark,
+        PipelineRun,
+        PipelineLease,
+        PipelineRunCategory,
     )
 
     try:
@@ -52,6 +59,13 @@ def ensure_tables_exist():
         Resume,
         Job,
         UserJobMatch,
+        JobListingEmbedding,
+        ResumeEmbedding,
+        LlmMatchCache,
+        CollectorWatermark,
+        PipelineRun,
+        PipelineLease,
+        PipelineRunCategory,
     )
 
     try:
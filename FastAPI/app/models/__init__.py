@@ -4,6 +4,13 @@ from app.models.user import User
 from app.models.resume import Resume
 from app.models.job import Job
 from app.models.user_job_match import UserJobMatch
+from app.models.job_listing_embedding import JobListingEmbedding
+from app.models.resume_embedding import ResumeEmbedding
+from app.models.llm_match_cache import LlmMatchCache
+from app.models.collector_watermark import CollectorWatermark
+from app.models.pipeline_run import PipelineRun
+from app.models.pipeline_lease import PipelineLease
+from app.models.pipeline_run_category import PipelineRunCategory
 
 __all__ = [
     "SearchCategory",
@@ -12,4 +19,11 @@ __all__ = [
     "Resume",
     "Job",
     "UserJobMatch",
+    "JobListingEmbedding",
+    "ResumeEmbedding",
+    "LlmMatchCache",
+    "CollectorWatermark",
+    "PipelineRun",
+    "PipelineLease",
+    "PipelineRunCategory",
 ]
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class CollectorWatermark(Base):
+    """High-water mark per (category, site) so the collector only asks boards for new postings."""
+
+    __tablename__ = "collector_watermarks"
+
+    search_category_id = Column(
+        String, ForeignKey("search_categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    site = Column(String, primary_key=True)  # jobspy site name: indeed, linkedin, ...
+    last_posted_at = Column(DateTime(timezone=True))  # newest posted time seen on this site (informational)
+    last_scraped_at = Column(DateTime(timezone=True))  # last run that returned rows; the next window starts here
+    recent_job_hashes = Column(JSONB)  # newest-first job_hash values recently seen (capped)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
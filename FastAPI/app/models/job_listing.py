@@ -1,7 +1,7 @@
 import hashlib
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Float, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import query_expression, relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -17,6 +17,10 @@ class JobListing(Base):
     """Raw scraped jobs from boards - not user-specific."""
 
     __tablename__ = "job_listings"
+    __table_args__ = (
+        # Deep match candidate query: category + freshness, with the required-years gate read from the index.
+        Index("ix_job_listings_category_created_required_years", "search_category_id", "created_at", "required_years"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     job_hash = Column(String, unique=True, nullable=False, index=True)
@@ -28,8 +32,11 @@ class JobListing(Base):
     description = Column(Text)
     posted_at = Column(String)
     extra_data = Column(JSONB)
+    required_years = Column(Float)  # minimum years of experience from the description (job_features)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # First N chars of description, computed in SQL by list queries (job_listing_repo.description_preview_options).
+    description_preview = query_expression()
 
     search_category = relationship("SearchCategory", back_populates="job_listings")
     user_matches = relationship(
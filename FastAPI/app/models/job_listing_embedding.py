@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, LargeBinary, DateTime
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class JobListingEmbedding(Base):
+    """Titan vector for a job listing, keyed by job_hash so it survives listing cleanup and re-scrapes."""
+
+    __tablename__ = "job_listing_embeddings"
+
+    job_hash = Column(String, primary_key=True)
+    model_id = Column(String, primary_key=True)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # packed float32
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Float, DateTime
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class LlmMatchCache(Base):
+    """Durable tier of the LLM match result cache (see app/services/match_cache.py)."""
+
+    __tablename__ = "llm_match_cache"
+
+    cache_key = Column(String, primary_key=True)  # sha256(resume text, job title, description, model, prompt version)
+    model_id = Column(String, nullable=False)
+    match_score = Column(Float, nullable=False)  # 0-1, as returned by llm_match_resume_job
+    match_reason = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+
+from app.database import Base
+
+
+class PipelineLease(Base):
+    """Leader lease: only the instance holding an unexpired lease runs the pipeline."""
+
+    __tablename__ = "pipeline_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Float, Integer, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class PipelineRun(Base):
+    """One scheduled pipeline cycle: status, resumable cursor and result (run history)."""
+
+    __tablename__ = "pipeline_runs"
+
+    id = Column(String, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="running", index=True)  # running | succeeded | failed
+    owner = Column(String)  # instance that holds (or last held) the run
+    attempts = Column(Integer, nullable=False, default=1)  # >1 when resumed after a crash
+    cursor = Column(JSONB)  # {"done_categories": [...]} - categories fully collected + matched
+    result = Column(JSONB)
+    error = Column(String)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    finished_at = Column(DateTime(timezone=True))
+    duration_seconds = Column(Float)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
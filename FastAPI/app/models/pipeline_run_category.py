@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class PipelineRunCategory(Base):
+    """Per-category stage durations and counts for one pipeline run."""
+
+    __tablename__ = "pipeline_run_categories"
+
+    id = Column(String, primary_key=True, index=True)
+    run_id = Column(String, ForeignKey("pipeline_runs.id", ondelete="CASCADE"), nullable=False, index=True)
+    search_category_id = Column(String, nullable=False)
+    scrape_seconds = Column(Float)  # None when the category was only matched (not scraped) this run
+    store_seconds = Column(Float)
+    match_seconds = Column(Float)
+    fetched = Column(Integer, default=0)
+    deduped = Column(Integer, default=0)  # rows left after known/exact/near-duplicate filtering
+    inserted = Column(Integer, default=0)
+    users = Column(Integer, default=0)
+    jobs = Column(Integer, default=0)
+    pairs = Column(Integer, default=0)  # user-job pairs scored
+    scored = Column(Integer, default=0)  # matches created
+    llm_scored_pairs = Column(Integer, default=0)  # pairs answered by the LLM; a batch prompt answers several
+    cache_hits = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
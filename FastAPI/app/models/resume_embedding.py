@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ResumeEmbedding(Base):
+    """Titan vector for a resume; content_hash detects when the resume text changed."""
+
+    __tablename__ = "resume_embeddings"
+
+    resume_id = Column(String, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    model_id = Column(String, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # packed float32
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -9,6 +9,10 @@ class UserJobMatch(Base):
     """User-job pair with LLM match score (deep match result)."""
 
     __tablename__ = "user_job_matches"
+    __table_args__ = (
+        # One match per user/job; also serves the bulk "already matched" lookup.
+        UniqueConstraint("user_id", "job_listing_id", name="uq_user_job_matches_user_job"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.collector_watermark import CollectorWatermark
+
+
+def get_for_categories(db: Session, search_category_ids: list[str]) -> list[CollectorWatermark]:
+    """All site watermarks for these categories, in one query."""
+    if not search_category_ids:
+        return []
+    return (
+        db.query(CollectorWatermark)
+        .filter(CollectorWatermark.search_category_id.in_(list(set(search_category_ids))))
+        .all()
+    )
+
+
+def save_many(db: Session, entries: list[dict]) -> int:
+    """
+    Upsert watermarks. Each entry has search_category_id, site, last_posted_at,
+    last_scraped_at and recent_job_hashes. Returns count of rows sent.
+    """
+    if not entries:
+        return 0
+    stmt = insert(CollectorWatermark).values(
+        [
+            {
+                "search_category_id": e["search_category_id"],
+                "site": e["site"],
+                "last_posted_at": e.get("last_posted_at"),
+                "last_scraped_at": e.get("last_scraped_at"),
+                "recent_job_hashes": list(e.get("recent_job_hashes") or []),
+            }
+            for e in entries
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["search_category_id", "site"],
+        set_={
+            "last_posted_at": stmt.excluded.last_posted_at,
+            "last_scraped_at": stmt.excluded.last_scraped_at,
+            "recent_job_hashes": stmt.excluded.recent_job_hashes,
+            "updated_at": datetime.now(timezone.utc),
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(entries)
@@ -0,0 +1,90 @@
+"""Persistent Titan embedding store for job listings and resumes. Vectors are packed float32 bytes."""
+
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.job_listing_embedding import JobListingEmbedding
+from app.models.resume_embedding import ResumeEmbedding
+
+FLOAT32_BYTES = 4
+
+
+def get_job_vectors(db: Session, job_hashes: list[str], model_id: str) -> dict[str, bytes]:
+    """Return {job_hash: packed vector} for the hashes that already have a stored embedding."""
+    if not job_hashes:
+        return {}
+    rows = (
+        db.query(JobListingEmbedding.job_hash, JobListingEmbedding.vector)
+        .filter(
+            JobListingEmbedding.model_id == model_id,
+            JobListingEmbedding.job_hash.in_(list(set(job_hashes))),
+        )
+        .all()
+    )
+    return {job_hash: bytes(vector) for job_hash, vector in rows}
+
+
+def save_job_vectors(db: Session, vectors: dict[str, bytes], model_id: str) -> int:
+    """Store packed job embeddings using ON CONFLICT DO NOTHING. Returns count of rows sent."""
+    if not vectors:
+        return 0
+    stmt = insert(JobListingEmbedding).values(
+        [
+            {"job_hash": job_hash, "model_id": model_id, "dim": len(vec) // FLOAT32_BYTES, "vector": vec}
+            for job_hash, vec in vectors.items()
+        ]
+    )
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["job_hash", "model_id"]))
+    db.commit()
+    return len(vectors)
+
+
+def get_resume_vector(db: Session, resume_id: str, content_hash: str, model_id: str) -> bytes | None:
+    """Return the stored resume embedding if it was computed from the same content."""
+    row = (
+        db.query(ResumeEmbedding.vector)
+        .filter(
+            ResumeEmbedding.resume_id == resume_id,
+            ResumeEmbedding.model_id == model_id,
+            ResumeEmbedding.content_hash == content_hash,
+        )
+        .first()
+    )
+    return bytes(row[0]) if row else None
+
+
+def save_resume_vector(db: Session, resume_id: str, content_hash: str, model_id: str, vector: bytes) -> None:
+    """Insert or replace the packed resume embedding for (resume_id, model_id)."""
+    stmt = insert(ResumeEmbedding).values(
+        resume_id=resume_id,
+        model_id=model_id,
+        content_hash=content_hash,
+        dim=len(vector) // FLOAT32_BYTES,
+        vector=vector,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["resume_id", "model_id"],
+        set_={
+            "content_hash": stmt.excluded.content_hash,
+            "dim": stmt.excluded.dim,
+            "vector": stmt.excluded.vector,
+            "updated_at": datetime.now(timezone.utc),
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def delete_stale_job_vectors(db: Session, max_age_days: int) -> int:
+    """Delete job embeddings older than max_age_days. Returns count deleted."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    count = (
+        db.query(JobListingEmbedding)
+        .filter(JobListingEmbedding.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    if count:
+        db.commit()
+    return count
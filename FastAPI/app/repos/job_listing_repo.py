@@ -1,12 +1,78 @@
 import logging
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, defer, load_only, with_expression
 
 from app.core.security import generate_id
 from app.models.job_listing import JobListing, compute_job_hash
+from app.services.job_features import job_feature_columns
 
 logger = logging.getLogger(__name__)
+BATCH_UPSERT_CHUNK_SIZE = 500  # rows per multi-VALUES INSERT statement
+
+
+def _listing_values(r: dict, search_category_id: str) -> dict:
+    """
+    Normalize one scraped row into job_listings column values (with length caps).
+    Matching features (required years, keyword tokens) are computed here, once per listing.
+    """
+    job_hash = r.get("job_hash") or compute_job_hash(
+        r.get("title", ""),
+        r.get("company", ""),
+        r.get("job_url", ""),
+    )
+    title = str(r.get("title", "Unknown Title"))[:500]
+    description = (r.get("description") or "")[:50000] if r.get("description") else None
+    return {
+        "id": generate_id(),
+        "job_hash": job_hash,
+        "search_category_id": search_category_id,
+        "title": title,
+        "company": str(r.get("company", "Unknown Company"))[:500],
+        "location": (r.get("location") or "")[:500] if r.get("location") else None,
+        "job_url": str(r.get("job_url", ""))[:2000],
+        "description": description,
+        "posted_at": r.get("posted_at"),
+        **job_feature_columns(r.get("extra_data"), title, description),
+    }
+
+
+def description_preview_options(chars: int) -> tuple:
+    """
+    Loader options for list views: skip the full description column and load only its
+    first `chars` characters (server-side substr) into JobListing.description_preview.
+    extra_data (scraper metadata, matching features) is not needed there either.
+    """
+    return (
+        defer(JobListing.description),
+        defer(JobListing.extra_data),
+        with_expression(
+            JobListing.description_preview,
+            func.substr(func.coalesce(JobListing.description, ""), 1, chars),
+        ),
+    )
+
+
+def match_list_options(chars: int) -> tuple:
+    """
+    Loader options for a JobListing eagerly joined into match lists: only the columns the
+    match response shows, with the description as a server-side prefix (description_preview).
+    """
+    return (
+        load_only(
+            JobListing.title,
+            JobListing.company,
+            JobListing.location,
+            JobListing.job_url,
+            JobListing.posted_at,
+            JobListing.created_at,
+        ),
+        with_expression(
+            JobListing.description_preview,
+            func.substr(func.coalesce(JobListing.description, ""), 1, chars),
+        ),
+    )
 
 
 def batch_upsert(
@@ -15,60 +81,79 @@ def batch_upsert(
     search_category_id: str,
 ) -> int:
     """
-    Insert job listings using ON CONFLICT (job_hash) DO NOTHING.
+    Insert job listings with multi-row INSERT ... ON CONFLICT (job_hash) DO NOTHING
+    RETURNING id, in chunks of BATCH_UPSERT_CHUNK_SIZE rows (one round trip per chunk).
     Returns count of newly inserted rows.
     """
     if not rows:
         return 0
-    inserted = 0
+    values_by_hash: dict[str, dict] = {}
     for r in rows:
-        job_hash = r.get("job_hash") or compute_job_hash(
-            r.get("title", ""),
-            r.get("company", ""),
-            r.get("job_url", ""),
-        )
-        stmt = text("""
-            INSERT INTO job_listings (id, job_hash, search_category_id, title, company, location, job_url, description, posted_at, extra_data)
-            VALUES (:id, :job_hash, :search_category_id, :title, :company, :location, :job_url, :description, :posted_at, :extra_data)
-            ON CONFLICT (job_hash) DO NOTHING
-        """)
-        result = db.execute(
-            stmt,
-            {
-                "id": generate_id(),
-                "job_hash": job_hash,
-                "search_category_id": search_category_id,
-                "title": str(r.get("title", "Unknown Title"))[:500],
-                "company": str(r.get("company", "Unknown Company"))[:500],
-                "location": (r.get("location") or "")[:500] if r.get("location") else None,
-                "job_url": str(r.get("job_url", ""))[:2000],
-                "description": (r.get("description") or "")[:50000] if r.get("description") else None,
-                "posted_at": r.get("posted_at"),
-                "extra_data": r.get("extra_data"),
-            },
+        values = _listing_values(r, search_category_id)
+        values_by_hash.setdefault(values["job_hash"], values)
+    values = list(values_by_hash.values())
+
+    inserted = 0
+    for start in range(0, len(values), BATCH_UPSERT_CHUNK_SIZE):
+        chunk = values[start:start + BATCH_UPSERT_CHUNK_SIZE]
+        stmt = (
+            insert(JobListing)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["job_hash"])
+            .returning(JobListing.id)
         )
-        if result.rowcount and result.rowcount > 0:
-            inserted += 1
+        inserted += len(db.execute(stmt).fetchall())
     db.commit()
     logger.info("Batch upsert: %d rows inserted for category %s", inserted, search_category_id)
     return inserted
 
 
+def add_alternate_urls(db: Session, urls_by_hash: dict[str, list[dict]]) -> int:
+    """
+    Append near-duplicate URLs ({"url", "site"}) to extra_data["alternate_urls"] of already
+    stored listings, keyed by job_hash; URLs already recorded are skipped. Returns listings updated.
+    """
+    if not urls_by_hash:
+        return 0
+    listings = db.query(JobListing).filter(JobListing.job_hash.in_(list(urls_by_hash))).all()
+    for listing in listings:
+        extra = dict(listing.extra_data or {})
+        alternates = list(extra.get("alternate_urls") or [])
+        known = {a.get("url") for a in alternates}
+        alternates += [a for a in urls_by_hash[listing.job_hash] if a.get("url") not in known]
+        extra["alternate_urls"] = alternates
+        listing.extra_data = extra
+    db.commit()
+    return len(listings)
+
+
 def get_jobs_by_category_since(
     db: Session,
     search_category_id: str,
     since_hours: int = 2,
+    experience_years: float | None = None,
+    margin_years: float = 0.0,
 ) -> list[JobListing]:
+    """
+    Recent listings in a category, newest first. With `experience_years`, listings whose
+    required_years exceed experience_years + margin_years (the matcher's hard gate) are
+    filtered out in SQL; listings without a stated requirement are always kept.
+    """
+    from sqlalchemy import or_
+
     cutoff = datetime.now(timezone.utc) - timedelta(hours=since_hours)
-    return (
-        db.query(JobListing)
-        .filter(
-            JobListing.search_category_id == search_category_id,
-            JobListing.created_at >= cutoff,
-        )
-        .order_by(JobListing.created_at.desc())
-        .all()
+    q = db.query(JobListing).filter(
+        JobListing.search_category_id == search_category_id,
+        JobListing.created_at >= cutoff,
     )
+    if experience_years is not None:
+        q = q.filter(
+            or_(
+                JobListing.required_years.is_(None),
+                JobListing.required_years <= experience_years + margin_years,
+            )
+        )
+    return q.order_by(JobListing.created_at.desc()).all()
 
 
 def get_all(
@@ -89,8 +174,12 @@ def get_all_paginated(
     search: str | None = None,
     limit: int = 20,
     offset: int = 0,
+    description_chars: int = 500,
 ) -> tuple[list[JobListing], int]:
-    """List job listings with optional category and title/company search. Returns (items, total)."""
+    """
+    List job listings with optional category and title/company search. Returns (items, total).
+    Items carry only the first `description_chars` of the description, as description_preview.
+    """
     from sqlalchemy import or_
     q = db.query(JobListing).order_by(JobListing.created_at.desc())
     if search_category_id:
@@ -104,7 +193,7 @@ def get_all_paginated(
             )
         )
     total = q.count()
-    items = q.offset(offset).limit(limit).all()
+    items = q.options(*description_preview_options(description_chars)).offset(offset).limit(limit).all()
     return items, total
 
 
@@ -137,16 +226,19 @@ def create_one(
     posted_at: str | None = None,
 ) -> JobListing:
     job_hash = compute_job_hash(title, company, job_url)
+    title = (title or "Unknown Title")[:500]
+    description = (description or "")[:50000] if description else None
     listing = JobListing(
         id=generate_id(),
         job_hash=job_hash,
         search_category_id=search_category_id,
-        title=(title or "Unknown Title")[:500],
+        title=title,
         company=(company or "Unknown Company")[:500],
         location=(location or "")[:500] if location else None,
         job_url=(job_url or "")[:2000],
-        description=(description or "")[:50000] if description else None,
+        description=description,
         posted_at=posted_at,
+        **job_feature_columns(None, title, description),
     )
     db.add(listing)
     db.commit()
@@ -182,6 +274,9 @@ def update_one(
         listing.description = description[:50000] if description else None
     if posted_at is not None:
         listing.posted_at = posted_at
+    if title is not None or description is not None:
+        for column, value in job_feature_columns(listing.extra_data, listing.title, listing.description).items():
+            setattr(listing, column, value)
     if search_category_id is not None:
         listing.search_category_id = search_category_id
     db.commit()
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.llm_match_cache import LlmMatchCache
+
+
+def get_many(db: Session, cache_keys: list[str], max_age_seconds: int) -> dict[str, tuple[float, str, datetime]]:
+    """Return {cache_key: (match_score, match_reason, created_at)} for unexpired keys."""
+    if not cache_keys:
+        return {}
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+    rows = (
+        db.query(LlmMatchCache.cache_key, LlmMatchCache.match_score, LlmMatchCache.match_reason, LlmMatchCache.created_at)
+        .filter(
+            LlmMatchCache.cache_key.in_(list(set(cache_keys))),
+            LlmMatchCache.created_at >= cutoff,
+        )
+        .all()
+    )
+    return {key: (score, reason, created_at) for key, score, reason, created_at in rows}
+
+
+def save_many(db: Session, entries: dict[str, tuple[float, str]], model_id: str) -> int:
+    """Upsert cache entries (refreshing created_at). Returns count of rows sent."""
+    if not entries:
+        return 0
+    stmt = insert(LlmMatchCache).values(
+        [
+            {"cache_key": key, "model_id": model_id, "match_score": score, "match_reason": (reason or "")[:2000]}
+            for key, (score, reason) in entries.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cache_key"],
+        set_={
+            "match_score": stmt.excluded.match_score,
+            "match_reason": stmt.excluded.match_reason,
+            "created_at": datetime.now(timezone.utc),
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(entries)
+
+
+def delete_expired(db: Session, max_age_seconds: int) -> int:
+    """Delete cache rows older than max_age_seconds. Returns count deleted."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+    count = db.query(LlmMatchCache).filter(LlmMatchCache.created_at < cutoff).delete(synchronize_session=False)
+    if count:
+        db.commit()
+    return count
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.security import generate_id
+from app.models.pipeline_lease import PipelineLease
+from app.models.pipeline_run import PipelineRun
+from app.models.pipeline_run_category import PipelineRunCategory
+
+
+def acquire_lease(db: Session, name: str, owner: str, ttl_seconds: int) -> bool:
+    """
+    Take or renew the lease if it is free, expired, or already ours (one atomic
+    upsert, evaluated on the DB clock). Returns True if `owner` holds it now.
+    """
+    expires_at = func.now() + timedelta(seconds=ttl_seconds)
+    stmt = insert(PipelineLease).values(name=name, owner=owner, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"owner": stmt.excluded.owner, "expires_at": stmt.excluded.expires_at},
+        where=(PipelineLease.expires_at < func.now()) | (PipelineLease.owner == owner),
+    ).returning(PipelineLease.owner)
+    acquired = db.execute(stmt).first() is not None
+    db.commit()
+    return acquired
+
+
+def release_lease(db: Session, name: str, owner: str) -> None:
+    """Expire the lease now if `owner` holds it."""
+    db.execute(
+        update(PipelineLease)
+        .where(PipelineLease.name == name, PipelineLease.owner == owner)
+        .values(expires_at=func.now())
+    )
+    db.commit()
+
+
+def get_lease(db: Session, name: str) -> PipelineLease | None:
+    return db.query(PipelineLease).filter(PipelineLease.name == name).first()
+
+
+def create_run(db: Session, owner: str) -> PipelineRun:
+    run = PipelineRun(id=generate_id(), status="running", owner=owner, attempts=1, cursor={})
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def get_resumable_run(db: Session) -> PipelineRun | None:
+    """Latest run still marked running. Only call while holding the lease: it was then orphaned by a crash."""
+    return (
+        db.query(PipelineRun)
+        .filter(PipelineRun.status == "running")
+        .order_by(PipelineRun.started_at.desc())
+        .first()
+    )
+
+
+def resume_run(db: Session, run: PipelineRun, owner: str) -> PipelineRun:
+    run.owner = owner
+    run.attempts = (run.attempts or 1) + 1
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def record_category_done(db: Session, run: PipelineRun, cursor: dict, metrics: dict | None = None) -> None:
+    """Advance the run's cursor and store the category's metrics in one commit."""
+    run.cursor = dict(cursor)
+    if metrics:
+        db.add(PipelineRunCategory(id=generate_id(), run_id=run.id, **metrics))
+    db.commit()
+
+
+def finish_run(db: Session, run: PipelineRun, status: str, result: dict | None = None, error: str | None = None) -> None:
+    run.status = status
+    run.result = result
+    run.error = (error or "")[:2000] or None
+    run.finished_at = datetime.now(timezone.utc)
+    if run.started_at is not None:
+        run.duration_seconds = round((run.finished_at - run.started_at).total_seconds(), 3)
+    db.commit()
+
+
+def get_latest_run(db: Session, finished_only: bool = False) -> PipelineRun | None:
+    q = db.query(PipelineRun)
+    if finished_only:
+        q = q.filter(PipelineRun.status != "running")
+    return q.order_by(PipelineRun.started_at.desc()).first()
+
+
+def get_runs_paginated(db: Session, limit: int = 20, offset: int = 0) -> tuple[list[PipelineRun], int]:
+    """Newest runs first. Returns (runs, total)."""
+    q = db.query(PipelineRun)
+    total = q.count()
+    runs = q.order_by(PipelineRun.started_at.desc()).offset(offset).limit(limit).all()
+    return runs, total
+
+
+def get_run(db: Session, run_id: str) -> PipelineRun | None:
+    return db.query(PipelineRun).filter(PipelineRun.id == run_id).first()
+
+
+def get_run_categories(db: Session, run_id: str) -> list[PipelineRunCategory]:
+    return (
+        db.query(PipelineRunCategory)
+        .filter(PipelineRunCategory.run_id == run_id)
+        .order_by(PipelineRunCategory.created_at)
+        .all()
+    )
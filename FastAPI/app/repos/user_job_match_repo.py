@@ -1,5 +1,7 @@
 from datetime import datetime, timezone
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import contains_eager, joinedload
 from sqlalchemy.orm import Session
 
 from app.models.user_job_match import UserJobMatch
@@ -28,6 +30,38 @@ def create(
     return match
 
 
+def bulk_create(db: Session, matches: list[dict]) -> int:
+    """
+    Insert matches (dicts with user_id, job_listing_id, match_score, match_reason,
+    resume_years_experience) in one INSERT ... ON CONFLICT (user_id, job_listing_id)
+    DO NOTHING and one commit, so re-triggered or concurrent runs stay idempotent.
+    Returns count of newly inserted rows.
+    """
+    if not matches:
+        return 0
+    values = [
+        {
+            "id": generate_id(),
+            "user_id": m["user_id"],
+            "job_listing_id": m["job_listing_id"],
+            "match_score": m["match_score"],
+            "match_reason": m.get("match_reason"),
+            "resume_years_experience": m.get("resume_years_experience"),
+            "status": "pending",
+        }
+        for m in matches
+    ]
+    stmt = (
+        insert(UserJobMatch)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=["user_id", "job_listing_id"])
+        .returning(UserJobMatch.id)
+    )
+    inserted = len(db.execute(stmt).fetchall())
+    db.commit()
+    return inserted
+
+
 def get_existing_match(db: Session, user_id: str, job_listing_id: str) -> UserJobMatch | None:
     return (
         db.query(UserJobMatch)
@@ -39,15 +73,69 @@ def get_existing_match(db: Session, user_id: str, job_listing_id: str) -> UserJo
     )
 
 
+def get_matched_job_ids(
+    db: Session,
+    user_ids: list[str],
+    job_listing_ids: list[str],
+) -> dict[str, set[str]]:
+    """
+    Already-matched job ids per user among `job_listing_ids`, in one query
+    (served by the (user_id, job_listing_id) unique index).
+    Returns {user_id: {job_listing_id, ...}}; users without matches are omitted.
+    """
+    if not user_ids or not job_listing_ids:
+        return {}
+    rows = (
+        db.query(UserJobMatch.user_id, UserJobMatch.job_listing_id)
+        .filter(
+            UserJobMatch.user_id.in_(set(user_ids)),
+            UserJobMatch.job_listing_id.in_(set(job_listing_ids)),
+        )
+        .all()
+    )
+    matched: dict[str, set[str]] = {}
+    for user_id, job_listing_id in rows:
+        matched.setdefault(user_id, set()).add(job_listing_id)
+    return matched
+
+
+def get_last_activity(db: Session, user_ids: list[str]) -> dict[str, datetime]:
+    """
+    Most recent time each user acted on a match (status change), in one query.
+    Users who never acted are omitted.
+    """
+    if not user_ids:
+        return {}
+    rows = (
+        db.query(UserJobMatch.user_id, func.max(UserJobMatch.updated_at))
+        .filter(UserJobMatch.user_id.in_(set(user_ids)), UserJobMatch.updated_at.isnot(None))
+        .group_by(UserJobMatch.user_id)
+        .all()
+    )
+    return {user_id: last for user_id, last in rows if last is not None}
+
+
 def get_matches_for_user(
     db: Session,
     user_id: str,
     status: str | None = "pending",
     limit: int = 100,
+    description_chars: int = 2000,
 ) -> list[UserJobMatch]:
+    """
+    The user's matches, best first, in one joined query. Each match's listing is loaded
+    with only the columns the match list shows and the first `description_chars` of its
+    description (job_listing.description_preview), so reading m.job_listing issues no query.
+    """
     from sqlalchemy import or_
+    from app.repos.job_listing_repo import match_list_options
 
-    q = db.query(UserJobMatch).filter(UserJobMatch.user_id == user_id)
+    q = (
+        db.query(UserJobMatch)
+        .join(UserJobMatch.job_listing)
+        .options(contains_eager(UserJobMatch.job_listing).options(*match_list_options(description_chars)))
+        .filter(UserJobMatch.user_id == user_id)
+    )
     if status is not None:
         if status == "pending":
             q = q.filter(or_(UserJobMatch.status == "pending", UserJobMatch.status.is_(None)))
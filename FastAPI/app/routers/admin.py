@@ -17,8 +17,11 @@ from app.repos.job_listing_repo import (
     delete_one as delete_job_listing,
     delete_all as delete_all_job_listings,
 )
+from app.repos.pipeline_run_repo import get_run as get_pipeline_run, get_run_categories, get_runs_paginated
 from app.core.security import hash_password
 from app.models.job_listing import JobListing
+from app.models.pipeline_run import PipelineRun
+from app.models.pipeline_run_category import PipelineRunCategory
 from pydantic import BaseModel, EmailStr
 
 logger = logging.getLogger(__name__)
@@ -75,6 +78,9 @@ def _user_to_response(u: User) -> dict:
 
 
 def _job_listing_to_response(j: JobListing) -> dict:
+    # The list query loads only a server-side prefix of the description (description_preview).
+    preview = getattr(j, "description_preview", None)
+    description = preview if preview is not None else j.description
     return {
         "id": j.id,
         "job_hash": j.job_hash,
@@ -83,12 +89,56 @@ def _job_listing_to_response(j: JobListing) -> dict:
         "company": j.company,
         "location": j.location,
         "job_url": j.job_url,
-        "description": (j.description or "")[:500] if j.description else None,
+        "description": (description or "")[:500] or None,
         "posted_at": j.posted_at,
         "created_at": j.created_at.isoformat() if j.created_at else None,
     }
 
 
+def _pipeline_run_to_response(r: PipelineRun) -> dict:
+    result = r.result or {}
+    collector = result.get("collector") or {}
+    deep_match = result.get("deep_match") or {}
+    return {
+        "id": r.id,
+        "status": r.status,
+        "owner": r.owner,
+        "attempts": r.attempts,
+        "started_at": r.started_at.isoformat() if r.started_at else None,
+        "finished_at": r.finished_at.isoformat() if r.finished_at else None,
+        "duration_seconds": r.duration_seconds,
+        "error": r.error,
+        # Flattened headline numbers for trend charts; full detail is in "result"
+        "fetched": collector.get("total_fetched"),
+        "deduped": collector.get("total_deduped"),
+        "inserted": collector.get("inserted"),
+        "pairs": deep_match.get("pairs"),
+        "scored": deep_match.get("scored"),
+        "llm_scored_pairs": deep_match.get("llm_scored_pairs"),
+        "cache_hits": deep_match.get("cache_hits"),
+        "cleanup_unmatched": result.get("cleanup_unmatched"),
+        "result": r.result,
+    }
+
+
+def _pipeline_run_category_to_response(c: PipelineRunCategory) -> dict:
+    return {
+        "search_category_id": c.search_category_id,
+        "scrape_seconds": c.scrape_seconds,
+        "store_seconds": c.store_seconds,
+        "match_seconds": c.match_seconds,
+        "fetched": c.fetched,
+        "deduped": c.deduped,
+        "inserted": c.inserted,
+        "users": c.users,
+        "jobs": c.jobs,
+        "pairs": c.pairs,
+        "scored": c.scored,
+        "llm_scored_pairs": c.llm_scored_pairs,
+        "cache_hits": c.cache_hits,
+    }
+
+
 @router.get("/stats")
 def get_admin_stats(
     db: Session = Depends(get_db),
@@ -342,3 +392,35 @@ def delete_job_listing_admin(
     if not delete_job_listing(db, listing_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job listing not found")
     return {"message": "Job listing deleted"}
+
+
+# ---- Pipeline run history ----
+@router.get("/pipeline-runs")
+def list_pipeline_runs(
+    page: int = 1,
+    page_size: int = 20,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_admin),
+):
+    """List scheduled pipeline runs (newest first) with headline metrics, pagination. Admin only."""
+    page = max(1, page)
+    page_size = min(max(1, page_size), 100)
+    offset = (page - 1) * page_size
+    runs, total = get_runs_paginated(db, limit=page_size, offset=offset)
+    return {"items": [_pipeline_run_to_response(r) for r in runs], "total": total}
+
+
+@router.get("/pipeline-runs/{run_id}")
+def get_pipeline_run_detail(
+    run_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_admin),
+):
+    """Get one pipeline run with per-category stage durations and counts. Admin only."""
+    run = get_pipeline_run(db, run_id)
+    if not run:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pipeline run not found")
+    out = _pipeline_run_to_response(run)
+    out["cursor"] = run.cursor
+    out["categories"] = [_pipeline_run_category_to_response(c) for c in get_run_categories(db, run_id)]
+    return out
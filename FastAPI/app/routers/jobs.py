@@ -15,11 +15,10 @@ from app.schemas.job import (
     TailorResumeFromJdRequest,
     LatexRenderRequest,
 )
-from app.services.job_collector import run_collector
-from app.services.deep_match_service import run_deep_match_all
 from app.services.resume_tailor_service import generate_tailored_latex
 from app.services.latex_render_service import render_latex_to_pdf_bytes
 from app.services.pipeline_scheduler import (
+    run_pipeline_now,
     start_scheduler,
     stop_scheduler,
     get_status as get_pipeline_status,
@@ -34,13 +33,16 @@ def _match_to_result(m) -> JobMatchResult:
     score = (m.match_score / 100.0) if m.match_score and m.match_score > 1 else (m.match_score or 0)
     applied_at = m.applied_at.isoformat() if m.applied_at else None
     created_at = j.created_at.isoformat() if j.created_at else None
+    # List queries load only a server-side prefix of the description (see get_matches_for_user).
+    preview = getattr(j, "description_preview", None)
+    description = preview if preview is not None else j.description
     return JobMatchResult(
         id=m.id,
         title=j.title or "Unknown",
         company=j.company or "Unknown",
         location=j.location,
         job_url=j.job_url or "",
-        description=(j.description or "")[:2000] or None,
+        description=(description or "")[:2000] or None,
         site=None,
         posted_at=j.posted_at,
         created_at=created_at,
@@ -52,33 +54,26 @@ def _match_to_result(m) -> JobMatchResult:
 
 
 @router.post("/run-pipeline")
-def run_pipeline(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_admin),
-):
-    """Manually trigger the collector + deep match pipeline once. Admin only."""
-    from app.repos.search_category_repo import seed_default_categories
-
-    from app.repos.job_listing_repo import delete_unmatched as delete_unmatched_job_listings
-
+def run_pipeline(user: User = Depends(get_current_admin)):
+    """
+    Manually trigger the collector + deep match pipeline once. Admin only.
+    Goes through the scheduler's lease and run record; 409 while another run holds the lease.
+    """
     logger.info("Pipeline (one-shot) triggered by admin %s", user.email)
     try:
-        seed_default_categories(db)
-        collector_result = run_collector(db)
-        deep_result = run_deep_match_all(db)
-        cleanup_count = delete_unmatched_job_listings(db)
-        logger.info("Pipeline done: collector=%s deep_match=%s cleanup_unmatched=%d", collector_result, deep_result, cleanup_count)
-        return {
-            "collector": collector_result,
-            "deep_match": deep_result,
-            "cleanup_unmatched": cleanup_count,
-        }
+        result = run_pipeline_now()
     except Exception as e:
         logger.exception("Pipeline (one-shot) failed for admin=%s: %s", user.email, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Pipeline run failed. Check server logs for details.",
         ) from e
+    if result.get("skipped") == "lease_held":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A pipeline run is already in progress. Try again when it finishes.",
+        )
+    return result
 
 
 @router.post("/start-pipeline")
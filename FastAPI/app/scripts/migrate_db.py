@@ -16,6 +16,14 @@ MIGRATIONS = [
     "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN DEFAULT FALSE",
     "ALTER TABLE users ADD COLUMN IF NOT EXISTS temp_password_hash VARCHAR",
     "ALTER TABLE users ADD COLUMN IF NOT EXISTS temp_password_expires_at TIMESTAMPTZ",
+    # Keep the oldest row per (user, job) before enforcing uniqueness.
+    """DELETE FROM user_job_matches a USING user_job_matches b
+    WHERE a.user_id = b.user_id AND a.job_listing_id = b.job_listing_id
+    AND (a.created_at > b.created_at OR (a.created_at = b.created_at AND a.id > b.id))""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_user_job_matches_user_job ON user_job_matches (user_id, job_listing_id)",
+    "ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS required_years DOUBLE PRECISION",
+    """CREATE INDEX IF NOT EXISTS ix_job_listings_category_created_required_years
+    ON job_listings (search_category_id, created_at, required_years)""",
 ]
 
 
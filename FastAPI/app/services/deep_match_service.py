@@ -1,24 +1,92 @@
 import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.user import User
 from app.repos.user_repo import get_by_id
 from app.repos.user_repo import get_users_by_category
 from app.repos.job_listing_repo import get_jobs_by_category_since
 from app.repos.resume_repo import get_latest_by_user
-from app.repos.user_job_match_repo import create as create_match, get_existing_match
-from app.services.resume_matcher import llm_match
+from app.repos.user_job_match_repo import bulk_create as bulk_create_matches, get_last_activity, get_matched_job_ids
+from app.repos.match_cache_repo import get_many as get_cached_matches, save_many as save_cached_matches
+from app.services.embedding_prefilter import select_candidates
+from app.services.job_features import JobFeatures, get_job_features
+from app.services.match_cache import match_cache, match_cache_key
+from app.services.llm_client import is_llm_enabled
+from app.services.llm_governor import LLMBudgetExceeded
+from app.services.match_priority import ScoringQueue, pair_priority
+from app.services.resume_matcher import (
+    HARD_GATE_MARGIN_YEARS,
+    ResumeFeatures,
+    _is_hard_gate_blocked,
+    _keyword_coverage,
+    get_resume_features,
+    llm_match,
+    llm_match_batch,
+    resume_features,
+)
 
 logger = logging.getLogger(__name__)
 SINCE_HOURS = 2
 MATCH_THRESHOLD = 75  # Only assign job to user if score > 75%
 
 
-def _score_pair(resume_data: dict[str, Any], job_title: str, job_description: str) -> dict[str, Any]:
+@dataclass(frozen=True)
+class JobSnapshot:
+    """
+    Plain values of a JobListing taken on the caller's thread. Scoring threads get these,
+    never ORM rows: a commit on the caller's session expires the rows, and reading them
+    from a worker would lazy-load through the (not thread-safe) session.
+    """
+
+    id: str
+    title: str
+    description: str
+    features: JobFeatures
+    created_at: datetime | None = None
+
+    @classmethod
+    def of(cls, job: Any) -> "JobSnapshot":
+        return cls(
+            id=job.id,
+            title=job.title or "",
+            description=job.description or "",
+            features=get_job_features(job),
+            created_at=getattr(job, "created_at", None),
+        )
+
+
+def _score_pair(
+    resume: ResumeFeatures | dict[str, Any],
+    job_title: str,
+    job_description: str,
+    job_features: JobFeatures | None = None,
+) -> dict[str, Any]:
     """Get semantic match result. Expects match_score 0-1; we store as 0-100."""
-    result = llm_match(resume_data, job_title, job_description)
+    return _to_pair_result(llm_match(resume, job_title, job_description, job_features))
+
+
+def _score_batch(resume: ResumeFeatures | dict[str, Any], jobs: list[JobSnapshot]) -> list[dict[str, Any] | None]:
+    """
+    Score several jobs for one resume with a batched LLM prompt (see llm_match_batch).
+    Jobs left unscored because the run's LLM budget ran out are None.
+    """
+    results = llm_match_batch(
+        resume,
+        [(job.title, job.description) for job in jobs],
+        [job.features for job in jobs],
+    )
+    return [_to_pair_result(result) if result is not None else None for result in results]
+
+
+def _to_pair_result(result: dict[str, Any]) -> dict[str, Any]:
     score = result.get("match_score", 0) * 100
     return {
         "match_score": round(score, 1),
@@ -26,6 +94,9 @@ def _score_pair(resume_data: dict[str, Any], job_title: str, job_description: st
         "resume_years_experience": result.get("resume_years_experience"),
         "required_years_experience": result.get("required_years_experience"),
         "hard_gate_blocked": bool(result.get("hard_gate_blocked")),
+        "cache_hit": bool(result.get("cache_hit")),
+        "cache_key": result.get("cache_key"),
+        "llm_score": result.get("llm_score"),
     }
 
 
@@ -50,92 +121,423 @@ def _log_score_distribution(scores: list[float], category_id: str) -> None:
     )
 
 
-def _score_user_against_jobs(db: Session, user: User, jobs: list[Any]) -> dict[str, Any]:
-    """Score one user against candidate jobs and create matches above threshold."""
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _throughput_stats(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """Per-run scoring throughput: pairs/sec and p50/p95 per-pair latency (ms)."""
+    ordered = sorted(latencies)
+    return {
+        "pairs": len(ordered),
+        "elapsed_s": round(elapsed, 2),
+        "pairs_per_sec": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+    }
+
+
+def _pair_priorities(
+    features: ResumeFeatures,
+    jobs: list[Any],
+    similarities: dict[str, float],
+    last_active_at: datetime | None,
+) -> list[float]:
+    """Expected-value priority of each job for this resume (see match_priority); all 0 when disabled."""
+    if not settings.deep_match_priority_enabled:
+        return [0.0] * len(jobs)
+    resume_tokens = features.tokens | features.skills
+    now = datetime.now(timezone.utc)
+    priorities = []
+    for job in jobs:
+        coverage = _keyword_coverage(resume_tokens, get_job_features(job).tokens)
+        priorities.append(pair_priority(coverage, similarities.get(job.id), job.created_at, last_active_at, now))
+    return priorities
+
+
+def _latest_resume_features(db: Session, user: User) -> tuple[Any, ResumeFeatures]:
+    """The user's latest resume row (or None) and its features, memoized per resume version."""
     resume = get_latest_by_user(db, user.id)
     resume_data = resume.parsed_data if resume and resume.parsed_data else {}
+    features = (
+        get_resume_features(resume_data, resume.id, resume.updated_at or resume.created_at)
+        if resume else ResumeFeatures.from_data(resume_data)
+    )
+    return resume, features
+
+
+def _prepare_user_pairs(
+    db: Session,
+    user: User,
+    jobs: list[Any],
+    job_vectors: dict[str, Any] | None = None,
+    matched_job_ids: set[str] | None = None,
+    last_active_at: datetime | None = None,
+    user_resume: tuple[Any, ResumeFeatures] | None = None,
+) -> dict[str, Any]:
+    """
+    Build the (user, resume features, job) pairs still to score for one user:
+    drops already-matched jobs and jobs the experience hard gate blocks (stored
+    required_years), then applies the embedding pre-filter.
+    `job_vectors` caches job embeddings (by job_hash) for the pre-filter across users in one run.
+    `matched_job_ids` is the user's already-matched job ids when the caller loaded them
+    in bulk; otherwise they are looked up here with one query.
+    `last_active_at` and the jobs' stored keyword sets feed the per-pair "priorities",
+    aligned with "pairs". `user_resume` is _latest_resume_features(db, user) if already loaded.
+    """
+    resume, features = user_resume if user_resume is not None else _latest_resume_features(db, user)
+    if matched_job_ids is None:
+        matched_job_ids = get_matched_job_ids(db, [user.id], [job.id for job in jobs]).get(user.id, set())
+    pending = [job for job in jobs if job.id not in matched_job_ids]
+    skipped_existing = len(jobs) - len(pending)
+    gated = len(pending)
+    pending = [
+        job for job in pending
+        if not _is_hard_gate_blocked(features.total_years, job.required_years, HARD_GATE_MARGIN_YEARS)
+    ]
+    skipped_hard_gate = gated - len(pending)
+    similarities: dict[str, float] = {}
+    candidates = select_candidates(
+        db,
+        resume.id if resume else None,
+        features.text,
+        pending,
+        job_vectors,
+        similarities=similarities,
+    )
+    return {
+        "pairs": [(user, features, job) for job in candidates],
+        "priorities": _pair_priorities(features, candidates, similarities, last_active_at),
+        "skipped_existing": skipped_existing,
+        "skipped_hard_gate": skipped_hard_gate,
+        "skipped_prefilter": len(pending) - len(candidates),
+    }
+
+
+def _warm_match_cache(db: Session, pairs: list[tuple[User, ResumeFeatures, Any]]) -> int:
+    """
+    Load durable match-cache entries for these pairs into the in-memory tier with
+    one query, so worker threads never touch the DB. Returns count loaded.
+    """
+    if not is_llm_enabled():
+        return 0
+    keys = []
+    for _, resume, job in pairs:
+        key = match_cache_key(resume_features(resume).text, job.title or "", job.description or "")
+        if key not in match_cache:
+            keys.append(key)
+    if not keys:
+        return 0
+    stored = get_cached_matches(db, keys, settings.match_cache_ttl_seconds)
+    for key, (score, reason, created_at) in stored.items():
+        match_cache.put(key, score, reason, stored_at=created_at.timestamp() if created_at else None)
+    return len(stored)
+
+
+def _timed_score_pair(resume: ResumeFeatures | dict[str, Any], job: JobSnapshot) -> tuple[dict[str, Any], float]:
+    """Worker-thread entry point: score one pair and measure its latency."""
+    started = time.perf_counter()
+    result = _score_pair(resume, job.title, job.description, job.features)
+    return result, time.perf_counter() - started
+
+
+def _timed_score_unit(
+    resume: ResumeFeatures | dict[str, Any], jobs: list[JobSnapshot]
+) -> list[tuple[dict[str, Any] | None, float]]:
+    """
+    Worker-thread entry point for one scoring unit: a single pair, or one resume's batched jobs.
+    A batched unit returns None for jobs the run's LLM budget left unscored.
+    """
+    if len(jobs) == 1:
+        return [_timed_score_pair(resume, jobs[0])]
+    started = time.perf_counter()
+    results = _score_batch(resume, jobs)
+    latency = (time.perf_counter() - started) / len(jobs)  # per pair, so throughput stats stay comparable
+    return [(result, latency) for result in results]
+
+
+def _scoring_units(
+    pairs: list[tuple[User, ResumeFeatures, Any]],
+    priorities: list[float],
+    batch_size: int,
+) -> list[tuple[float, tuple[User, ResumeFeatures, list[Any]]]]:
+    """
+    Group each user's pairs, best first, into (priority, (user, resume, jobs)) units of up
+    to `batch_size` jobs that share one LLM prompt; a unit's priority is its best pair's.
+    """
+    if batch_size <= 1:
+        return [(priority, (user, resume, [job])) for (user, resume, job), priority in zip(pairs, priorities)]
+    by_user: dict[str, list[tuple[float, int]]] = {}
+    for index, ((user, _, _), priority) in enumerate(zip(pairs, priorities)):
+        by_user.setdefault(user.id, []).append((priority, index))
+    units = []
+    for ranked in by_user.values():
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        for start in range(0, len(ranked), batch_size):
+            chunk = ranked[start:start + batch_size]
+            user, resume, _ = pairs[chunk[0][1]]
+            units.append((chunk[0][0], (user, resume, [pairs[index][2] for _, index in chunk])))
+    return units
+
+
+def _leaves_window_before_next_run(job: Any) -> bool:
+    """True if `job` will be older than SINCE_HOURS when the next scheduled run starts."""
+    created_at = getattr(job, "created_at", None)
+    if created_at is None:
+        return True
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    next_run = datetime.now(timezone.utc) + timedelta(seconds=settings.pipeline_interval_seconds)
+    return created_at + timedelta(hours=SINCE_HOURS) <= next_run
+
+
+def _score_pairs(
+    db: Session,
+    pairs: list[tuple[User, ResumeFeatures, Any]],
+    priorities: list[float] | None = None,
+) -> dict[str, Any]:
+    """
+    Score pairs with up to `deep_match_concurrency` LLM calls in flight and create
+    matches above threshold. Only LLM scoring runs in worker threads; all DB
+    writes happen here, on the caller's session, and workers only see JobSnapshots
+    taken before the first commit. Matches are buffered and
+    inserted `deep_match_flush_batch_size` at a time; `scored` counts rows
+    actually inserted (pairs matched concurrently elsewhere are not counted).
+    Pairs are started highest `priorities` first; once `deep_match_max_pairs_per_category`
+    or `deep_match_time_budget_seconds` is used up the rest are left unscored ("deferred").
+    Pairs that need an LLM call after the run's LLM budget is spent are deferred too
+    (cache hits and pairs a batched unit already scored are kept). A deferred pair is only
+    retried if its job is still inside the SINCE_HOURS window at the next scheduled run;
+    the others are counted as "dropped".
+    With `deep_match_llm_batch_size` > 1, each user's jobs are scored that many per LLM prompt.
+    """
     scored = 0
-    skipped_existing = 0
+    pending_matches: list[dict[str, Any]] = []
+    flush_size = max(1, settings.deep_match_flush_batch_size)
     skipped_low = 0
     scores: list[float] = []
     low_score_samples: list[tuple[str, float]] = []
+    latencies: list[float] = []
+    cache_hits = 0
+    fresh_results: dict[str, tuple[float, str]] = {}  # LLM answers to persist in the durable cache tier
+    if not pairs:
+        return {
+            "scored": 0,
+            "skipped_low": 0,
+            "scores": scores,
+            "low_score_samples": low_score_samples,
+            "throughput": _throughput_stats(latencies, 0.0),
+            "cache_hits": 0,
+            "llm_scored_pairs": 0,
+            "deferred": 0,
+            "dropped": 0,
+        }
 
-    for job in jobs:
-        if get_existing_match(db, user.id, job.id):
-            skipped_existing += 1
-            continue
-        result = _score_pair(
-            resume_data,
-            job.title or "",
-            job.description or "",
+    pairs = [(user, resume, JobSnapshot.of(job)) for user, resume, job in pairs]
+    cache_db_loaded = _warm_match_cache(db, pairs)
+    started = time.perf_counter()
+    workers = max(1, min(settings.deep_match_concurrency, len(pairs)))
+    queue = ScoringQueue()
+    for priority, unit in _scoring_units(pairs, priorities or [0.0] * len(pairs), settings.deep_match_llm_batch_size):
+        queue.push(unit, priority)
+    max_pairs = settings.deep_match_max_pairs_per_category or len(pairs)
+    time_budget = settings.deep_match_time_budget_seconds
+    submitted = 0
+    budget_deferred = 0
+    deferred_jobs: list[Any] = []
+    in_flight: dict = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deep-match") as executor:
+        while True:
+            # Keep a short backlog in the pool so the budget check stays close to real time.
+            while (
+                queue
+                and len(in_flight) < workers * 2
+                and submitted < max_pairs
+                and not (time_budget and time.perf_counter() - started >= time_budget)
+            ):
+                user, resume, jobs = queue.pop()
+                deferred_jobs.extend(jobs[max_pairs - submitted:])
+                jobs = jobs[:max_pairs - submitted]
+                in_flight[executor.submit(_timed_score_unit, resume, jobs)] = (user, jobs)
+                submitted += len(jobs)
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                user, jobs = in_flight.pop(future)
+                try:
+                    unit_results = future.result()
+                except LLMBudgetExceeded:
+                    budget_deferred += len(jobs)
+                    deferred_jobs.extend(jobs)
+                    continue
+                for job, (result, latency) in zip(jobs, unit_results):
+                    if result is None:  # LLM budget ran out partway through a batched unit
+                        budget_deferred += 1
+                        deferred_jobs.append(job)
+                        continue
+                    latencies.append(latency)
+                    if result.get("cache_hit"):
+                        cache_hits += 1
+                    elif result.get("cache_key"):
+                        fresh_results[result["cache_key"]] = (result["llm_score"], result.get("match_reason") or "")
+                    score = result["match_score"]
+                    scores.append(score)
+                    if result.get("hard_gate_blocked") or score <= MATCH_THRESHOLD:
+                        skipped_low += 1
+                        if len(low_score_samples) < 5:
+                            low_score_samples.append((job.title or "Unknown", score))
+                        continue
+                    pending_matches.append({
+                        "user_id": user.id,
+                        "job_listing_id": job.id,
+                        "match_score": score,
+                        "match_reason": result.get("match_reason"),
+                        "resume_years_experience": result.get("resume_years_experience"),
+                    })
+                    if len(pending_matches) >= flush_size:
+                        scored += bulk_create_matches(db, pending_matches)
+                        pending_matches = []
+
+    scored += bulk_create_matches(db, pending_matches)
+    throughput = _throughput_stats(latencies, time.perf_counter() - started)
+    while queue:
+        deferred_jobs.extend(queue.pop()[2])
+    deferred = len(deferred_jobs)
+    dropped = sum(1 for job in deferred_jobs if _leaves_window_before_next_run(job))
+    if deferred:
+        logger.info(
+            "Deep match budget reached: %d/%d pairs started, %d deferred (%d by the LLM call budget)",
+            submitted, len(pairs), deferred, budget_deferred,
         )
-        score = result["match_score"]
-        scores.append(score)
-        if result.get("hard_gate_blocked"):
-            skipped_low += 1
-            if len(low_score_samples) < 5:
-                low_score_samples.append((job.title or "Unknown", score))
-            continue
-        if score <= MATCH_THRESHOLD:
-            skipped_low += 1
-            if len(low_score_samples) < 5:
-                low_score_samples.append((job.title or "Unknown", score))
-            continue
-        create_match(
-            db,
-            user_id=user.id,
-            job_listing_id=job.id,
-            match_score=score,
-            match_reason=result.get("match_reason"),
-            resume_years_experience=result.get("resume_years_experience"),
+    if dropped:
+        logger.warning(
+            "Deep match dropped %d deferred pairs: their jobs leave the %dh window before the next run",
+            dropped, SINCE_HOURS,
         )
-        scored += 1
-
+    save_cached_matches(db, fresh_results, settings.bedrock_llm_model_id)
+    logger.info(
+        "Match cache: hits=%d (loaded_from_db=%d) misses=%d (llm_scored_pairs=%d)",
+        cache_hits, cache_db_loaded, len(latencies) - cache_hits, len(fresh_results),
+    )
     return {
         "scored": scored,
-        "skipped_existing": skipped_existing,
         "skipped_low": skipped_low,
         "scores": scores,
         "low_score_samples": low_score_samples,
+        "throughput": throughput,
+        "cache_hits": cache_hits,
+        "llm_scored_pairs": len(fresh_results),
+        "deferred": deferred,
+        "dropped": dropped,
     }
 
 
+def _score_user_against_jobs(
+    db: Session,
+    user: User,
+    jobs: list[Any],
+    job_vectors: dict[str, Any] | None = None,
+    user_resume: tuple[Any, ResumeFeatures] | None = None,
+) -> dict[str, Any]:
+    """Score one user against candidate jobs and create matches above threshold."""
+    last_active_at = get_last_activity(db, [user.id]).get(user.id)
+    prepared = _prepare_user_pairs(db, user, jobs, job_vectors, last_active_at=last_active_at, user_resume=user_resume)
+    result = _score_pairs(db, prepared["pairs"], prepared["priorities"])
+    result["skipped_existing"] = prepared["skipped_existing"]
+    result["skipped_hard_gate"] = prepared["skipped_hard_gate"]
+    result["skipped_prefilter"] = prepared["skipped_prefilter"]
+    return result
+
+
+def _log_throughput(label: str, throughput: dict[str, float]) -> None:
+    if not throughput.get("pairs"):
+        return
+    logger.info(
+        "%s scoring throughput: pairs=%d elapsed=%.1fs pairs_per_sec=%.2f p50=%.0fms p95=%.0fms (concurrency=%d)",
+        label,
+        throughput["pairs"],
+        throughput["elapsed_s"],
+        throughput["pairs_per_sec"],
+        throughput["p50_ms"],
+        throughput["p95_ms"],
+        settings.deep_match_concurrency,
+    )
+
+
 def run_deep_match_for_category(db: Session, search_category_id: str) -> dict:
     """
-    For a category: get users + jobs from last 2h. Score all user-job pairs.
-    Returns {"users": int, "jobs": int, "scored": int}.
+    For a category: get users + jobs from last 2h. Score all user-job pairs
+    (fanned out across users so the LLM pool stays busy), highest priority first.
+    Returns {"users": int, "jobs": int, "scored": int, "pairs": int, "llm_scored_pairs": int,
+    "cache_hits": int, "deferred": int, "dropped": int, "throughput": {...}}.
     """
     users = get_users_by_category(db, search_category_id)
-    jobs = get_jobs_by_category_since(db, search_category_id, since_hours=SINCE_HOURS)
+    resumes = {user.id: _latest_resume_features(db, user) for user in users}
+    # Jobs no user in the category can pass the experience hard gate are never loaded.
+    years = [features.total_years for _, features in resumes.values()]
+    jobs = get_jobs_by_category_since(
+        db,
+        search_category_id,
+        since_hours=SINCE_HOURS,
+        experience_years=max(years) if years and None not in years else None,
+        margin_years=HARD_GATE_MARGIN_YEARS,
+    )
     if not users or not jobs:
         logger.debug("Category %s: users=%d jobs=%d (nothing to score)", search_category_id, len(users), len(jobs))
         return {"users": len(users), "jobs": len(jobs), "scored": 0}
 
     logger.info("Deep match category %s: %d users, %d jobs", search_category_id, len(users), len(jobs))
-    scored = 0
     skipped_existing = 0
-    skipped_low = 0
-    all_scores: list[float] = []
-    low_score_samples: list[tuple[str, float]] = []  # (job_title, score) for logging
+    skipped_hard_gate = 0
+    skipped_prefilter = 0
+    pairs: list[tuple[User, ResumeFeatures, Any]] = []
+    priorities: list[float] = []
+    job_vectors: dict[str, Any] = {}  # job embeddings shared by all users in the category
+    user_ids = [user.id for user in users]
+    matched = get_matched_job_ids(db, user_ids, [job.id for job in jobs])
+    last_activity = get_last_activity(db, user_ids)
     for user in users:
-        user_result = _score_user_against_jobs(db, user, jobs)
-        scored += user_result["scored"]
-        skipped_existing += user_result["skipped_existing"]
-        skipped_low += user_result["skipped_low"]
-        all_scores.extend(user_result["scores"])
-        if len(low_score_samples) < 5:
-            remaining = 5 - len(low_score_samples)
-            low_score_samples.extend(user_result["low_score_samples"][:remaining])
-
-    _log_score_distribution(all_scores, search_category_id)
+        prepared = _prepare_user_pairs(
+            db, user, jobs, job_vectors, matched.get(user.id, set()), last_activity.get(user.id), resumes[user.id]
+        )
+        pairs.extend(prepared["pairs"])
+        priorities.extend(prepared["priorities"])
+        skipped_existing += prepared["skipped_existing"]
+        skipped_hard_gate += prepared["skipped_hard_gate"]
+        skipped_prefilter += prepared["skipped_prefilter"]
+
+    result = _score_pairs(db, pairs, priorities)
+    scored = result["scored"]
+    skipped_low = result["skipped_low"]
+    low_score_samples = result["low_score_samples"]  # (job_title, score) for logging
+
+    _log_score_distribution(result["scores"], search_category_id)
     if low_score_samples:
         samples_str = ", ".join(f"{t[:40]!r}={s:.1f}" for t, s in low_score_samples)
         logger.info("Skipped low-score samples (threshold=%d): %s", MATCH_THRESHOLD, samples_str)
     logger.info(
-        "Category %s: scored=%d, skipped_existing=%d, skipped_low=%d",
-        search_category_id, scored, skipped_existing, skipped_low,
+        "Category %s: scored=%d, skipped_existing=%d, skipped_low=%d, skipped_hard_gate=%d, skipped_prefilter=%d, "
+        "deferred=%d",
+        search_category_id, scored, skipped_existing, skipped_low, skipped_hard_gate, skipped_prefilter,
+        result["deferred"],
     )
-    return {"users": len(users), "jobs": len(jobs), "scored": scored}
+    _log_throughput(f"Category {search_category_id}", result["throughput"])
+    return {
+        "users": len(users),
+        "jobs": len(jobs),
+        "scored": scored,
+        "pairs": len(pairs),
+        "llm_scored_pairs": result["llm_scored_pairs"],
+        "cache_hits": result["cache_hits"],
+        "deferred": result["deferred"],
+        "dropped": result["dropped"],
+        "throughput": result["throughput"],
+    }
 
 
 def run_deep_match_for_user(db: Session, user_id: str, since_hours: int = SINCE_HOURS) -> dict:
@@ -148,7 +550,14 @@ def run_deep_match_for_user(db: Session, user_id: str, since_hours: int = SINCE_
     if not user.search_category_id:
         return {"user_id": user_id, "jobs": 0, "scored": 0, "reason": "missing_search_category"}
 
-    jobs = get_jobs_by_category_since(db, user.search_category_id, since_hours=since_hours)
+    user_resume = _latest_resume_features(db, user)
+    jobs = get_jobs_by_category_since(
+        db,
+        user.search_category_id,
+        since_hours=since_hours,
+        experience_years=user_resume[1].total_years,
+        margin_years=HARD_GATE_MARGIN_YEARS,
+    )
     if not jobs:
         logger.debug("Immediate deep match user=%s category=%s: no recent jobs", user_id, user.search_category_id)
         return {
@@ -160,20 +569,25 @@ def run_deep_match_for_user(db: Session, user_id: str, since_hours: int = SINCE_
             "skipped_low": 0,
         }
 
-    user_result = _score_user_against_jobs(db, user, jobs)
+    user_result = _score_user_against_jobs(db, user, jobs, user_resume=user_resume)
     _log_score_distribution(user_result["scores"], user.search_category_id)
     if user_result["low_score_samples"]:
         samples_str = ", ".join(f"{t[:40]!r}={s:.1f}" for t, s in user_result["low_score_samples"])
         logger.info("Immediate deep match low-score samples (threshold=%d): %s", MATCH_THRESHOLD, samples_str)
     logger.info(
-        "Immediate deep match user=%s category=%s: jobs=%d scored=%d skipped_existing=%d skipped_low=%d",
+        "Immediate deep match user=%s category=%s: jobs=%d scored=%d skipped_existing=%d skipped_low=%d "
+        "skipped_hard_gate=%d skipped_prefilter=%d",
         user_id,
         user.search_category_id,
         len(jobs),
         user_result["scored"],
         user_result["skipped_existing"],
         user_result["skipped_low"],
+        user_result.get("skipped_hard_gate", 0),
+        user_result.get("skipped_prefilter", 0),
     )
+    if user_result.get("throughput"):
+        _log_throughput(f"Immediate deep match user={user_id}", user_result["throughput"])
     return {
         "user_id": user_id,
         "category_id": user.search_category_id,
@@ -0,0 +1,136 @@
+"""
+Embedding pre-filter for deep match.
+Ranks a user's candidate jobs by Titan embedding similarity so only the most
+promising pairs are sent to the (expensive) Bedrock LLM scorer.
+Vectors are persisted (`embedding_repo`) so each job/resume is embedded once
+across pipeline runs, users and re-matches.
+"""
+import hashlib
+import logging
+from typing import Any
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.repos.embedding_repo import get_job_vectors, get_resume_vector, save_job_vectors, save_resume_vector
+from app.services.titan_embedding import (
+    cosine_similarity_batch,
+    embed_text_titan,
+    normalize_rows,
+    top_k as top_k_indices,
+    vector_from_bytes,
+    vector_to_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+EMBED_MAX_CHARS = 8000  # Titan V2 accepts ~8k tokens; keep input well under that
+
+
+def _job_embedding_text(job: Any) -> str:
+    return f"{job.title or ''}\n{job.description or ''}".strip()[:EMBED_MAX_CHARS]
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def is_prefilter_enabled() -> bool:
+    """Whether the embedding pre-filter stage is enabled."""
+    return bool(settings.deep_match_prefilter_enabled and settings.titan_embed_model_id)
+
+
+def embed_jobs(db: Session, jobs: list[Any], job_vectors: dict[str, np.ndarray]) -> bool:
+    """
+    Fill `job_vectors` (job_hash -> unit float32 vector) for all jobs, in place:
+    stored vectors first, then Titan for the rest (persisted for later runs).
+    Returns False if Titan is unavailable, so callers can skip the pre-filter.
+    """
+    model_id = settings.titan_embed_model_id
+    missing = [job for job in jobs if job.job_hash not in job_vectors]
+    if not missing:
+        return True
+    stored = get_job_vectors(db, [job.job_hash for job in missing], model_id)
+    for job_hash, packed in stored.items():
+        job_vectors[job_hash] = normalize_rows(vector_from_bytes(packed))
+
+    fresh: dict[str, bytes] = {}
+    ok = True
+    for job in missing:
+        if job.job_hash in job_vectors:
+            continue
+        try:
+            vector = embed_text_titan(_job_embedding_text(job))
+        except Exception as e:
+            logger.warning("Embedding pre-filter disabled for this run: job embed failed: %s", e)
+            ok = False
+            break
+        job_vectors[job.job_hash] = normalize_rows(vector)
+        fresh[job.job_hash] = vector_to_bytes(vector)
+    # Persist whatever was embedded, even on partial failure, so the work is not repeated.
+    save_job_vectors(db, fresh, model_id)
+    logger.debug("Job embeddings: %d stored, %d newly embedded", len(stored), len(fresh))
+    return ok
+
+
+def _resume_vector(db: Session, resume_id: str | None, resume_text: str) -> np.ndarray:
+    """Unit resume vector: stored one when the text is unchanged; otherwise embed and store it."""
+    model_id = settings.titan_embed_model_id
+    text = resume_text[:EMBED_MAX_CHARS]
+    content_hash = _content_hash(text)
+    if resume_id:
+        packed = get_resume_vector(db, resume_id, content_hash, model_id)
+        if packed is not None:
+            return normalize_rows(vector_from_bytes(packed))
+    vector = embed_text_titan(text)
+    if resume_id:
+        save_resume_vector(db, resume_id, content_hash, model_id, vector_to_bytes(vector))
+    return normalize_rows(vector)
+
+
+def select_candidates(
+    db: Session,
+    resume_id: str | None,
+    resume_text: str,
+    jobs: list[Any],
+    job_vectors: dict[str, np.ndarray] | None = None,
+    similarities: dict[str, float] | None = None,
+) -> list[Any]:
+    """
+    Return the jobs worth LLM scoring for this resume, most similar first.
+    Keeps the top `deep_match_prefilter_top_k` jobs whose cosine similarity is at
+    least `deep_match_prefilter_min_similarity`. Falls back to all jobs when the
+    pre-filter is disabled, there are too few jobs to bother, or Titan fails.
+    `job_vectors` lets callers share job embeddings across users in one run.
+    `similarities`, if given, is filled with job id -> cosine similarity for the kept jobs.
+    """
+    top_k = max(1, settings.deep_match_prefilter_top_k)
+    if not is_prefilter_enabled() or not resume_text or len(jobs) <= top_k:
+        return list(jobs)
+    if job_vectors is None:
+        job_vectors = {}
+
+    try:
+        resume_vector = _resume_vector(db, resume_id, resume_text)
+    except Exception as e:
+        logger.warning("Embedding pre-filter skipped: resume embed failed: %s", e)
+        return list(jobs)
+    if not embed_jobs(db, jobs, job_vectors):
+        return list(jobs)
+
+    matrix = np.stack([job_vectors[job.job_hash] for job in jobs])
+    indices, sims = top_k_indices(cosine_similarity_batch(resume_vector, matrix), top_k)
+    min_similarity = settings.deep_match_prefilter_min_similarity
+    kept = []
+    for i, sim in zip(indices.tolist(), sims.tolist()):
+        if sim < min_similarity:
+            continue
+        kept.append(jobs[i])
+        if similarities is not None:
+            similarities[jobs[i].id] = sim
+    logger.debug(
+        "Embedding pre-filter kept %d/%d jobs (top_k=%d min_similarity=%.2f)",
+        len(kept), len(jobs), top_k, min_similarity,
+    )
+    return kept
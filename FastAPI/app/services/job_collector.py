@@ -1,15 +1,21 @@
 import logging
+import math
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
 
 import pandas as pd
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.job_listing import compute_job_hash
+from app.repos.collector_watermark_repo import get_for_categories as get_watermarks, save_many as save_watermarks
 from app.repos.search_category_repo import get_all, get_by_id as get_category_by_id, get_categories_with_active_users
-from app.repos.job_listing_repo import batch_upsert
+from app.repos.job_listing_repo import add_alternate_urls, batch_upsert
 from app.services.job_fetcher import fetch_and_deduplicate_jobs
+from app.services.near_duplicate import NearDuplicateIndex
 
 logger = logging.getLogger(__name__)
 
@@ -18,11 +24,33 @@ _shared_results: list[dict] = []
 _lock = threading.Lock()
 
 
+def _column_values(df: pd.DataFrame, names: tuple[str, ...], default=None) -> list:
+    """
+    First non-empty value per row across columns `names` (NaN/None/"" count as empty),
+    computed column-wise; rows with no value get `default`. Returns a plain list.
+    """
+    values = pd.Series(None, index=df.index, dtype=object)
+    for name in names:
+        if name not in df.columns:
+            continue
+        col = df[name].astype(object)
+        usable = values.isna() & col.notna() & (col != "")
+        values = values.where(~usable, col)
+    values = values.where(values.notna(), default)
+    return values.tolist()
+
+
+def _dedup_key(row: dict) -> tuple[str, str]:
+    """Normalized (title, company) used for cross-category deduplication."""
+    return str(row.get("title", "")).lower().strip(), str(row.get("company", "")).lower().strip()
+
+
 def _fetch_for_category(
     category_slug: str,
     category_id: str,
     results_wanted: int | None = None,
     hours_old: int | None = None,
+    site_hours_old: dict[str, int] | None = None,
 ) -> list[dict]:
     """Fetch jobs for one category. Called in worker thread."""
     wanted = results_wanted if results_wanted is not None else settings.job_results_wanted
@@ -33,35 +61,266 @@ def _fetch_for_category(
             location=settings.job_location,
             results_wanted=wanted,
             hours_old=hours,
+            site_hours_old=site_hours_old,
         )
     except Exception as e:
         logger.warning("Fetch failed for category %s: %s", category_slug, e)
         return []
     if df is None or df.empty:
         return []
+    titles = _column_values(df, ("title",), "Unknown Title")
+    companies = _column_values(df, ("company", "company_name"), "Unknown Company")
+    job_urls = _column_values(df, ("job_url",), "")
+    descriptions = _column_values(df, ("description", "job_description", "desc"), "")
+    locations = _column_values(df, ("location",))
+    posted = _column_values(df, ("posted_at", "date_posted"))
+    sites = _column_values(df, ("site",))
     rows = []
-    for _, r in df.iterrows():
-        title = str(r.get("title") or "Unknown Title")
-        company = str(r.get("company") or r.get("company_name") or "Unknown Company")
-        job_url = str(r.get("job_url") or "")
+    for title, company, job_url, desc, location, posted_at, site in zip(
+        titles, companies, job_urls, descriptions, locations, posted, sites
+    ):
         if not job_url:
             continue
-        desc = r.get("description") or r.get("job_description") or r.get("desc")
-        if desc is None or (isinstance(desc, float) and str(desc) == "nan"):
-            desc = ""
+        title, company, job_url = str(title), str(company), str(job_url)
         rows.append({
             "title": title,
             "company": company,
             "job_url": job_url,
             "description": str(desc),
-            "location": r.get("location"),
-            "posted_at": r.get("posted_at") or r.get("date_posted"),
+            "location": location,
+            "posted_at": posted_at,
             "search_category_id": category_id,
+            "site": str(site) if site is not None else None,
             "job_hash": compute_job_hash(title, company, job_url),
         })
     return rows
 
 
+def _load_watermarks(db: Session, category_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """{category_id: {site: CollectorWatermark}} for incremental collection (one query)."""
+    if not settings.collector_incremental_enabled:
+        return {}
+    by_category: dict[str, dict[str, Any]] = {}
+    for wm in get_watermarks(db, category_ids):
+        by_category.setdefault(wm.search_category_id, {})[wm.site] = wm
+    return by_category
+
+
+def _site_hours_old(site_watermarks: dict[str, Any], hours_old: int, now: datetime) -> dict[str, int]:
+    """
+    Per-site posting window for a category: whole hours since the site's last scrape
+    plus the overlap margin, capped at `hours_old`. The newest posted time is not used:
+    jobspy's date_posted is date-only, so it sits at midnight and would never narrow the window.
+    """
+    windows = {}
+    for site, wm in site_watermarks.items():
+        since = wm.last_scraped_at
+        if since is None:
+            continue
+        hours = math.ceil((now - since).total_seconds() / 3600) + settings.collector_watermark_overlap_hours
+        windows[site] = max(1, min(hours_old, hours))
+    return windows
+
+
+def _advance_watermarks(
+    watermarks: dict[str, dict[str, Any]],
+    rows: list[dict],
+    scraped_at: datetime,
+) -> list[dict]:
+    """New watermark values for every (category, site) that returned rows this run."""
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for r in rows:
+        if r.get("search_category_id") and r.get("site"):
+            groups.setdefault((r["search_category_id"], r["site"]), []).append(r)
+    max_hashes = max(0, settings.collector_watermark_max_hashes)
+    entries = []
+    for (cid, site), group in groups.items():
+        prev = watermarks.get(cid, {}).get(site)
+        newest = pd.to_datetime(
+            pd.Series([r.get("posted_at") for r in group], dtype=object), errors="coerce", utc=True
+        ).max()
+        last_posted_at = None if pd.isna(newest) else newest.to_pydatetime()
+        if prev is not None and prev.last_posted_at is not None:
+            last_posted_at = max(prev.last_posted_at, last_posted_at) if last_posted_at else prev.last_posted_at
+        recent = [r["job_hash"] for r in group] + list((prev.recent_job_hashes if prev is not None else None) or [])
+        entries.append({
+            "search_category_id": cid,
+            "site": site,
+            "last_posted_at": last_posted_at,
+            "last_scraped_at": scraped_at,
+            "recent_job_hashes": list(dict.fromkeys(recent))[:max_hashes],
+        })
+    return entries
+
+
+def _is_known(watermarks: dict[str, dict[str, Any]], row: dict) -> bool:
+    wm = watermarks.get(row.get("search_category_id") or "", {}).get(row.get("site") or "")
+    return wm is not None and row["job_hash"] in (wm.recent_job_hashes or ())
+
+
+def _empty_result(categories: int = 0) -> dict:
+    return {"total_fetched": 0, "total_deduped": 0, "inserted": 0, "categories": categories}
+
+
+def select_categories(db: Session, category_ids: list[str] | None = None) -> list:
+    """Categories to scrape: the given ids (deduped, existing only), else categories with active users."""
+    if category_ids:
+        categories = []
+        seen: set[str] = set()
+        for category_id in category_ids:
+            if not category_id or category_id in seen:
+                continue
+            seen.add(category_id)
+            cat = get_category_by_id(db, category_id)
+            if cat:
+                categories.append(cat)
+        return categories
+    categories = get_categories_with_active_users(db)
+    if not categories:
+        all_cats = get_all(db)
+        if not all_cats:
+            logger.warning("No search categories. Seed them first.")
+        else:
+            logger.info(
+                "No categories with active users; skipping scrape. "
+                "Total categories=%d (scrape only runs for categories in use)",
+                len(all_cats),
+            )
+    return categories
+
+
+@dataclass(frozen=True)
+class FetchPlan:
+    """
+    What to scrape for one category, as plain values. Built on the caller's thread
+    (CollectorRun.plan) so scrape threads never read ORM rows, which a commit on the
+    caller's session expires and would then lazy-load through that session.
+    """
+
+    category_id: str
+    slug: str
+    site_hours_old: dict[str, int] = field(default_factory=dict)
+
+
+class CollectorRun:
+    """
+    State for one collection run: fetch window per category (watermarks), and
+    known-job / exact / near-duplicate filtering across categories. `plan` runs on
+    the caller's thread, `fetch` in worker threads. `accept` takes all rows at once
+    (run_collector) or one category at a time (staged pipeline).
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        categories: list,
+        results_wanted: int | None = None,
+        hours_old: int | None = None,
+    ):
+        self.results_wanted = results_wanted
+        self.hours_old = hours_old
+        # An explicit window (new-user bootstrap) keeps recently seen jobs: delete_unmatched may have
+        # removed them after the last run, and the new user still needs them stored.
+        self.skip_known = settings.collector_incremental_enabled and hours_old is None
+        self.scraped_at = datetime.now(timezone.utc)
+        self.watermarks = _load_watermarks(db, [c.id for c in categories])
+        self.watermark_updates: list[dict] = []
+        self.seen_keys: set[tuple[str, str]] = set()
+        self.near_dup_index = (
+            NearDuplicateIndex(threshold=settings.near_duplicate_threshold) if settings.near_duplicate_enabled else None
+        )
+        self.kept: list[dict] = []  # rows accepted so far; near-dup index keys are positions in this list
+        self._batch_start = 0  # kept[:_batch_start] came from earlier accept calls (already handed out to store)
+        self.alternate_url_updates: dict[str, list[dict]] = {}  # job_hash -> URLs for rows already handed out
+        self.fetched = 0
+        self.skipped_known = 0
+        self.near_duplicates = 0
+        self.inserted = 0
+
+    def plan(self, category) -> FetchPlan:
+        """Fetch plan for one category (caller's thread: reads the category and watermark rows)."""
+        # An explicit hours_old (e.g. new-user bootstrap) is honored as-is.
+        site_hours = {} if self.hours_old is not None else _site_hours_old(
+            self.watermarks.get(category.id, {}), settings.job_hours_old, self.scraped_at
+        )
+        return FetchPlan(category_id=category.id, slug=category.slug, site_hours_old=site_hours)
+
+    def fetch(self, plan: FetchPlan) -> list[dict]:
+        """Scrape one category (worker thread; uses only the plan's plain values)."""
+        args = (plan.slug, plan.category_id)
+        if self.results_wanted is not None or self.hours_old is not None:
+            args += (self.results_wanted, self.hours_old)
+        if plan.site_hours_old:
+            return _fetch_for_category(*args, site_hours_old=plan.site_hours_old)
+        return _fetch_for_category(*args)
+
+    def accept(self, rows: list[dict]) -> list[dict]:
+        """Drop recently seen, exact-duplicate and near-duplicate rows; returns rows to upsert."""
+        self.fetched += len(rows)
+        self._batch_start = len(self.kept)
+        if settings.collector_incremental_enabled:
+            self.watermark_updates.extend(_advance_watermarks(self.watermarks, rows, self.scraped_at))
+        fresh = [r for r in rows if not _is_known(self.watermarks, r)] if self.skip_known else rows
+        self.skipped_known += len(rows) - len(fresh)
+
+        accepted = []
+        for r in fresh:
+            # Global deduplication: keep the first row per normalized title + company
+            key = _dedup_key(r)
+            if key in self.seen_keys:
+                continue
+            self.seen_keys.add(key)
+            if self.near_dup_index is not None and self._collapse_near_duplicate(r):
+                continue
+            self.kept.append(r)
+            accepted.append(r)
+        return accepted
+
+    def _collapse_near_duplicate(self, row: dict) -> bool:
+        """
+        If `row` is a near-duplicate (cross-posted job) of an accepted row, record its
+        URL on that row as extra_data["alternate_urls"] and return True. If that row came
+        from an earlier accept call (staged pipeline: may already be stored), the URL is
+        also queued for save_alternate_urls.
+        """
+        canonical = self.near_dup_index.add(len(self.kept), row.get("title"), row.get("company"), row.get("description"))
+        if canonical is None:
+            return False
+        target = self.kept[canonical]
+        alternate = {"url": row.get("job_url"), "site": row.get("site")}
+        extra = dict(target.get("extra_data") or {})
+        extra["alternate_urls"] = list(extra.get("alternate_urls") or []) + [alternate]
+        target["extra_data"] = extra
+        if canonical < self._batch_start:
+            job_hash = target.get("job_hash") or compute_job_hash(
+                target.get("title", ""), target.get("company", ""), target.get("job_url", "")
+            )
+            self.alternate_url_updates.setdefault(job_hash, []).append(alternate)
+        self.near_duplicates += 1
+        return True
+
+    def save_alternate_urls(self, db: Session) -> None:
+        """Write near-duplicate URLs found for rows stored by an earlier accept call."""
+        if self.alternate_url_updates:
+            add_alternate_urls(db, self.alternate_url_updates)
+            self.alternate_url_updates = {}
+
+    def save_watermarks(self, db: Session) -> None:
+        """Advance watermarks; call only after the accepted rows are stored."""
+        save_watermarks(db, self.watermark_updates)
+        self.watermark_updates = []
+
+    def result(self, categories: int) -> dict:
+        return {
+            "total_fetched": self.fetched,
+            "total_deduped": len(self.kept),
+            "inserted": self.inserted,
+            "categories": categories,
+            "skipped_known": self.skipped_known,
+            "near_duplicates": self.near_duplicates,
+        }
+
+
 def _append_to_shared(rows: list[dict]) -> None:
     with _lock:
         _shared_results.extend(rows)
@@ -76,86 +335,61 @@ def run_collector(
 ) -> dict:
     """
     Run the full collector: fetch only categories with active users, spawn threads, dedupe, upsert.
-    Returns {"total_fetched": int, "total_deduped": int, "inserted": int, "categories": int}.
+    With incremental collection on, each (category, site) is scraped only back to its
+    watermark and jobs seen recently on that site are dropped before dedup/upsert.
+    Returns {"total_fetched": int, "total_deduped": int, "inserted": int, "categories": int,
+    "skipped_known": int, "near_duplicates": int, "by_category": {category_id: {"fetched", "deduped", "inserted"}}}.
     """
     global _shared_results
     _shared_results = []
 
-    if category_ids:
-        categories = []
-        seen: set[str] = set()
-        for category_id in category_ids:
-            if not category_id or category_id in seen:
-                continue
-            seen.add(category_id)
-            cat = get_category_by_id(db, category_id)
-            if cat:
-                categories.append(cat)
-        if not categories:
-            return {"total_fetched": 0, "total_deduped": 0, "inserted": 0, "categories": 0}
-    else:
-        categories = get_categories_with_active_users(db)
-        if not categories:
-            all_cats = get_all(db)
-            if not all_cats:
-                logger.warning("No search categories. Seed them first.")
-            else:
-                logger.info(
-                    "No categories with active users; skipping scrape. "
-                    "Total categories=%d (scrape only runs for categories in use)",
-                    len(all_cats),
-                )
-            return {"total_fetched": 0, "total_deduped": 0, "inserted": 0, "categories": 0}
+    categories = select_categories(db, category_ids)
+    if not categories:
+        return _empty_result()
 
     logger.info("Fetching jobs for %d categories with active users: %s", len(categories), [c.slug for c in categories])
 
+    run = CollectorRun(db, categories, results_wanted, hours_old)
+    plans = [run.plan(c) for c in categories]
     with ThreadPoolExecutor(max_workers=min(len(categories), 8)) as executor:
-        if results_wanted is None and hours_old is None:
-            futures = {executor.submit(_fetch_for_category, c.slug, c.id): c for c in categories}
-        else:
-            futures = {
-                executor.submit(_fetch_for_category, c.slug, c.id, results_wanted, hours_old): c
-                for c in categories
-            }
+        futures = {executor.submit(run.fetch, plan): plan for plan in plans}
         for future in as_completed(futures):
-            cat = futures[future]
+            plan = futures[future]
             try:
                 rows = future.result()
                 _append_to_shared(rows)
             except Exception as e:
-                logger.exception("Thread failed for %s: %s", cat.slug, e)
+                logger.exception("Thread failed for %s: %s", plan.slug, e)
 
-    total_fetched = len(_shared_results)
-    if total_fetched == 0:
-        return {"total_fetched": 0, "total_deduped": 0, "inserted": 0, "categories": len(categories)}
+    if not _shared_results:
+        return _empty_result(len(categories))
 
-    # Global deduplication: drop duplicates by title + company
-    df = pd.DataFrame(_shared_results)
-    df["title_clean"] = df["title"].astype(str).str.lower().str.strip()
-    df["company_clean"] = df["company"].astype(str).str.lower().str.strip()
-    df = df.drop_duplicates(subset=["title_clean", "company_clean"], keep="first")
-    df = df.drop(columns=["title_clean", "company_clean"])
-    deduped = df.to_dict("records")
-    total_deduped = len(deduped)
+    category_counts: dict[str, dict[str, int]] = {}
+    for r in _shared_results:
+        cid = r.get("search_category_id")
+        if cid:
+            counts = category_counts.setdefault(cid, {"fetched": 0, "deduped": 0, "inserted": 0})
+            counts["fetched"] += 1
+    deduped = run.accept(_shared_results)
 
     # Batch upsert per category (ON CONFLICT job_hash DO NOTHING)
-    inserted = 0
     by_category: dict[str, list[dict]] = {}
     for r in deduped:
         cid = r.get("search_category_id")
         if cid:
             by_category.setdefault(cid, []).append(r)
     for cid, rows in by_category.items():
-        n = batch_upsert(db, rows, cid)
-        inserted += n
+        inserted = batch_upsert(db, rows, cid)
+        run.inserted += inserted
+        category_counts[cid].update(deduped=len(rows), inserted=inserted)
+    # Advance watermarks only after the rows are stored.
+    run.save_watermarks(db)
 
+    result = run.result(len(categories))
+    result["by_category"] = category_counts
     logger.info(
-        "Collector done: fetched=%d, deduped=%d, inserted=%d",
-        total_fetched, total_deduped, inserted,
+        "Collector done: fetched=%d, skipped_known=%d, near_duplicates=%d, deduped=%d, inserted=%d",
+        result["total_fetched"], result["skipped_known"], result["near_duplicates"],
+        result["total_deduped"], result["inserted"],
     )
-    return {
-        "total_fetched": total_fetched,
-        "total_deduped": total_deduped,
-        "inserted": inserted,
-        "categories": len(categories),
-    }
+    return result
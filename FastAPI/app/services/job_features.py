@@ -0,0 +1,132 @@
+"""
+Per-listing job description features used by matching: the minimum required
+years of experience (hard gate) and the keyword token set (fallback scorer,
+scoring priority). They depend only on the job, so they are computed once when
+a listing is stored (`extra_data["features"]`, plus the indexed `required_years`
+column for the SQL-side hard gate; see job_listing_repo) instead of re-parsing
+the description for every (user, job) pair.
+"""
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+FEATURES_VERSION = 1  # bump when extraction changes; older stored features are recomputed on read
+JOB_FEATURES_CACHE_SIZE = 4096
+
+KEYWORD_STOPWORDS = frozenset({
+    "and", "the", "with", "for", "from", "that", "this", "you", "your", "our", "are", "was", "were",
+    "have", "has", "had", "into", "onto", "about", "over", "under", "than", "their", "them", "they",
+    "will", "would", "could", "should", "must", "can", "across", "using", "use", "used", "build", "built",
+    "experience", "project", "projects", "role", "team", "work", "worked", "developer", "engineer",
+})
+_KEYWORD_TOKEN_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9_+#.-]{1,}")
+
+# "5+ years of experience", "minimum of 3 years", "3-5 years of experience" (lower bound) ...
+_REQUIRED_YEARS_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"(\d+(?:\.\d+)?)\s*\+\s*years?\s+of\s+experience",
+        r"minimum\s+of\s+(\d+(?:\.\d+)?)\s+years?",
+        r"at\s+least\s+(\d+(?:\.\d+)?)\s+years?",
+        r"(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s+years?\s+of\s+experience",
+        r"(\d+(?:\.\d+)?)\s+years?\s+of\s+experience",
+        r"(\d+(?:\.\d+)?)\s+years?\s+experience",
+    )
+)
+
+
+def keyword_tokens(text: str) -> set[str]:
+    """Lowercased keyword set used by the fallback scorer (stopwords removed)."""
+    return {t for t in (m.lower() for m in _KEYWORD_TOKEN_RE.findall(text or "")) if t not in KEYWORD_STOPWORDS}
+
+
+def extract_required_years(job_description: str) -> float | None:
+    """Largest minimum-years requirement stated in the description (ranges count by their lower bound)."""
+    if not job_description:
+        return None
+    text = " ".join(job_description.split())
+    candidates = [float(m.group(1)) for pattern in _REQUIRED_YEARS_PATTERNS for m in pattern.finditer(text)]
+    if not candidates:
+        return None
+    return round(max(candidates), 1)
+
+
+@dataclass(frozen=True)
+class JobFeatures:
+    required_years: float | None
+    tokens: frozenset[str]  # keyword_tokens(title + description)
+
+    def to_json(self) -> dict[str, Any]:
+        return {"version": FEATURES_VERSION, "required_years": self.required_years, "tokens": sorted(self.tokens)}
+
+    @classmethod
+    def from_json(cls, data: Any) -> "JobFeatures | None":
+        """Stored features, or None if missing, malformed or from an older FEATURES_VERSION."""
+        if not isinstance(data, dict) or data.get("version") != FEATURES_VERSION:
+            return None
+        tokens = data.get("tokens")
+        if not isinstance(tokens, list):
+            return None
+        required_years = data.get("required_years")
+        return cls(
+            required_years=float(required_years) if isinstance(required_years, (int, float)) else None,
+            tokens=frozenset(str(t) for t in tokens),
+        )
+
+
+def compute_job_features(title: str | None, description: str | None) -> JobFeatures:
+    return JobFeatures(
+        required_years=extract_required_years(description or ""),
+        tokens=frozenset(keyword_tokens(f"{title or ''}\n{description or ''}")),
+    )
+
+
+def job_feature_columns(
+    extra_data: dict[str, Any] | None, title: str | None, description: str | None
+) -> dict[str, Any]:
+    """
+    job_listings column values carrying freshly computed features: `extra_data` (copied, with
+    "features") and the indexed `required_years`. Call whenever title or description change.
+    """
+    features = compute_job_features(title, description)
+    extra = dict(extra_data or {})
+    extra["features"] = features.to_json()
+    return {"extra_data": extra, "required_years": features.required_years}
+
+
+_features_cache: OrderedDict[tuple[str, str], JobFeatures] = OrderedDict()
+_features_lock = threading.Lock()
+
+
+def get_job_features(job: Any) -> JobFeatures:
+    """
+    Features of a JobListing: the stored ones when current, else computed from title and
+    description (rows stored before features existed). Memoized (LRU) by id + updated_at.
+    """
+    job_id = getattr(job, "id", None)
+    updated_at = getattr(job, "updated_at", None)
+    key = (str(job_id), updated_at.isoformat() if updated_at else "")
+    if job_id:
+        with _features_lock:
+            features = _features_cache.get(key)
+            if features is not None:
+                _features_cache.move_to_end(key)
+                return features
+    extra = getattr(job, "extra_data", None)
+    features = JobFeatures.from_json(extra.get("features") if isinstance(extra, dict) else None)
+    if features is None:
+        features = compute_job_features(job.title, job.description)
+    if job_id:
+        with _features_lock:
+            _features_cache[key] = features
+            while len(_features_cache) > JOB_FEATURES_CACHE_SIZE:
+                _features_cache.popitem(last=False)
+    return features
+
+
+def _reset_job_features() -> None:
+    """Drop memoized job features (tests)."""
+    with _features_lock:
+        _features_cache.clear()
@@ -1,4 +1,7 @@
 import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import pandas as pd
 
@@ -11,6 +14,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Per-site scrape slots shared by all categories (e.g. at most one LinkedIn scrape at a time)
+_site_slots: dict[str, threading.BoundedSemaphore] = {}
+_site_slots_lock = threading.Lock()
+
 
 def _site_names_from_settings() -> list[str]:
     raw = settings.job_site_names or ""
@@ -18,23 +25,61 @@ def _site_names_from_settings() -> list[str]:
     return names or ["indeed", "linkedin", "zip_recruiter", "google"]
 
 
-def fetch_and_deduplicate_jobs(
-    search_term: str = "Software Engineer",
-    location: str = "United States",
-    results_wanted: int = 100,
-    hours_old: int = 2,
+def _parse_site_overrides(raw: str | None) -> dict[str, int]:
+    """Parse "site:value,site:value" into {site: int}; malformed entries are ignored."""
+    out: dict[str, int] = {}
+    for part in (raw or "").split(","):
+        site, sep, value = part.partition(":")
+        if not sep:
+            continue
+        try:
+            out[site.strip()] = int(value.strip())
+        except ValueError:
+            logger.warning("Ignoring malformed site override %r", part)
+    return out
+
+
+def _site_timeout(site: str) -> float:
+    overrides = _parse_site_overrides(settings.job_site_timeout_overrides)
+    return float(max(1, overrides.get(site, settings.job_site_timeout_seconds)))
+
+
+def _site_slot(site: str) -> threading.BoundedSemaphore:
+    with _site_slots_lock:
+        slot = _site_slots.get(site)
+        if slot is None:
+            overrides = _parse_site_overrides(settings.job_site_concurrency_overrides)
+            slot = threading.BoundedSemaphore(max(1, overrides.get(site, settings.job_site_max_concurrency)))
+            _site_slots[site] = slot
+        return slot
+
+
+def _scrape_site(
+    site: str,
+    search_term: str,
+    location: str,
+    results_wanted: int,
+    hours_old: int,
+    cancel: threading.Event | None = None,
+    scrape_started: dict[str, float] | None = None,
 ) -> pd.DataFrame | None:
     """
-    Fetches jobs from multiple boards and removes duplicates within the batch.
-    Returns a DataFrame with columns including title, company, job_url, description, etc.
+    Scrape one board, holding that site's concurrency slot. Runs in a worker thread.
+    Waits at most the site timeout for the slot (TimeoutError otherwise), skips the scrape
+    if the caller has given up on it (`cancel`), and records when the scrape actually
+    started in `scrape_started[site]` so the caller's timeout excludes time spent queued.
     """
-    if scrape_jobs is None:
-        raise RuntimeError("jobspy is not installed. pip install python-jobspy")
-
-    logger.info("Fetching jobs: term=%r, location=%r, results_wanted=%d", search_term, location, results_wanted)
+    slot = _site_slot(site)
+    if not slot.acquire(timeout=_site_timeout(site)):
+        raise TimeoutError(f"no free {site} scrape slot")
     try:
+        if cancel is not None and cancel.is_set():
+            return None
+        started = time.perf_counter()
+        if scrape_started is not None:
+            scrape_started[site] = time.monotonic()
         jobs = scrape_jobs(
-            site_name=_site_names_from_settings(),
+            site_name=[site],
             search_term=search_term,
             location=location,
             results_wanted=results_wanted,
@@ -42,13 +87,111 @@ def fetch_and_deduplicate_jobs(
             country_indeed=settings.job_country_indeed,
             linkedin_fetch_description=True,
         )
-    except Exception as e:
-        logger.exception("Scraping error")
-        raise RuntimeError(f"Scraping error: {e}") from e
+    finally:
+        slot.release()
+    logger.debug(
+        "Scraped %s for %r: %d rows in %.1fs",
+        site, search_term, 0 if jobs is None else len(jobs), time.perf_counter() - started,
+    )
+    if jobs is not None and not jobs.empty and "site" not in jobs.columns:
+        jobs = jobs.assign(site=site)
+    return jobs
 
-    if jobs is None or jobs.empty:
+
+def _scrape_sites(
+    search_term: str,
+    location: str,
+    results_wanted: int,
+    hours_old: int,
+    site_hours_old: dict[str, int] | None = None,
+) -> list[pd.DataFrame]:
+    """
+    Scrape every configured site in parallel and collect frames as they finish.
+    `site_hours_old` narrows the posting window per site (incremental collection).
+    A site's timeout counts from when its scrape starts, after it gets the site's
+    concurrency slot (waiting for the slot is capped separately, see `_scrape_site`).
+    A site that errors or times out is dropped: its thread is abandoned, not waited
+    for, and skips the scrape if it has not started yet. Raises RuntimeError only if
+    every site failed.
+    """
+    sites = _site_names_from_settings()
+    frames: list[pd.DataFrame] = []
+    errors: list[str] = []
+    cancel = threading.Event()
+    scrape_started: dict[str, float] = {}
+    executor = ThreadPoolExecutor(max_workers=len(sites), thread_name_prefix="job-scrape")
+    try:
+        submitted = time.monotonic()
+        futures = {
+            executor.submit(
+                _scrape_site, site, search_term, location, results_wanted, (site_hours_old or {}).get(site, hours_old),
+                cancel, scrape_started,
+            ): site
+            for site in sites
+        }
+
+        def _deadline(future) -> float:
+            site = futures[future]
+            # Queued tasks give up on the slot after one timeout on their own; allow for that.
+            started = scrape_started.get(site, submitted + _site_timeout(site))
+            return started + _site_timeout(site)
+
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            for future in [f for f in pending if _deadline(f) <= now and not f.done()]:
+                pending.discard(future)
+                site = futures[future]
+                errors.append(f"{site}: timed out")
+                logger.warning(
+                    "Scrape of %s for %r timed out after %.0fs", site, search_term, now - scrape_started.get(site, submitted)
+                )
+            if not pending:
+                break
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, min(_deadline(f) for f in pending) - now),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                site = futures[future]
+                try:
+                    jobs = future.result()
+                except Exception as e:
+                    logger.warning("Scraping error for %s (%r): %s", site, search_term, e)
+                    errors.append(f"{site}: {e}")
+                    continue
+                if jobs is not None and not jobs.empty:
+                    frames.append(jobs)
+    finally:
+        cancel.set()  # abandoned tasks still waiting for a slot must not scrape
+        executor.shutdown(wait=False, cancel_futures=True)
+    if errors and len(errors) == len(sites):
+        raise RuntimeError(f"Scraping error: {'; '.join(errors)}")
+    return frames
+
+
+def fetch_and_deduplicate_jobs(
+    search_term: str = "Software Engineer",
+    location: str = "United States",
+    results_wanted: int = 100,
+    hours_old: int = 2,
+    site_hours_old: dict[str, int] | None = None,
+) -> pd.DataFrame | None:
+    """
+    Fetches jobs from multiple boards (one task per site, see `_scrape_sites`) and
+    removes duplicates within the batch. `site_hours_old` overrides `hours_old` per site.
+    Returns a DataFrame with columns including title, company, job_url, description, etc.
+    """
+    if scrape_jobs is None:
+        raise RuntimeError("jobspy is not installed. pip install python-jobspy")
+
+    logger.info("Fetching jobs: term=%r, location=%r, results_wanted=%d", search_term, location, results_wanted)
+    frames = _scrape_sites(search_term, location, results_wanted, hours_old, site_hours_old)
+    if not frames:
         logger.warning("No jobs returned for %r", search_term)
         return None
+    jobs = pd.concat(frames, ignore_index=True)
 
     unique_jobs = jobs.copy()
     unique_jobs.columns = [str(c).lower() for c in unique_jobs.columns]
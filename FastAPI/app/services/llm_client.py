@@ -1,24 +1,137 @@
 import json
 import logging
+import random
 import re
+import threading
+import time
 from typing import Any
 
 import boto3
 from botocore.config import Config
 
 from app.config import settings
+from app.services.llm_governor import LLMCircuitOpen, classify_error, llm_circuit, llm_governor
 
 logger = logging.getLogger(__name__)
 
+CONNECT_TIMEOUT_SECONDS = 10
+# Bump whenever the llm_match_resume_job prompt or parsing changes; invalidates cached match results.
+MATCH_PROMPT_VERSION = "match-v2"
+
+# Process-wide bedrock-runtime clients keyed by (region, read_timeout, connect_timeout).
+# Clients are thread-safe once built; building them from boto3's default session is not,
+# so construction happens under the lock.
+_clients: dict[tuple[str, int, int], Any] = {}
+_clients_lock = threading.Lock()
+_client_constructions = 0
+
+
+def _max_pool_connections() -> int:
+    """Enough pooled HTTP connections for every concurrent scoring call (botocore default is 10)."""
+    return max(10, settings.deep_match_concurrency + 2)
+
+
+def _get_bedrock_client(timeout: float):
+    """Return the cached bedrock-runtime client for this timeout config, building it once."""
+    global _client_constructions
+    key = (settings.aws_region, int(timeout), CONNECT_TIMEOUT_SECONDS)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.client(
+                "bedrock-runtime",
+                region_name=key[0],
+                config=Config(
+                    read_timeout=key[1],
+                    connect_timeout=key[2],
+                    max_pool_connections=_max_pool_connections(),
+                    tcp_keepalive=True,
+                    # _call_bedrock_llm owns retries; botocore's own would hide throttles from
+                    # llm_governor and multiply attempts per call.
+                    retries={"total_max_attempts": 1},
+                ),
+            )
+            _clients[key] = client
+            _client_constructions += 1
+            logger.info(
+                "Created Bedrock runtime client region=%s read_timeout=%ds pool=%d (constructions=%d)",
+                key[0], key[1], _max_pool_connections(), _client_constructions,
+            )
+    return client
+
+
+def get_bedrock_client_stats() -> dict[str, int]:
+    """Client reuse counters: a steady `client_constructions` means connections are being reused."""
+    with _clients_lock:
+        return {"clients_cached": len(_clients), "client_constructions": _client_constructions}
+
+
+def _reset_bedrock_clients() -> None:
+    """Drop cached clients (tests / credential rotation)."""
+    global _client_constructions
+    with _clients_lock:
+        _clients.clear()
+        _client_constructions = 0
+
 
-def _call_bedrock_llm(prompt: str, timeout: float = 60.0) -> str:
-    """Call Bedrock LLM via converse API and return response text."""
+def _retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(max, base * 2**attempt))."""
+    cap = min(settings.llm_retry_max_seconds, settings.llm_retry_base_seconds * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def _call_bedrock_llm(prompt: str, timeout: float = 60.0, max_tokens: int = 1200) -> str:
+    """
+    Call Bedrock LLM via converse API and return response text (paced by `llm_governor`).
+    Throttling and transient errors are retried up to `llm_max_retries` times with jittered
+    backoff; other errors raise at once. Every failed attempt counts toward `llm_circuit`,
+    which raises LLMCircuitOpen without calling Bedrock while open (also between retries).
+    """
+    attempt = 0
+    while True:
+        llm_circuit.before_call()
+        try:
+            with llm_governor.slot():
+                text = _converse(prompt, timeout, max_tokens)
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == "fatal":
+                llm_circuit.record_success()  # Bedrock answered; the request itself was rejected
+                raise
+            llm_circuit.record_failure()
+            if attempt >= settings.llm_max_retries:
+                raise
+            delay = _retry_delay(attempt)
+            attempt += 1
+            logger.info(
+                "Retrying Bedrock call after %s error in %.2fs (retry %d/%d): %s",
+                kind, delay, attempt, settings.llm_max_retries, e,
+            )
+            time.sleep(delay)
+            continue
+        llm_circuit.record_success()
+        return text
+
+
+def _call_scoring_llm(prompt: str, **kwargs: Any) -> str:
+    """
+    _call_bedrock_llm for a match-scoring prompt, charged to the run budget. A call the
+    open circuit rejects is refunded, so an outage does not spend the budget.
+    """
+    llm_governor.charge_run_budget()
     try:
-        client = boto3.client(
-            "bedrock-runtime",
-            region_name=settings.aws_region,
-            config=Config(read_timeout=int(timeout), connect_timeout=10),
-        )
+        return _call_bedrock_llm(prompt, **kwargs)
+    except LLMCircuitOpen:
+        llm_governor.refund_run_budget()
+        raise
+
+
+def _converse(prompt: str, timeout: float, max_tokens: int) -> str:
+    try:
+        client = _get_bedrock_client(timeout)
         model_ids = [settings.bedrock_llm_model_id]
         # Common typo safety: "ministral" -> "mistral".
         if "ministral" in settings.bedrock_llm_model_id:
@@ -37,7 +150,7 @@ def _call_bedrock_llm(prompt: str, timeout: float = 60.0) -> str:
                         }
                     ],
                     inferenceConfig={
-                        "maxTokens": 1200,
+                        "maxTokens": max_tokens,
                         "temperature": 0.2,
                     },
                 )
@@ -45,8 +158,14 @@ def _call_bedrock_llm(prompt: str, timeout: float = 60.0) -> str:
             except Exception as e:
                 last_err = e
                 logger.warning("Bedrock LLM model attempt failed: model=%s err=%s", model_id, e)
+                kind = classify_error(e)
+                if kind == "throttle":
+                    llm_governor.on_throttle()
+                if kind != "fatal":
+                    break  # the alias shares the same endpoint and quota
         if response is None and last_err is not None:
             raise last_err
+        llm_governor.on_success()
 
         blocks = (response.get("output") or {}).get("message", {}).get("content", [])
         text = "".join(b.get("text", "") for b in blocks if isinstance(b, dict)).strip()
@@ -57,28 +176,8 @@ def _call_bedrock_llm(prompt: str, timeout: float = 60.0) -> str:
         raise
 
 
-def is_llm_enabled() -> bool:
-    """Whether Bedrock LLM is enabled."""
-    return bool(settings.bedrock_llm_enabled and settings.bedrock_llm_model_id and settings.aws_region)
-
-
-def llm_match_resume_job(
-    resume_summary: str,
-    job_title: str,
-    job_description: str,
-) -> tuple[float, str]:
-    """
-    Score resume vs job (0-1) using Bedrock LLM.
-    Returns (match_score, match_reason).
-    """
-    prompt = f"""You are a strict resume-to-JD matcher. Use ONLY the provided resume text. Do not guess.
-        If a detail is not explicitly in the resume, mark it as "unknown".
-
-        TASK:
-        Compare Candidate Resume vs Job Description and return ONLY JSON:
-        {{"match_score": number, "match_reason": string, "breakdown": {{...}}}}
-
-        RULES (IMPORTANT):
+# Scoring rubric shared by the single and batched match prompts.
+_MATCH_RULES = """RULES (IMPORTANT):
         1) Compute Years of Experience (YoE) FROM EXPERIENCE DATES:
         - Extract each role with start and end dates.
         - If "Present", use 2026-02.
@@ -113,7 +212,32 @@ def llm_match_resume_job(
         - junior-only signals -> low; senior ownership -> high.
 
         WEIGHTS:
-        final_score = 0.35*yoe_score + 0.35*tech_score + 0.15*project_score + 0.15*impact_score
+        final_score = 0.35*yoe_score + 0.35*tech_score + 0.15*project_score + 0.15*impact_score"""
+
+
+def is_llm_enabled() -> bool:
+    """Whether Bedrock LLM is enabled."""
+    return bool(settings.bedrock_llm_enabled and settings.bedrock_llm_model_id and settings.aws_region)
+
+
+def llm_match_resume_job(
+    resume_summary: str,
+    job_title: str,
+    job_description: str,
+) -> tuple[float, str]:
+    """
+    Score resume vs job (0-1) using Bedrock LLM.
+    Returns (match_score, match_reason). Raises LLMBudgetExceeded once the pipeline run's budget is spent,
+    and ValueError when the answer carries no readable score.
+    """
+    prompt = f"""You are a strict resume-to-JD matcher. Use ONLY the provided resume text. Do not guess.
+        If a detail is not explicitly in the resume, mark it as "unknown".
+
+        TASK:
+        Compare Candidate Resume vs Job Description and return ONLY JSON:
+        {{"match_score": number, "match_reason": string, "breakdown": {{...}}}}
+
+        {_MATCH_RULES}
 
         EVIDENCE REQUIREMENT:
         In breakdown, include evidence snippets:
@@ -130,34 +254,119 @@ def llm_match_resume_job(
         JOB DESCRIPTION:
         <<<{job_description}>>>"""
 
-    text = _call_bedrock_llm(prompt)
-    score, reason = 0.5, "Could not parse LLM response"
-    try:
-        # Try direct JSON parse first.
-        try:
-            obj = json.loads(text)
-        except Exception:
-            obj = None
+    text = _call_scoring_llm(prompt)
+    return _parse_match_score(text)
+
 
+def _parse_match_score(text: str) -> tuple[float, str]:
+    """
+    (score 0-1, reason) from a single-match answer.
+    Raises ValueError when no score can be read, so callers never cache a made-up default.
+    """
+    score, reason = None, None
+    # Try direct JSON parse first.
+    try:
+        obj = json.loads(text)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        obj = None
+
+    if isinstance(obj, dict):
+        score = _normalize_match_score(obj.get("match_score"))
+        reason = obj.get("match_reason")
+    else:
         # If model wraps JSON in prose/markdown, find score/reason via regex.
-        if obj is None:
-            score_match = re.search(r'"match_score"\s*:\s*([0-9]+(?:\.[0-9]+)?)', text, re.IGNORECASE)
-            reason_match = re.search(r'"match_reason"\s*:\s*"([^"]+)"', text, re.IGNORECASE)
-            if score_match:
-                score = float(score_match.group(1))
-            if reason_match:
-                reason = reason_match.group(1)
-        else:
-            score = float(obj.get("match_score", 0.5))
-            reason = str(obj.get("match_reason", reason))
-
-        # Normalize score whether model returns 0-1 or 0-100.
-        if score > 1.0:
-            score = score / 100.0
-        score = max(0, min(1, score))
+        score_match = re.search(r'"match_score"\s*:\s*([0-9]+(?:\.[0-9]+)?)', text or "", re.IGNORECASE)
+        reason_match = re.search(r'"match_reason"\s*:\s*"([^"]+)"', text or "", re.IGNORECASE)
+        if score_match:
+            score = _normalize_match_score(score_match.group(1))
+        if reason_match:
+            reason = reason_match.group(1)
+
+    if score is None:
+        raise ValueError(f"Could not parse LLM match response: {(text or '')[:200]!r}")
+    return score, str(reason) if reason else "No reason given by LLM."
+
+
+BATCH_REASON_TOKENS = 200  # output allowance per job in a batched prompt
+
+
+def _normalize_match_score(value: Any) -> float | None:
+    """0-1 score from a model answer given as 0-1 or 0-100; None if not a number."""
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    if score != score:  # NaN
+        return None
+    if score > 1.0:
+        score = score / 100.0
+    return max(0.0, min(1.0, score))
+
+
+def _parse_batch_scores(text: str, count: int) -> list[tuple[float, str] | None]:
+    """Per-job (score, reason) from a JSON array answer; items that are missing or invalid are None."""
+    results: list[tuple[float, str] | None] = [None] * count
+    clean = re.sub(r"^```(?:json)?\s*|\s*```$", "", (text or "").strip(), flags=re.IGNORECASE)
+    match = re.search(r"\[[\s\S]*\]", clean)
+    try:
+        items = json.loads(match.group(0) if match else clean)
     except (json.JSONDecodeError, ValueError) as e:
-        logger.warning("Failed to parse match response: %s", e)
-    return score, reason
+        logger.warning("Failed to parse batched match response: %s", e)
+        return results
+    if not isinstance(items, list):
+        return results
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        job = item.get("job")
+        if isinstance(job, bool) or not isinstance(job, int) or not 1 <= job <= count or results[job - 1] is not None:
+            continue
+        score = _normalize_match_score(item.get("match_score"))
+        reason = item.get("match_reason")
+        if score is None or not isinstance(reason, str) or not reason.strip():
+            continue
+        results[job - 1] = (score, reason.strip())
+    return results
+
+
+def llm_match_resume_jobs_batch(
+    resume_summary: str,
+    jobs: list[tuple[str, str]],
+) -> list[tuple[float, str] | None]:
+    """
+    Score one resume against several (job_title, job_description) pairs in a single prompt,
+    with the same rubric as llm_match_resume_job. Returns (match_score 0-1, match_reason) per
+    job, in order; None for items the model left out or answered invalidly, so callers can
+    score those one by one. Charges the run budget once per batch.
+    """
+    if not jobs:
+        return []
+    job_blocks = "\n\n".join(
+        f"JOB {i}:\nJOB TITLE:\n<<<{title}>>>\nJOB DESCRIPTION:\n<<<{description}>>>"
+        for i, (title, description) in enumerate(jobs, start=1)
+    )
+    prompt = f"""You are a strict resume-to-JD matcher. Use ONLY the provided resume text. Do not guess.
+        If a detail is not explicitly in the resume, mark it as "unknown".
+
+        TASK:
+        Score the Candidate Resume against EACH of the {len(jobs)} numbered jobs independently.
+        Return ONLY a JSON array with one object per job, no breakdown:
+        [{{"job": <job number>, "match_score": number, "match_reason": string}}, ...]
+
+        {_MATCH_RULES}
+
+        Keep each match_reason to one or two sentences.
+
+        INPUTS:
+        RESUME:
+        <<<{resume_summary}>>>
+
+        {job_blocks}"""
+
+    text = _call_scoring_llm(prompt, max_tokens=max(1200, BATCH_REASON_TOKENS * len(jobs)))
+    return _parse_batch_scores(text, len(jobs))
 
 
 def llm_assign_category(resume_title: str, category_slugs: list[str]) -> str | None:
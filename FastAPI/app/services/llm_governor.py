@@ -0,0 +1,309 @@
+"""
+Process-wide governor for Bedrock LLM calls.
+Every call through `llm_client._call_bedrock_llm` takes a slot (concurrency cap)
+and a token from a token bucket (requests/sec) first. Throttling errors halve
+the effective rate and pause all callers briefly; successes grow it back to
+the configured rate. A pipeline run can also open a scoring-call budget: once
+spent, `charge_run_budget` raises `LLMBudgetExceeded` so deep match defers the
+remaining pairs instead of falling back to keyword scores.
+`llm_circuit` fast-fails calls (`LLMCircuitOpen`) after repeated throttling or
+transient failures, so callers drop to their fallback instead of waiting out
+timeouts during a Bedrock brownout.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_ERROR_CODES = frozenset({"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"})
+TRANSIENT_ERROR_CODES = frozenset({
+    "ServiceUnavailableException", "InternalServerException", "ModelNotReadyException", "ModelTimeoutException",
+    "RequestTimeout", "RequestTimeoutException",
+})
+# botocore / stdlib network failures, matched by class name so botocore stays an implementation detail.
+TRANSIENT_ERROR_TYPES = frozenset({
+    "ReadTimeoutError", "ConnectTimeoutError", "EndpointConnectionError", "ConnectionClosedError", "TimeoutError",
+    "ConnectionError",
+})
+MIN_RATE_FRACTION = 0.1  # adaptive backoff never drops below this share of the configured rate
+MAX_BACKOFF_SECONDS = 30.0
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """The current pipeline run has used its LLM scoring-call budget."""
+
+
+class LLMCircuitOpen(RuntimeError):
+    """Bedrock calls are being fast-failed after repeated failures."""
+
+
+def _error_code(err: BaseException) -> str | None:
+    return ((getattr(err, "response", None) or {}).get("Error") or {}).get("Code")
+
+
+def is_throttle_error(err: BaseException) -> bool:
+    """True for Bedrock/botocore throttling errors (ClientError code or exception name)."""
+    return _error_code(err) in THROTTLE_ERROR_CODES or type(err).__name__ in THROTTLE_ERROR_CODES
+
+
+def classify_error(err: BaseException) -> str:
+    """
+    "throttle" (quota / rate errors), "transient" (timeouts, 5xx, model not ready) or
+    "fatal" (bad request, auth, unknown model ...). Only the first two are worth retrying.
+    """
+    if is_throttle_error(err):
+        return "throttle"
+    code = _error_code(err)
+    status = ((getattr(err, "response", None) or {}).get("ResponseMetadata") or {}).get("HTTPStatusCode")
+    if code in TRANSIENT_ERROR_CODES or type(err).__name__ in TRANSIENT_ERROR_TYPES or (status or 0) >= 500:
+        return "transient"
+    return "fatal"
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures and rejects calls for
+    `reset_seconds`; then lets a single probe through (half-open) whose outcome closes
+    or re-opens it. A threshold of 0 disables the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._opened_at = 0.0
+            self._probing = False
+            self._opens = 0
+            self._rejected = 0
+
+    def before_call(self) -> None:
+        """Raise LLMCircuitOpen while open (or while the half-open probe is in flight)."""
+        with self._lock:
+            if self.failure_threshold <= 0 or self._state == "closed":
+                return
+            if self._state == "open" and self._clock() - self._opened_at >= self.reset_seconds:
+                self._state = "half_open"
+            if self._state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            self._rejected += 1
+            remaining = max(0.0, self.reset_seconds - (self._clock() - self._opened_at))
+        raise LLMCircuitOpen(f"Bedrock circuit open; retrying in {remaining:.0f}s")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                logger.info("Bedrock circuit closed after a successful probe")
+            self._state = "closed"
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.failure_threshold <= 0:
+                return
+            if self._state == "half_open" or (self._state == "closed" and self._failures >= self.failure_threshold):
+                self._state = "open"
+                self._opened_at = self._clock()
+                self._opens += 1
+                failures = self._failures
+            else:
+                return
+        logger.error(
+            "Bedrock circuit opened after %d consecutive failures; fast-failing calls for %ss",
+            failures, self.reset_seconds,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opens": self._opens,
+                "rejected": self._rejected,
+            }
+
+
+class LLMGovernor:
+    """Thread-safe token bucket + concurrency cap + per-run call budget with adaptive backoff."""
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        max_concurrency: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._cond = threading.Condition()
+        self._clock = clock
+        self._sleep = sleep
+        self.rate_per_second = rate_per_second  # 0 = no rate limit
+        self.burst = max(1, burst)
+        self.max_concurrency = max_concurrency  # 0 = no concurrency cap
+        self._in_flight = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Refill the bucket and clear backoff, run state and counters (tests / reconfiguration)."""
+        with self._cond:
+            self._rate = self.rate_per_second
+            self._tokens = float(self.burst)
+            self._refilled_at = self._clock()
+            self._backoff_until = 0.0
+            self._backoff_seconds = 0.0
+            self._budget: int | None = None
+            self._run: dict[str, Any] | None = None
+            self._totals = {"calls": 0, "throttles": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    def _record_wait(self, waited: float) -> None:
+        for counters in (self._totals, self._run):
+            if counters is None:
+                continue
+            counters["calls"] += 1
+            if waited > 0:
+                counters["waits"] += 1
+                counters["wait_seconds"] += waited
+                counters["max_wait_seconds"] = max(counters["max_wait_seconds"], waited)
+
+    def acquire(self) -> float:
+        """Block until a slot and a rate token are free; returns seconds spent waiting."""
+        started = self._clock()
+        with self._cond:
+            while self.max_concurrency > 0 and self._in_flight >= self.max_concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            while True:
+                with self._cond:
+                    now = self._clock()
+                    delay = self._backoff_until - now
+                    if delay <= 0:
+                        if self._rate <= 0:
+                            break
+                        self._refill(now)
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+                        delay = (1 - self._tokens) / self._rate
+                self._sleep(delay)
+        except BaseException:
+            self.release()
+            raise
+        waited = self._clock() - started
+        with self._cond:
+            self._record_wait(waited)
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        """`with llm_governor.slot():` around one Bedrock call."""
+        waited = self.acquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def on_throttle(self) -> None:
+        """Halve the effective rate and pause every caller for an exponentially growing backoff."""
+        with self._cond:
+            self._totals["throttles"] += 1
+            if self._run is not None:
+                self._run["throttles"] += 1
+            if self.rate_per_second > 0:
+                self._rate = max(self.rate_per_second * MIN_RATE_FRACTION, self._rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+            self._backoff_seconds = min(MAX_BACKOFF_SECONDS, max(1.0, self._backoff_seconds * 2))
+            self._backoff_until = self._clock() + self._backoff_seconds
+            rate, backoff = self._rate, self._backoff_seconds
+        logger.warning("Bedrock throttled: rate lowered to %.2f/s, pausing calls for %.1fs", rate, backoff)
+
+    def on_success(self) -> None:
+        """Recover 10% of the configured rate per successful call and reset the backoff."""
+        with self._cond:
+            self._backoff_seconds = 0.0
+            if self.rate_per_second > 0 and self._rate < self.rate_per_second:
+                self._rate = min(self.rate_per_second, self._rate + self.rate_per_second * 0.1)
+
+    def start_run(self, budget: int = 0) -> None:
+        """Open per-run counters; `budget` caps scoring calls until finish_run (0 = unlimited)."""
+        with self._cond:
+            self._budget = budget if budget > 0 else None
+            self._run = {
+                "calls": 0, "throttles": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                "budget": self._budget, "budget_used": 0, "budget_denied": 0,
+            }
+
+    def charge_run_budget(self) -> None:
+        """Count one scoring call against the open run's budget; raises LLMBudgetExceeded when spent."""
+        with self._cond:
+            if self._run is None:
+                return
+            if self._budget is not None and self._run["budget_used"] >= self._budget:
+                self._run["budget_denied"] += 1
+                raise LLMBudgetExceeded(f"LLM call budget of {self._budget} for this run is spent")
+            self._run["budget_used"] += 1
+
+    def refund_run_budget(self) -> None:
+        """Give back one charge_run_budget for a call that never reached Bedrock."""
+        with self._cond:
+            if self._run is not None and self._run["budget_used"] > 0:
+                self._run["budget_used"] -= 1
+
+    def budget_exhausted(self) -> bool:
+        with self._cond:
+            return self._run is not None and self._budget is not None and self._run["budget_used"] >= self._budget
+
+    def finish_run(self) -> dict[str, Any]:
+        """Close the run and return its counters (calls, waits, wait seconds, throttles, budget use)."""
+        with self._cond:
+            run, self._run, self._budget = self._run, None, None
+        return self._round(run or {})
+
+    @staticmethod
+    def _round(counters: dict[str, Any]) -> dict[str, Any]:
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in counters.items()}
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            out = self._round(self._totals)
+            out.update({
+                "rate_per_second": round(self._rate, 3),
+                "configured_rate_per_second": self.rate_per_second,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "backing_off": self._backoff_until > self._clock(),
+                "current_run": self._round(self._run) if self._run is not None else None,
+            })
+            return out
+
+
+llm_governor = LLMGovernor(
+    settings.llm_rate_per_second,
+    settings.llm_burst,
+    settings.llm_max_concurrency,
+)
+llm_circuit = CircuitBreaker(settings.llm_circuit_failure_threshold, settings.llm_circuit_reset_seconds)
@@ -0,0 +1,82 @@
+"""
+Content-addressed cache for LLM resume-job match results.
+Keys hash everything that determines the LLM answer (resume text, job title,
+job description, model id, prompt version), so a pair is scored once no matter
+how often deep match is re-triggered. The in-memory tier is TTL + LRU; the
+`llm_match_cache` table is the durable tier that survives restarts.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+from app.services.llm_client import MATCH_PROMPT_VERSION
+
+
+def match_cache_key(
+    resume_text: str,
+    job_title: str,
+    job_description: str,
+    model_id: str | None = None,
+    prompt_version: str = MATCH_PROMPT_VERSION,
+) -> str:
+    payload = json.dumps(
+        [resume_text or "", job_title or "", job_description or "", model_id or settings.bedrock_llm_model_id, prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MatchResultCache:
+    """Thread-safe in-memory TTL + LRU cache of (match_score, match_reason) by cache key."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, str, float]] = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> tuple[float, str] | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[2] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: str, match_score: float, match_reason: str, stored_at: float | None = None) -> None:
+        """Insert/refresh an entry; `stored_at` (epoch seconds) keeps the original age of DB-loaded results."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (match_score, match_reason, stored_at if stored_at is not None else time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() - entry[2] <= self.ttl_seconds
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+match_cache = MatchResultCache(settings.match_cache_max_entries, settings.match_cache_ttl_seconds)
@@ -0,0 +1,71 @@
+"""
+Expected-value ordering for deep match scoring.
+Pending (user, job) pairs are ranked by cheap signals (keyword overlap,
+embedding similarity, job freshness and user activity) and scored highest
+first, so when a category's pair or time budget runs out the likeliest
+matches have already been scored.
+"""
+import heapq
+import itertools
+from datetime import datetime, timezone
+from typing import Any
+
+# Relative weight of each signal; missing signals drop out of the weighted mean.
+WEIGHTS = {"keyword": 0.4, "similarity": 0.35, "freshness": 0.15, "activity": 0.1}
+FRESHNESS_HALF_LIFE_HOURS = 24.0
+ACTIVITY_HALF_LIFE_DAYS = 14.0
+
+
+def _half_life_decay(age: float, half_life: float) -> float:
+    return 0.5 ** (max(0.0, age) / half_life)
+
+
+def _hours_since(ts: datetime | None, now: datetime) -> float | None:
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (now - ts).total_seconds() / 3600
+
+
+def pair_priority(
+    keyword: float | None = None,
+    similarity: float | None = None,
+    job_created_at: datetime | None = None,
+    last_active_at: datetime | None = None,
+    now: datetime | None = None,
+) -> float:
+    """
+    Expected-value score in [0, 1] for one pair: weighted mean of keyword coverage,
+    embedding cosine similarity, job freshness and user activity (both half-life decayed).
+    """
+    now = now or datetime.now(timezone.utc)
+    signals: dict[str, float] = {}
+    if keyword is not None:
+        signals["keyword"] = keyword
+    if similarity is not None:
+        signals["similarity"] = max(0.0, min(1.0, similarity))
+    job_age = _hours_since(job_created_at, now)
+    if job_age is not None:
+        signals["freshness"] = _half_life_decay(job_age, FRESHNESS_HALF_LIFE_HOURS)
+    idle = _hours_since(last_active_at, now)
+    signals["activity"] = _half_life_decay(idle / 24, ACTIVITY_HALF_LIFE_DAYS) if idle is not None else 0.0
+    total_weight = sum(WEIGHTS[name] for name in signals)
+    return sum(WEIGHTS[name] * value for name, value in signals.items()) / total_weight
+
+
+class ScoringQueue:
+    """Max-priority queue of pending pairs; equal priorities keep insertion order."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+
+    def push(self, item: Any, priority: float) -> None:
+        heapq.heappush(self._heap, (-priority, next(self._seq), item))
+
+    def pop(self) -> Any:
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
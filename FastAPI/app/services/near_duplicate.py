@@ -0,0 +1,105 @@
+"""
+Near-duplicate job detection (MinHash + LSH).
+The same posting cross-listed on several boards often differs only in title
+punctuation, whitespace or description boilerplate, so exact (title, company)
+dedup keeps both. Jobs are blocked by normalized company and compared on
+MinHash signatures of title + description word shingles.
+"""
+import re
+import zlib
+from typing import Hashable
+
+import numpy as np
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32; shingle hashes are 32-bit crc32
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+_COMPANY_SUFFIXES = {"inc", "llc", "ltd", "corp", "corporation", "co", "company", "plc", "gmbh", "the"}
+# Seniority markers must agree: "Senior Engineer" and "Engineer" often share one JD template.
+_LEVEL_TOKENS = {
+    "sr": "senior", "senior": "senior", "jr": "junior", "junior": "junior", "lead": "lead",
+    "principal": "principal", "staff": "staff", "intern": "intern", "manager": "manager",
+    "director": "director", "i": "1", "ii": "2", "iii": "3", "iv": "4",
+}
+SHINGLE_SIZE = 3
+MAX_DESCRIPTION_CHARS = 4000  # boilerplate tails (EEO, benefits) add noise, not signal
+
+
+def normalize_company(company: str | None) -> str:
+    """Lowercased company tokens without legal suffixes: "Acme, Inc." -> "acme"."""
+    tokens = [t for t in _TOKEN_RE.findall(str(company or "").lower()) if t not in _COMPANY_SUFFIXES]
+    return " ".join(tokens)
+
+
+def title_level(title: str | None) -> frozenset[str]:
+    """Seniority markers in a title: "Sr. Software Engineer II" -> {"senior", "2"}."""
+    return frozenset(_LEVEL_TOKENS[t] for t in _TOKEN_RE.findall(str(title or "").lower()) if t in _LEVEL_TOKENS)
+
+
+def shingles(title: str | None, description: str | None) -> set[str]:
+    """Title tokens plus word 3-grams of the (truncated) description."""
+    title_tokens = _TOKEN_RE.findall(str(title or "").lower())
+    words = _TOKEN_RE.findall(str(description or "")[:MAX_DESCRIPTION_CHARS].lower())
+    out = {f"t:{t}" for t in title_tokens}
+    out.update(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(0, len(words) - SHINGLE_SIZE + 1)))
+    if len(words) < SHINGLE_SIZE:
+        out.update(words)
+    return out
+
+
+class NearDuplicateIndex:
+    """
+    In-memory MinHash LSH index. `add` returns the key of an already indexed
+    near-duplicate (estimated Jaccard >= threshold, same normalized company and
+    title seniority), or None after indexing the new job.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # h(x) = (a*x + b) mod p; a, b, x < 2**32 so a*x + b fits in uint64 without overflow.
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._signatures: dict[Hashable, np.ndarray] = {}
+        self._buckets: dict[tuple, list[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, items: set[str]) -> np.ndarray:
+        """MinHash signature (num_perm,) of a shingle set."""
+        if not items:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        x = np.fromiter((zlib.crc32(s.encode()) for s in items), dtype=np.uint64, count=len(items))
+        return ((np.outer(x, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def similarity(self, sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(sig_a == sig_b))
+
+    def add(self, key: Hashable, title: str | None, company: str | None, description: str | None) -> Hashable | None:
+        block = (normalize_company(company), title_level(title))
+        sig = self.signature(shingles(title, description))
+        band_keys = [
+            (i, block, sig[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)
+        ]
+        best_key, best_sim = None, self.threshold
+        checked: set[Hashable] = set()
+        for band_key in band_keys:
+            for other in self._buckets.get(band_key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                sim = self.similarity(sig, self._signatures[other])
+                if sim >= best_sim:
+                    best_key, best_sim = other, sim
+        if best_key is not None:
+            return best_key
+        self._signatures[key] = sig
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return None
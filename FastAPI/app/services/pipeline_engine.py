@@ -0,0 +1,243 @@
+"""
+Staged pipeline engine: scrape -> store -> match, overlapped per category.
+Scrapes run on a thread pool and hand each finished category to the caller's
+thread through a queue; the caller upserts that category and deep-matches it
+while other categories are still scraping. The DB session and ORM rows are only
+used on the caller's thread; scrape workers get plain FetchPlans. Queue depths and per-stage timings are kept in `pipeline_stats`.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.repos.job_listing_repo import batch_upsert
+from app.repos.search_category_repo import get_all as get_all_categories
+from app.services.deep_match_service import run_deep_match_for_category
+from app.services.job_collector import CollectorRun, FetchPlan, select_categories
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("scrape", "store", "match")
+
+
+class PipelineStats:
+    """Thread-safe queue depths and timings for the current and last staged run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current: dict[str, Any] | None = None
+        self._last: dict[str, Any] | None = None
+
+    def start_run(self) -> None:
+        with self._lock:
+            self._current = {
+                "started_at": datetime.now(timezone.utc),
+                "stages": {
+                    stage: {"queue_depth": 0, "in_flight": 0, "completed": 0, "seconds": 0.0, "max_seconds": 0.0}
+                    for stage in STAGES
+                },
+            }
+
+    def enqueue(self, stage: str, n: int = 1) -> None:
+        with self._lock:
+            if self._current:
+                self._current["stages"][stage]["queue_depth"] += n
+
+    def begin(self, stage: str) -> None:
+        with self._lock:
+            if self._current:
+                s = self._current["stages"][stage]
+                s["queue_depth"] = max(0, s["queue_depth"] - 1)
+                s["in_flight"] += 1
+
+    def end(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            if self._current:
+                s = self._current["stages"][stage]
+                s["in_flight"] = max(0, s["in_flight"] - 1)
+                s["completed"] += 1
+                s["seconds"] += seconds
+                s["max_seconds"] = max(s["max_seconds"], seconds)
+
+    def finish_run(self) -> None:
+        with self._lock:
+            if self._current:
+                self._last = self._serialize(self._current)
+                self._current = None
+
+    @staticmethod
+    def _serialize(run: dict[str, Any]) -> dict[str, Any]:
+        elapsed = (datetime.now(timezone.utc) - run["started_at"]).total_seconds()
+        return {
+            "started_at": run["started_at"].isoformat(),
+            "elapsed_s": round(elapsed, 3),
+            "stages": {
+                stage: {k: round(v, 3) if isinstance(v, float) else v for k, v in values.items()}
+                for stage, values in run["stages"].items()
+            },
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "current_run": self._serialize(self._current) if self._current else None,
+                "last_run": self._last,
+            }
+
+
+pipeline_stats = PipelineStats()
+
+
+MATCH_COUNTERS = ("users", "jobs", "pairs", "scored", "llm_scored_pairs", "cache_hits")
+
+
+def _category_metrics(category_id: str) -> dict[str, Any]:
+    """Per-category metrics row (see PipelineRunCategory); stage seconds stay None if the stage did not run."""
+    metrics: dict[str, Any] = {
+        "search_category_id": category_id,
+        "scrape_seconds": None,
+        "store_seconds": None,
+        "match_seconds": None,
+        "fetched": 0,
+        "deduped": 0,
+        "inserted": 0,
+    }
+    metrics.update({k: 0 for k in MATCH_COUNTERS})
+    return metrics
+
+
+def _scrape(run: CollectorRun, plan: FetchPlan, handoff: queue.Queue) -> None:
+    """Worker: scrape one category and always hand a result to the caller's thread."""
+    pipeline_stats.begin("scrape")
+    started = time.perf_counter()
+    rows: list[dict] = []
+    try:
+        rows = run.fetch(plan)
+    except Exception as e:
+        logger.exception("Scrape failed for %s: %s", plan.slug, e)
+    finally:
+        seconds = time.perf_counter() - started
+        pipeline_stats.end("scrape", seconds)
+        pipeline_stats.enqueue("store")
+        handoff.put((plan, rows, seconds))
+
+
+def _match_category(db: Session, metrics: dict[str, Any], totals: dict[str, int]) -> None:
+    pipeline_stats.begin("match")
+    started = time.perf_counter()
+    try:
+        r = run_deep_match_for_category(db, metrics["search_category_id"])
+    finally:
+        metrics["match_seconds"] = round(time.perf_counter() - started, 3)
+        pipeline_stats.end("match", metrics["match_seconds"])
+    for key in MATCH_COUNTERS:
+        metrics[key] = r.get(key, 0)
+        totals[key] += metrics[key]
+
+
+def run_match_stage(
+    db: Session,
+    collector_counts: dict[str, dict[str, int]] | None = None,
+    *,
+    skip_category_ids: set[str] | None = None,
+    on_category_done: Callable[[str, dict[str, Any]], None] | None = None,
+) -> dict[str, int]:
+    """
+    Deep-match every category one after another (sequential pipeline, after run_collector),
+    reporting the same per-category metrics as run_staged_pipeline. `collector_counts` is
+    run_collector's "by_category"; stage seconds other than match stay None on this path.
+    Returns the MATCH_COUNTERS totals.
+    """
+    totals = {k: 0 for k in MATCH_COUNTERS}
+    for category in get_all_categories(db):
+        if category.id in (skip_category_ids or ()):
+            continue
+        metrics = _category_metrics(category.id)
+        metrics.update((collector_counts or {}).get(category.id, {}))
+        _match_category(db, metrics, totals)
+        if on_category_done is not None:
+            on_category_done(category.id, metrics)
+    return totals
+
+
+def run_staged_pipeline(
+    db: Session,
+    *,
+    skip_category_ids: set[str] | None = None,
+    on_category_done: Callable[[str, dict[str, Any]], None] | None = None,
+) -> dict:
+    """
+    Collect and deep-match with stages overlapped per category. Categories that
+    were not scraped this run (no active users) are still deep-matched at the end,
+    as run_deep_match_all does.
+    `skip_category_ids` are already done (resumed run); `on_category_done(category_id, metrics)`
+    is called on the caller's thread after each category is collected and matched.
+    Returns {"collector": {...run_collector stats}, "deep_match": {"users", "jobs", "pairs", "scored",
+    "llm_scored_pairs", "cache_hits"}, "stages": {...timings}, "categories": [per-category metrics]}.
+    """
+    pipeline_stats.start_run()
+    deep_totals = {k: 0 for k in MATCH_COUNTERS}
+    matched: set[str] = set(skip_category_ids or ())
+    category_metrics: list[dict[str, Any]] = []
+
+    def _done(metrics: dict[str, Any]) -> None:
+        matched.add(metrics["search_category_id"])
+        category_metrics.append(metrics)
+        if on_category_done is not None:
+            on_category_done(metrics["search_category_id"], metrics)
+
+    try:
+        categories = [c for c in select_categories(db) if c.id not in matched]
+        run = CollectorRun(db, categories) if categories else None
+        if run is not None:
+            logger.info("Staged pipeline: scraping %d categories: %s", len(categories), [c.slug for c in categories])
+            handoff: queue.Queue = queue.Queue()
+            executor = ThreadPoolExecutor(max_workers=min(len(categories), 8), thread_name_prefix="pipeline-scrape")
+            try:
+                pipeline_stats.enqueue("scrape", len(categories))
+                for plan in [run.plan(c) for c in categories]:
+                    executor.submit(_scrape, run, plan, handoff)
+                for _ in categories:
+                    plan, rows, scrape_seconds = handoff.get()
+                    metrics = _category_metrics(plan.category_id)
+                    metrics["scrape_seconds"] = round(scrape_seconds, 3)
+                    metrics["fetched"] = len(rows)
+                    pipeline_stats.begin("store")
+                    started = time.perf_counter()
+                    try:
+                        accepted = run.accept(rows)
+                        metrics["deduped"] = len(accepted)
+                        if accepted:
+                            metrics["inserted"] = batch_upsert(db, accepted, plan.category_id)
+                            run.inserted += metrics["inserted"]
+                        run.save_alternate_urls(db)  # cross-posts of rows stored for earlier categories
+                        run.save_watermarks(db)  # this category's rows are stored
+                    finally:
+                        metrics["store_seconds"] = round(time.perf_counter() - started, 3)
+                        pipeline_stats.end("store", metrics["store_seconds"])
+                    pipeline_stats.enqueue("match")
+                    _match_category(db, metrics, deep_totals)
+                    _done(metrics)
+            finally:
+                executor.shutdown(wait=True)
+
+        remaining = [c.id for c in get_all_categories(db) if c.id not in matched]
+        pipeline_stats.enqueue("match", len(remaining))
+        for category_id in remaining:
+            metrics = _category_metrics(category_id)
+            _match_category(db, metrics, deep_totals)
+            _done(metrics)
+
+        collector = run.result(len(categories)) if run is not None else {
+            "total_fetched": 0, "total_deduped": 0, "inserted": 0, "categories": 0,
+        }
+    finally:
+        pipeline_stats.finish_run()
+    stages = pipeline_stats.snapshot()["last_run"]
+    logger.info("Staged pipeline done: collector=%s deep_match=%s stages=%s", collector, deep_totals, stages)
+    return {"collector": collector, "deep_match": deep_totals, "stages": stages, "categories": category_metrics}
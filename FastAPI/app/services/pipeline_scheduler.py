@@ -1,23 +1,46 @@
 """
 Background scheduler that runs the job pipeline (collector + deep match)
 every configured interval (`PIPELINE_INTERVAL_SECONDS`).
-Start/stop via API; state is in-process only (resets on server restart).
+Start/stop via API. Each replica's scheduler thread polls every
+`PIPELINE_POLL_SECONDS`; a cycle runs only on the instance holding the DB lease,
+and only when due (or when a crashed run is left to resume). Run history and
+the resume cursor live in `pipeline_runs`.
 """
 import logging
+import os
+import socket
 import threading
 import time
+import uuid
 from datetime import datetime, timezone, timedelta
 
 from app.config import settings
 from app.database import SessionLocal, init_db
 from app.repos.search_category_repo import seed_default_categories
 from app.repos.job_listing_repo import delete_unmatched as delete_unmatched_job_listings
+from app.repos.embedding_repo import delete_stale_job_vectors
+from app.repos.match_cache_repo import delete_expired as delete_expired_match_cache
+from app.repos.pipeline_run_repo import (
+    acquire_lease,
+    create_run,
+    finish_run,
+    get_latest_run,
+    get_lease,
+    get_resumable_run,
+    record_category_done,
+    release_lease,
+    resume_run,
+)
 from app.services.job_collector import run_collector
-from app.services.deep_match_service import run_deep_match_all
+from app.services.llm_client import get_bedrock_client_stats
+from app.services.llm_governor import llm_circuit, llm_governor
+from app.services.pipeline_engine import pipeline_stats, run_match_stage, run_staged_pipeline
 
 logger = logging.getLogger(__name__)
 
 INTERVAL_SECONDS = settings.pipeline_interval_seconds
+LEASE_NAME = "job_pipeline"
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
 _lock = threading.Lock()
 _running = False
@@ -26,52 +49,172 @@ _last_run: datetime | None = None
 _next_run: datetime | None = None
 
 
-def _run_pipeline_once() -> dict:
-    """Run collector + deep match once. Uses its own DB session. Call from scheduler thread."""
-    init_db()
+class _LeaseHeartbeat:
+    """Renews the lease from a side thread (own session) while a run is in progress."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="pipeline-lease", daemon=True)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(max(1, self.ttl_seconds // 3)):
+            db = SessionLocal()
+            try:
+                if not acquire_lease(db, LEASE_NAME, INSTANCE_ID, self.ttl_seconds):
+                    logger.error("Pipeline lease lost to another instance; current run may overlap")
+            except Exception as e:
+                logger.warning("Pipeline lease renewal failed: %s", e)
+            finally:
+                db.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        return False
+
+
+def _execute_pipeline(db, run) -> dict:
+    """
+    Collector + deep match + cleanup for one run. The cursor records finished categories
+    and, on the sequential path, the collector result once collection is done, so a
+    resumed run skips both.
+    """
+    seed_default_categories(db)
+    cursor = dict(run.cursor or {})
+    done = list(cursor.get("done_categories") or [])
+
+    def _category_done(category_id: str, metrics: dict | None = None) -> None:
+        done.append(category_id)
+        cursor["done_categories"] = done
+        record_category_done(db, run, cursor, metrics)
+
+    llm_governor.start_run(settings.llm_run_call_budget)
+    try:
+        if settings.pipeline_staged_enabled:
+            staged = run_staged_pipeline(db, skip_category_ids=set(done), on_category_done=_category_done)
+            collector_result, deep_result, stages = staged["collector"], staged["deep_match"], staged["stages"]
+        else:
+            collector_result = cursor.get("collector")
+            if collector_result is None:
+                collector_result = run_collector(db)
+                cursor["collector"] = collector_result
+                record_category_done(db, run, cursor)  # no category yet: just the cursor
+            deep_result = run_match_stage(
+                db, collector_result.get("by_category"), skip_category_ids=set(done), on_category_done=_category_done
+            )
+            stages = None
+    finally:
+        llm_usage = llm_governor.finish_run()
+    cleanup_count = delete_unmatched_job_listings(db)
+    pruned_vectors = delete_stale_job_vectors(db, settings.embedding_retention_days)
+    pruned_cache = delete_expired_match_cache(db, settings.match_cache_ttl_seconds)
+    logger.info(
+        "Scheduled pipeline run %s: collector=%s deep_match=%s llm=%s cleanup_unmatched=%d "
+        "pruned_job_vectors=%d pruned_match_cache=%d",
+        run.id, collector_result, deep_result, llm_usage, cleanup_count, pruned_vectors, pruned_cache,
+    )
+    return {
+        "collector": collector_result,
+        "deep_match": deep_result,
+        "cleanup_unmatched": cleanup_count,
+        "pruned_job_vectors": pruned_vectors,
+        "pruned_match_cache": pruned_cache,
+        "stages": stages,
+        "llm": llm_usage,
+    }
+
+
+def _run_pipeline_once(force: bool = False) -> dict:
+    """
+    Run one pipeline cycle if this instance gets the lease and a run is due (or a
+    crashed run is waiting to resume); `force` skips the due check. Uses its own DB session.
+    Returns the run result, or {"skipped": "lease_held" | "not_due", ...}.
+    """
+    global _last_run, _next_run
     db = SessionLocal()
     try:
-        seed_default_categories(db)
-        collector_result = run_collector(db)
-        deep_result = run_deep_match_all(db)
-        cleanup_count = delete_unmatched_job_listings(db)
-        logger.info(
-            "Scheduled pipeline run: collector=%s deep_match=%s cleanup_unmatched=%d",
-            collector_result, deep_result, cleanup_count,
-        )
-        return {
-            "collector": collector_result,
-            "deep_match": deep_result,
-            "cleanup_unmatched": cleanup_count,
-        }
+        if not acquire_lease(db, LEASE_NAME, INSTANCE_ID, settings.pipeline_lease_seconds):
+            logger.debug("Pipeline cycle skipped: lease held by another instance")
+            return {"skipped": "lease_held"}
+        run = None
+        try:
+            run = get_resumable_run(db)
+            resumed = run is not None
+            if resumed:
+                run = resume_run(db, run, INSTANCE_ID)
+                logger.info(
+                    "Resuming interrupted pipeline run %s (attempt %d, %d categories already done)",
+                    run.id, run.attempts, len((run.cursor or {}).get("done_categories") or []),
+                )
+            else:
+                latest = None if force else get_latest_run(db)
+                if latest is not None and latest.started_at is not None:
+                    due_at = latest.started_at + timedelta(seconds=INTERVAL_SECONDS)
+                    if due_at > datetime.now(timezone.utc):
+                        with _lock:
+                            _next_run = due_at
+                        return {"skipped": "not_due", "next_run": due_at.isoformat()}
+                run = create_run(db, INSTANCE_ID)
+            with _LeaseHeartbeat(settings.pipeline_lease_seconds):
+                result = _execute_pipeline(db, run)
+            result.update({"run_id": run.id, "resumed": resumed})
+            finish_run(db, run, "succeeded", result)
+            return result
+        except Exception as e:
+            if run is not None:
+                db.rollback()
+                finish_run(db, run, "failed", error=str(e))
+            raise
+        finally:
+            release_lease(db, LEASE_NAME, INSTANCE_ID)
+            if run is not None:
+                with _lock:
+                    _last_run = datetime.now(timezone.utc)
+                    _next_run = _last_run + timedelta(seconds=INTERVAL_SECONDS)
     finally:
         db.close()
 
 
+def run_pipeline_now() -> dict:
+    """
+    One-shot run for the admin endpoint: same lease, run record and LLM budget as a
+    scheduled cycle, but without waiting for the interval. A crashed run resumes first.
+    Returns {"skipped": "lease_held"} while another run holds the lease.
+    """
+    return _run_pipeline_once(force=True)
+
+
 def _scheduler_loop() -> None:
-    global _last_run, _next_run
-    logger.info("Pipeline scheduler thread started")
+    global _next_run
+    logger.info("Pipeline scheduler thread started (instance %s)", INSTANCE_ID)
+    schema_ready = False
     while True:
         with _lock:
             if not _running:
                 break
         try:
+            if not schema_ready:
+                init_db()  # once per scheduler start, not on every poll
+                schema_ready = True
             _run_pipeline_once()
         except Exception as e:
             logger.exception("Scheduled pipeline run failed: %s", e)
         with _lock:
-            _last_run = datetime.now(timezone.utc)
             if not _running:
                 _next_run = None
                 break
-            _next_run = datetime.now(timezone.utc) + timedelta(seconds=INTERVAL_SECONDS)
-        time.sleep(INTERVAL_SECONDS)
+        time.sleep(max(1, settings.pipeline_poll_seconds))
     logger.info("Pipeline scheduler thread stopped")
 
 
 def start_scheduler() -> tuple[bool, str]:
     """
-    Start the recurring pipeline (run now, then every configured interval).
+    Start the recurring pipeline (run now if due, then every configured interval).
     Returns (success, message).
     """
     global _running, _thread
@@ -99,12 +242,45 @@ def stop_scheduler() -> tuple[bool, str]:
     return True, "Pipeline stop requested (will stop after current run)"
 
 
+def _durable_status() -> dict:
+    """Last finished run and lease holder from the DB ({} if the DB is unavailable)."""
+    db = SessionLocal()
+    try:
+        latest = get_latest_run(db, finished_only=True)
+        lease = get_lease(db, LEASE_NAME)
+        out: dict = {"lease_owner": None, "lease_expires_at": None, "last_run_status": None}
+        if latest is not None:
+            out["last_run"] = latest.started_at.isoformat() if latest.started_at else None
+            out["last_run_status"] = latest.status
+            if latest.started_at:
+                out["next_run"] = (latest.started_at + timedelta(seconds=INTERVAL_SECONDS)).isoformat()
+        if lease is not None and lease.expires_at > datetime.now(timezone.utc):
+            out["lease_owner"] = lease.owner
+            out["lease_expires_at"] = lease.expires_at.isoformat()
+        return out
+    except Exception as e:
+        logger.debug("Durable pipeline status unavailable: %s", e)
+        return {}
+    finally:
+        db.close()
+
+
 def get_status() -> dict:
-    """Return current scheduler status."""
+    """Return current scheduler status (DB-backed run/lease info when available)."""
     with _lock:
-        return {
+        status = {
             "running": _running,
             "last_run": _last_run.isoformat() if _last_run else None,
             "next_run": _next_run.isoformat() if _next_run else None,
             "interval_hours": INTERVAL_SECONDS / 3600,
+            "instance_id": INSTANCE_ID,
+            "bedrock_clients": get_bedrock_client_stats(),
+            "llm_governor": llm_governor.stats(),
+            "llm_circuit": llm_circuit.stats(),
+            "pipeline_stages": pipeline_stats.snapshot(),
         }
+    durable = _durable_status()
+    if not status["running"]:
+        durable.pop("next_run", None)
+    status.update(durable)
+    return status
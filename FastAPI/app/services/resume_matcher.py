@@ -1,15 +1,28 @@
 import json
 import logging
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
 logger = logging.getLogger(__name__)
-from app.services.llm_client import is_llm_enabled, llm_match_resume_job
+from app.services.job_features import (
+    JobFeatures,
+    compute_job_features,
+    extract_required_years as _extract_required_years_from_jd,
+    keyword_tokens as _keyword_tokens,
+)
+from app.services.llm_client import is_llm_enabled, llm_match_resume_job, llm_match_resume_jobs_batch
+from app.services.llm_governor import LLMBudgetExceeded
+from app.services.match_cache import match_cache, match_cache_key
 
 
 MAX_RESUME_CHARS = 10000  # Soft cap for LLM input
 HARD_GATE_MARGIN_YEARS = 1.0
+BATCH_MAX_JOB_CHARS = 8000  # longer descriptions are scored in their own prompt
+RESUME_FEATURES_CACHE_SIZE = 1024
 
 
 def _resume_to_full_text(resume_data: dict[str, Any]) -> str:
@@ -50,68 +63,258 @@ def _resume_to_full_text(resume_data: dict[str, Any]) -> str:
     return text or json.dumps(resume_data)[:MAX_RESUME_CHARS]
 
 
-def llm_match(resume_data: dict[str, Any], job_title: str, job_description: str) -> dict[str, Any]:
+@dataclass(frozen=True)
+class ResumeFeatures:
+    """Per-resume inputs to matching, computed once per resume version instead of once per job."""
+
+    data: dict[str, Any]
+    text: str  # _resume_to_full_text: the LLM input and match-cache key part
+    tokens: frozenset[str]  # keyword tokens of `text` (fallback scorer)
+    total_years: float | None
+    skills: frozenset[str]  # keyword tokens of the parsed "skills" section
+
+    @classmethod
+    def from_data(cls, resume_data: dict[str, Any]) -> "ResumeFeatures":
+        resume_data = resume_data or {}
+        text = _resume_to_full_text(resume_data)
+        return cls(
+            data=resume_data,
+            text=text,
+            tokens=frozenset(_keyword_tokens(text)),
+            total_years=_compute_resume_total_years(resume_data),
+            skills=frozenset(_keyword_tokens(" ".join(_skill_entries(resume_data.get("skills"))))),
+        )
+
+
+def _skill_entries(skills: Any) -> list[str]:
+    """Flatten the parsed skills section ({group: [..] | "a, b"} or a list) into strings."""
+    if isinstance(skills, dict):
+        skills = list(skills.values())
+    if isinstance(skills, str):
+        return [skills]
+    if not isinstance(skills, list):
+        return []
+    entries: list[str] = []
+    for item in skills:
+        entries.extend(_skill_entries(item) if isinstance(item, (dict, list)) else [str(item)])
+    return entries
+
+
+_features_cache: OrderedDict[tuple[str, str], ResumeFeatures] = OrderedDict()
+_features_lock = threading.Lock()
+
+
+def get_resume_features(
+    resume_data: dict[str, Any],
+    resume_id: str | None = None,
+    version: datetime | None = None,
+) -> ResumeFeatures:
+    """
+    ResumeFeatures for one resume version, memoized (LRU) by resume id + `version`
+    (the row's updated_at, or created_at if never updated). Without an id nothing is cached.
+    """
+    if not resume_id:
+        return ResumeFeatures.from_data(resume_data)
+    key = (resume_id, version.isoformat() if version else "")
+    with _features_lock:
+        features = _features_cache.get(key)
+        if features is not None:
+            _features_cache.move_to_end(key)
+            return features
+    features = ResumeFeatures.from_data(resume_data)
+    with _features_lock:
+        _features_cache[key] = features
+        while len(_features_cache) > RESUME_FEATURES_CACHE_SIZE:
+            _features_cache.popitem(last=False)
+    return features
+
+
+def _reset_resume_features() -> None:
+    """Drop memoized resume features (tests)."""
+    with _features_lock:
+        _features_cache.clear()
+
+
+def resume_features(resume: "ResumeFeatures | dict[str, Any]") -> ResumeFeatures:
+    """Accept precomputed features or raw parsed resume data (computed on the spot, uncached)."""
+    return resume if isinstance(resume, ResumeFeatures) else ResumeFeatures.from_data(resume)
+
+
+def _match_result(
+    score: float,
+    reason: str,
+    resume_years: float | None,
+    required_years: float | None,
+    **extra: Any,
+) -> dict[str, Any]:
+    return {
+        "match_score": score,
+        "match_reason": reason,
+        "resume_years_experience": round(resume_years, 1) if resume_years is not None else None,
+        "required_years_experience": required_years,
+        "hard_gate_blocked": False,
+        **extra,
+    }
+
+
+def _hard_gate_result(resume_years: float, required_years: float) -> dict[str, Any]:
+    result = _match_result(
+        0.0,
+        (
+            f"Hard gate: resume experience ({resume_years:.1f}y) is below "
+            f"required experience ({required_years:.1f}y) minus margin ({HARD_GATE_MARGIN_YEARS:.1f}y)."
+        ),
+        resume_years,
+        required_years,
+    )
+    result["hard_gate_blocked"] = True
+    return result
+
+
+def llm_match(
+    resume: ResumeFeatures | dict[str, Any],
+    job_title: str,
+    job_description: str,
+    job: JobFeatures | None = None,
+) -> dict[str, Any]:
     """
     Score resume vs job using Bedrock LLM.
-    Returns {"match_score": float 0-1, "match_reason": str}.
+    `resume` is ResumeFeatures (preferred; see get_resume_features) or parsed resume data;
+    `job` is the listing's precomputed JobFeatures (computed from title/description if omitted).
+    Returns {"match_score": float 0-1, "match_reason": str, ...}.
+    LLM answers are cached by content (see match_cache); "cache_hit" marks reuse and
+    "cache_key" is set when the LLM was actually called, so callers can persist it.
     """
-    resume_text = _resume_to_full_text(resume_data)
-    resume_years = _compute_resume_total_years(resume_data)
-    required_years = _extract_required_years_from_jd(job_description or "")
+    features = resume_features(resume)
+    resume_text = features.text
+    resume_years = features.total_years
+    if job is None:
+        job = compute_job_features(job_title, job_description)
+    required_years = job.required_years
 
     if _is_hard_gate_blocked(resume_years, required_years, HARD_GATE_MARGIN_YEARS):
-        return {
-            "match_score": 0.0,
-            "match_reason": (
-                f"Hard gate: resume experience ({resume_years:.1f}y) is below "
-                f"required experience ({required_years:.1f}y) minus margin ({HARD_GATE_MARGIN_YEARS:.1f}y)."
-            ),
-            "resume_years_experience": round(resume_years, 1) if resume_years is not None else None,
-            "required_years_experience": required_years,
-            "hard_gate_blocked": True,
-        }
+        return _hard_gate_result(resume_years, required_years)
 
     if is_llm_enabled():
+        cache_key = match_cache_key(resume_text, job_title or "", job_description or "")
+        cached = match_cache.get(cache_key)
+        if cached is not None:
+            score, reason = cached
+            return _match_result(round(score, 2), reason, resume_years, required_years, cache_hit=True)
         try:
             score, reason = llm_match_resume_job(resume_text, job_title or "", job_description or "")
-            return {
-                "match_score": round(score, 2),
-                "match_reason": reason,
-                "resume_years_experience": round(resume_years, 1) if resume_years is not None else None,
-                "required_years_experience": required_years,
-                "hard_gate_blocked": False,
-            }
+            match_cache.put(cache_key, score, reason)
+            return _match_result(
+                round(score, 2), reason, resume_years, required_years, cache_key=cache_key, llm_score=score
+            )
+        except LLMBudgetExceeded:
+            raise  # caller defers the pair rather than storing a keyword score
         except Exception as e:
             logger.warning("Bedrock LLM ranking failed: %s", e)
 
-    # Deterministic fallback when LLM is unavailable.
-    score = _fallback_keyword_score(resume_text, f"{job_title or ''}\n{job_description or ''}")
-    return {
-        "match_score": score,
-        "match_reason": "Fallback similarity score (LLM unavailable).",
-        "resume_years_experience": round(resume_years, 1) if resume_years is not None else None,
-        "required_years_experience": required_years,
-        "hard_gate_blocked": False,
-    }
+    return _fallback_result(features, job)
 
 
-def _fallback_keyword_score(resume_text: str, job_text: str) -> float:
-    stopwords = {
-        "and", "the", "with", "for", "from", "that", "this", "you", "your", "our", "are", "was", "were",
-        "have", "has", "had", "into", "onto", "about", "over", "under", "than", "their", "them", "they",
-        "will", "would", "could", "should", "must", "can", "across", "using", "use", "used", "build", "built",
-        "experience", "project", "projects", "role", "team", "work", "worked", "developer", "engineer",
-    }
-    token_re = re.compile(r"[a-zA-Z][a-zA-Z0-9_+#.-]{1,}")
-    resume_tokens = {t.lower() for t in token_re.findall(resume_text or "") if t.lower() not in stopwords}
-    job_tokens = {t.lower() for t in token_re.findall(job_text or "") if t.lower() not in stopwords}
+def _fallback_result(features: ResumeFeatures, job: JobFeatures) -> dict[str, Any]:
+    """Deterministic keyword score used when the LLM is unavailable."""
+    score = _fallback_score_from_tokens(features.tokens, job.tokens)
+    return _match_result(
+        score, "Fallback similarity score (LLM unavailable).", features.total_years, job.required_years
+    )
+
+
+def llm_match_batch(
+    resume: ResumeFeatures | dict[str, Any],
+    jobs: list[tuple[str, str]],
+    job_features: list[JobFeatures] | None = None,
+) -> list[dict[str, Any] | None]:
+    """
+    Score one resume against several (job_title, job_description) pairs, sending the jobs
+    that need the LLM in one batched prompt. Hard-gated and cached jobs never reach the LLM;
+    descriptions over BATCH_MAX_JOB_CHARS and items the batch answer leaves out or gets wrong
+    fall back to llm_match one job at a time. If the batch call itself fails, its jobs get the
+    keyword fallback score instead of one LLM call each.
+    `job_features`, if given, is each job's precomputed JobFeatures, aligned with `jobs`.
+    Returns one llm_match-shaped result per job, in order. Once the run's LLM budget is spent
+    the jobs still unscored are None, so callers keep the rest and defer only those.
+    """
+    features = resume_features(resume)
+    if job_features is None:
+        job_features = [compute_job_features(title, description) for title, description in jobs]
+    if len(jobs) <= 1 or not is_llm_enabled():
+        return [
+            llm_match(features, title, description, job)
+            for (title, description), job in zip(jobs, job_features)
+        ]
+    resume_text = features.text
+    resume_years = features.total_years
+    budget_spent = False
+    results: list[dict[str, Any] | None] = [None] * len(jobs)
+    batch: list[tuple[int, str, float | None]] = []  # (job index, cache key, required years)
+    for i, (title, description) in enumerate(jobs):
+        required_years = job_features[i].required_years
+        if _is_hard_gate_blocked(resume_years, required_years, HARD_GATE_MARGIN_YEARS):
+            results[i] = _hard_gate_result(resume_years, required_years)
+            continue
+        cache_key = match_cache_key(resume_text, title or "", description or "")
+        cached = match_cache.get(cache_key)
+        if cached is not None:
+            results[i] = _match_result(round(cached[0], 2), cached[1], resume_years, required_years, cache_hit=True)
+        elif len(description or "") <= BATCH_MAX_JOB_CHARS:
+            batch.append((i, cache_key, required_years))
+
+    if len(batch) > 1:
+        try:
+            answers = llm_match_resume_jobs_batch(
+                resume_text, [(jobs[i][0] or "", jobs[i][1] or "") for i, _, _ in batch]
+            )
+        except LLMBudgetExceeded:
+            budget_spent = True
+            answers = []
+        except Exception as e:
+            logger.warning("Batched LLM ranking failed; keyword scoring %d jobs: %s", len(batch), e)
+            for i, _, _ in batch:
+                results[i] = _fallback_result(features, job_features[i])
+            answers = []
+        for (i, cache_key, required_years), answer in zip(batch, answers):
+            if answer is None:
+                continue
+            score, reason = answer
+            match_cache.put(cache_key, score, reason)
+            results[i] = _match_result(
+                round(score, 2), reason, resume_years, required_years, cache_key=cache_key, llm_score=score
+            )
+        missed = sum(1 for answer in answers if answer is None)
+        if missed:
+            logger.info("Batched LLM ranking: %d/%d items invalid, scoring them one by one", missed, len(batch))
+
+    for i, ((title, description), job) in enumerate(zip(jobs, job_features)):
+        if results[i] is not None or budget_spent:
+            continue
+        try:
+            results[i] = llm_match(features, title, description, job)
+        except LLMBudgetExceeded:
+            budget_spent = True
+    return results
+
+
+def _keyword_coverage(resume_tokens: set[str] | frozenset[str], job_tokens: set[str] | frozenset[str]) -> float | None:
+    """Share of job keywords found in the resume (0-1), or None if either side has no keywords."""
     if not resume_tokens or not job_tokens:
-        return 0.35
+        return None
+    return min(len(resume_tokens & job_tokens) / len(job_tokens), 1.0)
+
+
+def _fallback_keyword_score(resume_text: str, job_text: str) -> float:
+    return _fallback_score_from_tokens(_keyword_tokens(resume_text), _keyword_tokens(job_text))
+
 
-    overlap = len(resume_tokens & job_tokens)
-    coverage = overlap / max(len(job_tokens), 1)
+def _fallback_score_from_tokens(resume_tokens: set[str] | frozenset[str], job_tokens: set[str] | frozenset[str]) -> float:
+    coverage = _keyword_coverage(resume_tokens, job_tokens)
+    if coverage is None:
+        return 0.35
     # Map coverage to practical range: [0.35, 0.92]
-    score = 0.35 + min(coverage, 1.0) * 0.57
+    score = 0.35 + coverage * 0.57
     return round(max(0.0, min(1.0, score)), 2)
 
 
@@ -192,33 +395,6 @@ def _compute_resume_total_years(resume_data: dict[str, Any]) -> float | None:
     return round(total_months / 12.0, 1)
 
 
-def _extract_required_years_from_jd(job_description: str) -> float | None:
-    if not job_description:
-        return None
-    text = " ".join(job_description.split())
-
-    patterns = [
-        r"(\d+(?:\.\d+)?)\s*\+\s*years?\s+of\s+experience",
-        r"minimum\s+of\s+(\d+(?:\.\d+)?)\s+years?",
-        r"at\s+least\s+(\d+(?:\.\d+)?)\s+years?",
-        r"(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s+years?\s+of\s+experience",
-        r"(\d+(?:\.\d+)?)\s+years?\s+of\s+experience",
-        r"(\d+(?:\.\d+)?)\s+years?\s+experience",
-    ]
-
-    candidates: list[float] = []
-    for p in patterns:
-        for m in re.finditer(p, text, flags=re.IGNORECASE):
-            if m.lastindex and m.lastindex >= 2:
-                # Range like 3-5 years -> use lower bound as minimum.
-                candidates.append(float(m.group(1)))
-            else:
-                candidates.append(float(m.group(1)))
-    if not candidates:
-        return None
-    return round(max(candidates), 1)
-
-
 def _is_hard_gate_blocked(resume_years: float | None, required_years: float | None, margin: float) -> bool:
     if resume_years is None or required_years is None:
         return False
@@ -1,9 +1,9 @@
 import json
 import logging
-import math
 from functools import lru_cache
 
 import boto3
+import numpy as np
 
 from app.config import settings
 
@@ -44,11 +44,57 @@ def embed_text_titan(text: str) -> list[float]:
 
 
 def cosine_similarity(a: list[float], b: list[float]) -> float:
-    if not a or not b or len(a) != len(b):
+    if a is None or b is None or len(a) == 0 or len(a) != len(b):
         return 0.0
-    dot = sum(x * y for x, y in zip(a, b))
-    na = math.sqrt(sum(x * x for x in a))
-    nb = math.sqrt(sum(y * y for y in b))
+    va = np.asarray(a, dtype=np.float64)
+    vb = np.asarray(b, dtype=np.float64)
+    na = np.linalg.norm(va)
+    nb = np.linalg.norm(vb)
     if na == 0.0 or nb == 0.0:
         return 0.0
-    return max(-1.0, min(1.0, dot / (na * nb)))
+    return float(max(-1.0, min(1.0, np.dot(va, vb) / (na * nb))))
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """
+    Return vectors as a float32 array with unit-length rows (1-D input gives one unit vector).
+    Zero vectors stay zero so they score 0 against everything.
+    """
+    arr = np.array(vectors, dtype=np.float32, copy=True, ndmin=1)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    np.divide(arr, norms, out=arr, where=norms > 0)
+    return arr
+
+
+def cosine_similarity_batch(queries, matrix) -> np.ndarray:
+    """
+    Cosine similarity of pre-normalized float32 vectors (see `normalize_rows`).
+    queries (D,) x matrix (N, D) -> (N,) scores; queries (M, D) x matrix (N, D) -> (M, N).
+    """
+    if len(matrix) == 0:
+        shape = (0,) if np.ndim(queries) == 1 else (len(queries), 0)
+        return np.zeros(shape, dtype=np.float32)
+    scores = np.asarray(matrix) @ np.asarray(queries).T
+    scores = scores.T if np.ndim(queries) > 1 else scores
+    return np.clip(scores, -1.0, 1.0)
+
+
+def top_k(scores, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return (indices, scores) of the k highest 1-D scores, best first."""
+    scores = np.asarray(scores)
+    k = min(max(k, 0), scores.shape[0])
+    if k == 0:
+        return np.zeros(0, dtype=np.intp), scores[:0]
+    idx = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return idx, scores[idx]
+
+
+def vector_to_bytes(vector) -> bytes:
+    """Pack an embedding as little-endian float32 bytes (4 bytes/dim) for storage."""
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def vector_from_bytes(data: bytes) -> np.ndarray:
+    """Inverse of `vector_to_bytes` (read-only float32 array)."""
+    return np.frombuffer(data, dtype="<f4")
@@ -2,10 +2,18 @@ from dataclasses import dataclass
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles, deregister
+from sqlalchemy.pool import StaticPool
 
 from app.database import get_db
 from app.dependencies import get_current_admin, get_current_user, get_current_user_full_access
 from app.main import app
+from app.services.llm_governor import llm_circuit, llm_governor
+from app.services.job_features import _reset_job_features
+from app.services.match_cache import match_cache
+from app.services.resume_matcher import _reset_resume_features
 
 
 @dataclass
@@ -19,6 +27,38 @@ class StubUser:
     temp_password_expires_at: object | None = None
 
 
+@pytest.fixture(autouse=True)
+def _empty_match_cache():
+    match_cache.clear()
+    _reset_resume_features()
+    _reset_job_features()
+    yield
+    match_cache.clear()
+    _reset_resume_features()
+    _reset_job_features()
+
+
+@pytest.fixture(autouse=True)
+def _unpaced_llm_governor(monkeypatch):
+    """Tests must not sleep on the shared Bedrock rate limiter or inherit an open circuit."""
+    monkeypatch.setattr(llm_governor, "rate_per_second", 0)
+    llm_governor.reset()
+    llm_circuit.reset()
+    yield
+    llm_governor.reset()
+    llm_circuit.reset()
+
+
+@pytest.fixture
+def sqlite_engine():
+    """In-memory SQLite engine for query-shape tests; JSONB columns compile as JSON only while it is in use."""
+    compiles(JSONB, "sqlite")(lambda type_, compiler, **kw: "JSON")
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+    deregister(JSONB)
+
+
 @pytest.fixture
 def stub_user() -> StubUser:
     return StubUser()
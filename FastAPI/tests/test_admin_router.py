@@ -173,3 +173,62 @@ def test_admin_job_listing_crud_paths(monkeypatch, admin_client):
     assert r_del_all.status_code == 200 and r_del_all.json()["deleted"] == 3
     assert r_del_one_ok.status_code == 200
     assert r_del_one_missing.status_code == 404
+
+
+class _PipelineRun:
+    def __init__(self, run_id="run1"):
+        self.id = run_id
+        self.status = "succeeded"
+        self.owner = "host:1:abc"
+        self.attempts = 1
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = datetime.now(timezone.utc)
+        self.duration_seconds = 12.5
+        self.error = None
+        self.cursor = {"done_categories": ["c1"]}
+        self.result = {
+            "collector": {"total_fetched": 40, "total_deduped": 30, "inserted": 20},
+            "deep_match": {"pairs": 60, "scored": 5, "llm_scored_pairs": 45, "cache_hits": 15},
+            "cleanup_unmatched": 2,
+        }
+
+
+class _RunCategory:
+    search_category_id = "c1"
+    scrape_seconds = 3.0
+    store_seconds = 0.2
+    match_seconds = 9.0
+    fetched = 40
+    deduped = 30
+    inserted = 20
+    users = 3
+    jobs = 20
+    pairs = 60
+    scored = 5
+    llm_scored_pairs = 45
+    cache_hits = 15
+
+
+def test_admin_list_pipeline_runs(monkeypatch, admin_client):
+    calls = {}
+    monkeypatch.setattr(
+        admin_mod, "get_runs_paginated", lambda db, limit, offset: calls.update(limit=limit, offset=offset) or ([_PipelineRun()], 1)
+    )
+    resp = admin_client.get("/admin/pipeline-runs?page=2&page_size=500")
+    assert resp.status_code == 200
+    assert calls == {"limit": 100, "offset": 100}
+    item = resp.json()["items"][0]
+    assert (item["fetched"], item["inserted"], item["llm_scored_pairs"], item["cache_hits"]) == (40, 20, 45, 15)
+    assert item["duration_seconds"] == 12.5
+    assert item["cleanup_unmatched"] == 2
+
+
+def test_admin_pipeline_run_detail_includes_categories(monkeypatch, admin_client):
+    monkeypatch.setattr(admin_mod, "get_pipeline_run", lambda db, run_id: _PipelineRun(run_id) if run_id == "run1" else None)
+    monkeypatch.setattr(admin_mod, "get_run_categories", lambda db, run_id: [_RunCategory()])
+    resp = admin_client.get("/admin/pipeline-runs/run1")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["cursor"] == {"done_categories": ["c1"]}
+    assert body["categories"][0]["match_seconds"] == 9.0
+    assert admin_client.get("/admin/pipeline-runs/missing").status_code == 404
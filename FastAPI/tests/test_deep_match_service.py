@@ -1,6 +1,22 @@
+import pytest
+
 import app.services.deep_match_service as dm
 
 
+@pytest.fixture(autouse=True)
+def _no_durable_match_cache(monkeypatch):
+    """Deep match tests run against a fake DB: stub the durable match-cache tier."""
+    saved = {}
+    monkeypatch.setattr(dm, "get_cached_matches", lambda db, keys, max_age: {})
+    monkeypatch.setattr(dm, "save_cached_matches", lambda db, entries, model_id: saved.update(entries) or len(entries))
+    return saved
+
+
+@pytest.fixture(autouse=True)
+def _no_user_activity(monkeypatch):
+    monkeypatch.setattr(dm, "get_last_activity", lambda db, user_ids: {})
+
+
 class _User:
     def __init__(self, user_id, is_active=True, search_category_id="c1"):
         self.id = user_id
@@ -9,41 +25,46 @@ class _User:
 
 
 class _Resume:
-    def __init__(self, parsed):
+    def __init__(self, parsed, resume_id="r1", updated_at=None):
+        self.id = resume_id
         self.parsed_data = parsed
+        self.created_at = None
+        self.updated_at = updated_at
 
 
 class _Job:
-    def __init__(self, job_id, title="Backend Engineer", description="desc"):
+    def __init__(self, job_id, title="Backend Engineer", description="desc", created_at=None, required_years=None):
         self.id = job_id
         self.title = title
         self.description = description
+        self.created_at = created_at
+        self.required_years = required_years
 
 
 def test_run_deep_match_for_category_no_users_or_jobs(monkeypatch):
     monkeypatch.setattr(dm, "get_users_by_category", lambda db, cid: [])
-    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours: [])
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: [])
     out = dm.run_deep_match_for_category(db=object(), search_category_id="c1")
     assert out == {"users": 0, "jobs": 0, "scored": 0}
 
 
 def test_run_deep_match_for_category_skips_existing_and_low_scores(monkeypatch):
     monkeypatch.setattr(dm, "get_users_by_category", lambda db, cid: [_User("u1")])
-    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours: [_Job("j1"), _Job("j2"), _Job("j3")])
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: [_Job("j1"), _Job("j2"), _Job("j3")])
     monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: _Resume({"experience": []}))
-    monkeypatch.setattr(dm, "get_existing_match", lambda db, uid, jid: jid == "j1")
+    monkeypatch.setattr(dm, "get_matched_job_ids", lambda db, uids, jids: {uid: {"j1"} for uid in uids})
 
-    def fake_score(resume_data, title, description):
+    def fake_score(resume_data, title, description, job_features=None):
         if "j2" in description:
             return {"match_score": 70.0, "match_reason": "low", "hard_gate_blocked": False}
         return {"match_score": 95.0, "match_reason": "great", "hard_gate_blocked": False, "resume_years_experience": 5.0}
 
-    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description: fake_score(resume_data, title, description))
+    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description, job_features=None: fake_score(resume_data, title, description))
     created = []
-    monkeypatch.setattr(dm, "create_match", lambda db, **kwargs: created.append(kwargs))
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: created.extend(rows) or len(rows))
 
     # Mark descriptions so fake_score can branch.
-    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours: [_Job("j1", description="j1"), _Job("j2", description="j2"), _Job("j3", description="j3")])
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: [_Job("j1", description="j1"), _Job("j2", description="j2"), _Job("j3", description="j3")])
     out = dm.run_deep_match_for_category(db=object(), search_category_id="c1")
     assert out["scored"] == 1
     assert len(created) == 1
@@ -76,7 +97,8 @@ def test_run_deep_match_for_user_guard_rails(monkeypatch):
 def test_run_deep_match_for_user_no_recent_jobs(monkeypatch):
     user = _User("u1", is_active=True, search_category_id="cat-1")
     monkeypatch.setattr(dm, "get_by_id", lambda db, uid: user)
-    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours: [])
+    monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: None)
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: [])
     out = dm.run_deep_match_for_user(db=object(), user_id="u1", since_hours=15)
     assert out == {
         "user_id": "u1",
@@ -92,11 +114,12 @@ def test_run_deep_match_for_user_scores_and_returns_counts(monkeypatch):
     user = _User("u1", is_active=True, search_category_id="cat-1")
     jobs = [_Job("j1"), _Job("j2")]
     monkeypatch.setattr(dm, "get_by_id", lambda db, uid: user)
-    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours: jobs)
+    monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: None)
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: jobs)
 
     calls = {"score_dist": None}
 
-    def fake_score_user(db, user_obj, jobs_list):
+    def fake_score_user(db, user_obj, jobs_list, user_resume=None):
         assert user_obj is user
         assert jobs_list == jobs
         return {
@@ -126,17 +149,17 @@ def test_run_deep_match_for_user_skips_low_and_hard_gate(monkeypatch):
     user = _User("u1", is_active=True, search_category_id="cat-1")
     jobs = [_Job("j1"), _Job("j2")]
     monkeypatch.setattr(dm, "get_by_id", lambda db, uid: user)
-    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours: jobs)
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: jobs)
     monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: _Resume({"experience": []}))
-    monkeypatch.setattr(dm, "get_existing_match", lambda db, uid, jid: False)
+    monkeypatch.setattr(dm, "get_matched_job_ids", lambda db, uids, jids: {})
     scores = iter(
         [
             {"match_score": 70.0, "hard_gate_blocked": False},
             {"match_score": 95.0, "hard_gate_blocked": True},
         ]
     )
-    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description: next(scores))
-    monkeypatch.setattr(dm, "create_match", lambda db, **kwargs: (_ for _ in ()).throw(RuntimeError("must not create")))
+    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description, job_features=None: next(scores))
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: (_ for _ in ()).throw(RuntimeError("must not create")) if rows else 0)
     out = dm.run_deep_match_for_user(db=object(), user_id="u1")
     assert out == {
         "user_id": "u1",
@@ -146,3 +169,338 @@ def test_run_deep_match_for_user_skips_low_and_hard_gate(monkeypatch):
         "skipped_existing": 0,
         "skipped_low": 2,
     }
+
+
+def test_score_user_against_jobs_counts_prefiltered_jobs(monkeypatch):
+    jobs = [_Job("j1"), _Job("j2"), _Job("j3")]
+    monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: _Resume({"experience": []}))
+    monkeypatch.setattr(dm, "get_matched_job_ids", lambda db, uids, jids: {uid: {"j1"} for uid in uids})
+    shared = {}
+
+    def fake_select(db, resume_id, resume_text, pending, job_vectors, similarities=None):
+        assert job_vectors is shared
+        assert [j.id for j in pending] == ["j2", "j3"]
+        return pending[1:]
+
+    monkeypatch.setattr(dm, "select_candidates", fake_select)
+    scored_titles = []
+    monkeypatch.setattr(
+        dm,
+        "_score_pair",
+        lambda resume_data, title, description, job_features=None: scored_titles.append(title) or {"match_score": 90.0, "hard_gate_blocked": False},
+    )
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: len(rows))
+    out = dm._score_user_against_jobs(object(), _User("u1"), jobs, shared)
+    assert out["skipped_existing"] == 1
+    assert out["skipped_prefilter"] == 1
+    assert out["scored"] == 1
+    assert len(scored_titles) == 1
+
+
+def test_score_pairs_runs_llm_calls_concurrently_and_writes_on_caller_thread(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(dm.settings, "deep_match_concurrency", 3)
+    barrier = threading.Barrier(3, timeout=5)
+    worker_threads = set()
+
+    def fake_score(resume_data, title, description, job_features=None):
+        worker_threads.add(threading.current_thread().name)
+        barrier.wait()  # only passes if all three pairs are in flight at once
+        return {"match_score": 90.0, "match_reason": "ok", "hard_gate_blocked": False}
+
+    monkeypatch.setattr(dm, "_score_pair", fake_score)
+    writer_threads = []
+    monkeypatch.setattr(
+        dm,
+        "bulk_create_matches",
+        lambda db, rows: writer_threads.extend([threading.current_thread()] * len(rows)) or len(rows),
+    )
+    user = _User("u1")
+    pairs = [(user, {}, _Job(f"j{i}")) for i in range(3)]
+    out = dm._score_pairs(object(), pairs)
+    assert out["scored"] == 3
+    assert len(worker_threads) == 3
+    assert writer_threads == [threading.current_thread()] * 3
+    assert out["throughput"]["pairs"] == 3
+    assert out["throughput"]["p95_ms"] >= out["throughput"]["p50_ms"] >= 0
+
+
+def test_score_pairs_flushes_matches_in_batches_and_counts_inserted_rows(monkeypatch):
+    monkeypatch.setattr(dm.settings, "deep_match_flush_batch_size", 2)
+    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description, job_features=None: {"match_score": 90.0, "hard_gate_blocked": False})
+    flushes = []
+
+    def fake_bulk_create(db, rows):
+        flushes.append([r["job_listing_id"] for r in rows])
+        return max(0, len(rows) - 1)  # one row per flush already existed (ON CONFLICT DO NOTHING)
+
+    monkeypatch.setattr(dm, "bulk_create_matches", fake_bulk_create)
+    user = _User("u1")
+    out = dm._score_pairs(object(), [(user, {}, _Job(f"j{i}")) for i in range(5)])
+    assert [len(f) for f in flushes] == [2, 2, 1]
+    assert sorted(j for f in flushes for j in f) == ["j0", "j1", "j2", "j3", "j4"]
+    assert out["scored"] == 2
+
+
+def test_score_pairs_workers_never_read_orm_rows(monkeypatch):
+    import threading
+
+    main = threading.current_thread()
+
+    class _CallerOnlyJob(_Job):
+        """Stands in for an expired ORM row: reading it off the caller thread would lazy-load."""
+
+        def __getattribute__(self, name):
+            if threading.current_thread() is not main and not name.startswith("__"):
+                raise AssertionError(f"worker read job.{name}")
+            return super().__getattribute__(name)
+
+    monkeypatch.setattr(dm.settings, "deep_match_concurrency", 2)
+    monkeypatch.setattr(dm.settings, "deep_match_flush_batch_size", 1)
+    scored = []
+    monkeypatch.setattr(
+        dm, "_score_pair", lambda resume_data, title, description, job_features=None: scored.append(title) or {"match_score": 90.0}
+    )
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: len(rows))
+    user = _User("u1")
+    out = dm._score_pairs(object(), [(user, {}, _CallerOnlyJob(f"j{i}", title=f"t{i}")) for i in range(4)])
+    assert sorted(scored) == ["t0", "t1", "t2", "t3"]
+    assert out["scored"] == 4
+
+
+def test_score_pairs_empty_and_throughput_helpers():
+    out = dm._score_pairs(object(), [])
+    assert out["scored"] == 0
+    assert out["throughput"] == {"pairs": 0, "elapsed_s": 0.0, "pairs_per_sec": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    assert dm._percentile([], 50) == 0.0
+    values = [float(i) for i in range(1, 21)]
+    assert dm._percentile(values, 50) == 10.0
+    assert dm._percentile(values, 95) == 19.0
+    stats = dm._throughput_stats([0.1, 0.2, 0.3, 0.4], 2.0)
+    assert stats["pairs_per_sec"] == 2.0
+    assert stats["p50_ms"] == 200.0
+
+
+def test_run_deep_match_for_category_fans_out_pairs_across_users(monkeypatch):
+    users = [_User("u1"), _User("u2")]
+    jobs = [_Job("j1"), _Job("j2")]
+    monkeypatch.setattr(dm, "get_users_by_category", lambda db, cid: users)
+    monkeypatch.setattr(dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: jobs)
+    monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: _Resume({}))
+    lookups = []
+    monkeypatch.setattr(dm, "get_matched_job_ids", lambda db, uids, jids: lookups.append((uids, jids)) or {"u2": {"j1"}})
+    batches = []
+
+    def fake_score_pairs(db, pairs, priorities):
+        assert len(priorities) == len(pairs)
+        batches.append([(u.id, j.id) for u, _, j in pairs])
+        return {
+            "scored": 1, "skipped_low": 3, "scores": [80.0, 1.0, 2.0, 3.0], "low_score_samples": [],
+            "throughput": {"pairs": 0}, "llm_scored_pairs": 3, "cache_hits": 0, "deferred": 0, "dropped": 0,
+        }
+
+    monkeypatch.setattr(dm, "_score_pairs", fake_score_pairs)
+    out = dm.run_deep_match_for_category(object(), "c1")
+    assert lookups == [(["u1", "u2"], ["j1", "j2"])]  # one already-matched query per category
+    assert batches == [[("u1", "j1"), ("u1", "j2"), ("u2", "j2")]]
+    assert out["scored"] == 1
+    assert (out["pairs"], out["llm_scored_pairs"], out["cache_hits"]) == (3, 3, 0)
+
+
+def test_run_deep_match_for_category_applies_experience_hard_gate_before_scoring(monkeypatch):
+    def resume_with_years(start):
+        return {"experience": [{"title": "Dev", "company": "ACME", "start": start, "end": "Dec 2025"}]}
+
+    resumes = {"junior": _Resume(resume_with_years("Jan 2025"), "r-j"), "senior": _Resume(resume_with_years("Jan 2019"), "r-s")}
+    users = [_User("junior"), _User("senior")]
+    jobs = [_Job("open"), _Job("mid", required_years=3.0), _Job("lead", required_years=6.0)]
+    queries = []
+    monkeypatch.setattr(dm, "get_users_by_category", lambda db, cid: users)
+    monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: resumes[uid])
+    monkeypatch.setattr(
+        dm, "get_jobs_by_category_since", lambda db, cid, since_hours, **gate: queries.append(gate) or jobs
+    )
+    monkeypatch.setattr(dm, "get_matched_job_ids", lambda db, uids, jids: {})
+    monkeypatch.setattr(dm, "get_last_activity", lambda db, uids: {})
+    scored = []
+
+    def fake_score_pairs(db, pairs, priorities):
+        scored.extend((u.id, j.id) for u, _, j in pairs)
+        return {
+            "scored": 0, "skipped_low": 0, "scores": [], "low_score_samples": [],
+            "throughput": {"pairs": 0}, "llm_scored_pairs": 0, "cache_hits": 0, "deferred": 0, "dropped": 0,
+        }
+
+    monkeypatch.setattr(dm, "_score_pairs", fake_score_pairs)
+    dm.run_deep_match_for_category(object(), "c1")
+    # The query is gated at the most experienced user's years; each user is then gated on its own.
+    assert queries == [{"experience_years": 7.0, "margin_years": dm.HARD_GATE_MARGIN_YEARS}]
+    assert scored == [("junior", "open"), ("senior", "open"), ("senior", "mid"), ("senior", "lead")]
+
+    resumes["senior"] = _Resume({}, "r-empty")  # unknown years: nothing can be gated in SQL
+    queries.clear()
+    dm.run_deep_match_for_category(object(), "c1")
+    assert queries[0]["experience_years"] is None
+
+
+def test_score_pairs_uses_durable_cache_and_persists_fresh_llm_results(monkeypatch, _no_durable_match_cache):
+    from datetime import datetime, timezone
+
+    monkeypatch.setattr(dm, "is_llm_enabled", lambda: True)
+    monkeypatch.setattr("app.services.resume_matcher.is_llm_enabled", lambda: True)
+    user = _User("u1")
+    resume = {"experience": [{"title": "Dev", "company": "ACME", "bullets": ["python"]}]}
+    cached_job = _Job("j1", title="Cached", description="python apis")
+    new_job = _Job("j2", title="New", description="go services")
+    cached_key = dm.match_cache_key(dm.resume_features(resume).text, "Cached", "python apis")
+    lookups = []
+
+    def fake_get(db, keys, max_age):
+        lookups.append(sorted(keys))
+        return {cached_key: (0.9, "from db", datetime.now(timezone.utc))}
+
+    monkeypatch.setattr(dm, "get_cached_matches", fake_get)
+    llm_calls = []
+    monkeypatch.setattr(
+        "app.services.resume_matcher.llm_match_resume_job",
+        lambda text, title, jd: llm_calls.append(title) or (0.8, "fresh"),
+    )
+    created = []
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: created.extend(rows) or len(rows))
+
+    out = dm._score_pairs(object(), [(user, resume, cached_job), (user, resume, new_job)])
+    assert llm_calls == ["New"]
+    assert len(lookups) == 1 and len(lookups[0]) == 2
+    assert out["cache_hits"] == 1
+    assert out["llm_scored_pairs"] == 1
+    assert list(_no_durable_match_cache.values()) == [(0.8, "fresh")]
+    assert {c["job_listing_id"]: c["match_score"] for c in created} == {"j1": 90.0, "j2": 80.0}
+
+    # Re-triggering the same pairs is served from memory: no DB lookup, no LLM call.
+    out = dm._score_pairs(object(), [(user, resume, cached_job), (user, resume, new_job)])
+    assert llm_calls == ["New"]
+    assert len(lookups) == 1
+    assert out["cache_hits"] == 2 and out["llm_scored_pairs"] == 0
+
+
+def test_score_pairs_scores_highest_priority_first_and_defers_over_budget(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    monkeypatch.setattr(dm.settings, "deep_match_concurrency", 1)
+    monkeypatch.setattr(dm.settings, "deep_match_max_pairs_per_category", 2)
+    order = []
+    monkeypatch.setattr(
+        dm, "_score_pair", lambda resume_data, title, description, job_features=None: order.append(title) or {"match_score": 90.0}
+    )
+    created = []
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: created.extend(rows) or len(rows))
+    monkeypatch.setattr(dm.settings, "pipeline_interval_seconds", 3600)
+    user = _User("u1")
+    now = datetime.now(timezone.utc)
+    created_at = [now, now, now - timedelta(minutes=90), now]  # j2 leaves the 2h window within the next hour
+    pairs = [(user, {}, _Job(f"j{i}", title=f"t{i}", created_at=created_at[i])) for i in range(4)]
+    out = dm._score_pairs(object(), pairs, [0.1, 0.9, 0.2, 0.8])
+    assert order == ["t1", "t3"]
+    assert sorted(c["job_listing_id"] for c in created) == ["j1", "j3"]
+    assert out["deferred"] == 2
+    assert out["dropped"] == 1
+
+
+def test_score_pairs_stops_starting_pairs_after_time_budget(monkeypatch):
+    monkeypatch.setattr(dm.settings, "deep_match_concurrency", 1)
+    monkeypatch.setattr(dm.settings, "deep_match_time_budget_seconds", 1)
+    import itertools
+
+    clock = itertools.count()  # every perf_counter() call advances one "second" (thread-safe)
+    monkeypatch.setattr(dm.time, "perf_counter", lambda: float(next(clock)))
+    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description, job_features=None: {"match_score": 10.0})
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: len(rows))
+    user = _User("u1")
+    out = dm._score_pairs(object(), [(user, {}, _Job(f"j{i}")) for i in range(5)])
+    assert out["deferred"] > 0
+    assert len(out["scores"]) + out["deferred"] == 5
+
+
+def test_prepare_user_pairs_ranks_by_keyword_similarity_and_freshness(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc)
+    resume = {"experience": [{"title": "Dev", "company": "ACME", "bullets": ["python fastapi postgres"]}]}
+    jobs = [
+        _Job("stale", description="python fastapi postgres", created_at=now - timedelta(days=5)),
+        _Job("fresh", description="python fastapi postgres", created_at=now),
+        _Job("offtopic", description="welding forklift", created_at=now),
+    ]
+    monkeypatch.setattr(dm, "get_latest_by_user", lambda db, uid: _Resume(resume))
+    monkeypatch.setattr(dm, "get_matched_job_ids", lambda db, uids, jids: {})
+
+    def fake_select(db, resume_id, resume_text, pending, job_vectors, similarities=None):
+        similarities.update({"stale": 0.6, "fresh": 0.6, "offtopic": 0.1})
+        return pending
+
+    monkeypatch.setattr(dm, "select_candidates", fake_select)
+    prepared = dm._prepare_user_pairs(object(), _User("u1"), jobs, {}, None, now)
+    by_job = dict(zip([j.id for _, _, j in prepared["pairs"]], prepared["priorities"]))
+    assert by_job["fresh"] > by_job["stale"] > by_job["offtopic"]
+
+    monkeypatch.setattr(dm.settings, "deep_match_priority_enabled", False)
+    prepared = dm._prepare_user_pairs(object(), _User("u1"), jobs, {}, None, now)
+    assert prepared["priorities"] == [0.0, 0.0, 0.0]
+
+
+def test_score_pairs_defers_pairs_once_llm_budget_is_spent(monkeypatch):
+    from app.services.llm_governor import LLMBudgetExceeded
+
+    def fake_score(resume_data, title, description, job_features=None):
+        if title == "over":
+            raise LLMBudgetExceeded("spent")
+        return {"match_score": 90.0}
+
+    monkeypatch.setattr(dm, "_score_pair", fake_score)
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: len(rows))
+    user = _User("u1")
+    out = dm._score_pairs(object(), [(user, {}, _Job("j1", title="ok")), (user, {}, _Job("j2", title="over"))])
+    assert out["scored"] == 1
+    assert out["deferred"] == 1
+
+
+def test_score_pairs_keeps_a_batched_units_scores_when_the_llm_budget_runs_out(monkeypatch, _no_durable_match_cache):
+    monkeypatch.setattr(dm.settings, "deep_match_llm_batch_size", 3)
+    monkeypatch.setattr(
+        dm,
+        "llm_match_batch",
+        lambda resume_data, jobs, job_features=None: [
+            {"match_score": 0.9, "cache_key": "k1", "llm_score": 0.9, "match_reason": "fit"},
+            {"match_score": 0.8, "cache_key": "k2", "llm_score": 0.8, "match_reason": "ok"},
+            None,
+        ],
+    )
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: len(rows))
+    user = _User("u1")
+    pairs = [(user, {}, _Job(job_id, title=job_id)) for job_id in ("j1", "j2", "j3")]
+    out = dm._score_pairs(object(), pairs)
+    assert out["scored"] == 2
+    assert out["deferred"] == 1
+    assert out["llm_scored_pairs"] == 2
+    assert set(_no_durable_match_cache) == {"k1", "k2"}
+
+
+def test_score_pairs_batches_each_users_jobs_into_shared_prompts(monkeypatch):
+    monkeypatch.setattr(dm.settings, "deep_match_llm_batch_size", 2)
+    monkeypatch.setattr(dm.settings, "deep_match_concurrency", 1)
+    prompts = []
+
+    def fake_batch(resume_data, jobs, job_features=None):
+        prompts.append([j[0] for j in jobs])
+        return [{"match_score": 0.9} for _ in jobs]
+
+    monkeypatch.setattr(dm, "llm_match_batch", fake_batch)
+    monkeypatch.setattr(dm, "_score_pair", lambda resume_data, title, description, job_features=None: prompts.append([title]) or {"match_score": 90.0})
+    monkeypatch.setattr(dm, "bulk_create_matches", lambda db, rows: len(rows))
+    u1, u2 = _User("u1"), _User("u2")
+    pairs = [(u1, {}, _Job("a", title="a")), (u2, {}, _Job("b", title="b")), (u1, {}, _Job("c", title="c")), (u1, {}, _Job("d", title="d"))]
+    out = dm._score_pairs(object(), pairs, [0.1, 0.5, 0.9, 0.2])
+    assert prompts == [["c", "d"], ["b"], ["a"]]  # u1's best two share a prompt; units run best first
+    assert out["scored"] == 4
+    assert out["throughput"]["pairs"] == 4
@@ -0,0 +1,114 @@
+import app.services.embedding_prefilter as pf
+
+
+class _Job:
+    def __init__(self, job_id, title="Engineer", description=""):
+        self.id = job_id
+        self.job_hash = f"h-{job_id}"
+        self.title = title
+        self.description = description
+
+
+class _Store:
+    """In-memory stand-in for embedding_repo."""
+
+    def __init__(self, monkeypatch):
+        self.jobs = {}
+        self.resumes = {}
+        monkeypatch.setattr(pf, "get_job_vectors", lambda db, hashes, model_id: {h: self.jobs[h] for h in hashes if h in self.jobs})
+        monkeypatch.setattr(pf, "save_job_vectors", lambda db, vectors, model_id: self.jobs.update(vectors))
+        monkeypatch.setattr(pf, "get_resume_vector", lambda db, rid, content_hash, model_id: self.resumes.get((rid, content_hash)))
+        monkeypatch.setattr(
+            pf,
+            "save_resume_vector",
+            lambda db, rid, content_hash, model_id, vector: self.resumes.__setitem__((rid, content_hash), vector),
+        )
+
+
+def _enable(monkeypatch, top_k=2, min_similarity=0.0):
+    monkeypatch.setattr(pf.settings, "deep_match_prefilter_enabled", True)
+    monkeypatch.setattr(pf.settings, "deep_match_prefilter_top_k", top_k)
+    monkeypatch.setattr(pf.settings, "deep_match_prefilter_min_similarity", min_similarity)
+
+
+def _fake_embed(text):
+    if "python" in text.lower():
+        return [1.0, 0.0]
+    if "java" in text.lower():
+        return [0.6, 0.8]
+    return [0.0, 1.0]
+
+
+def test_select_candidates_passthrough_when_disabled(monkeypatch):
+    monkeypatch.setattr(pf.settings, "deep_match_prefilter_enabled", False)
+    monkeypatch.setattr(pf, "embed_text_titan", lambda text: (_ for _ in ()).throw(AssertionError("no embed")))
+    jobs = [_Job("j1"), _Job("j2"), _Job("j3")]
+    assert pf.select_candidates(object(), "r1", "resume", jobs) == jobs
+
+
+def test_select_candidates_passthrough_when_few_jobs(monkeypatch):
+    _enable(monkeypatch, top_k=5)
+    monkeypatch.setattr(pf, "embed_text_titan", lambda text: (_ for _ in ()).throw(AssertionError("no embed")))
+    jobs = [_Job("j1"), _Job("j2")]
+    assert pf.select_candidates(object(), "r1", "resume", jobs) == jobs
+
+
+def test_select_candidates_ranks_top_k_and_applies_min_similarity(monkeypatch):
+    _enable(monkeypatch, top_k=2, min_similarity=0.5)
+    _Store(monkeypatch)
+    monkeypatch.setattr(pf, "embed_text_titan", _fake_embed)
+    jobs = [_Job("j1", description="sales"), _Job("j2", description="Java services"), _Job("j3", description="Python APIs")]
+    vectors = {}
+    out = pf.select_candidates(object(), "r1", "Python backend", jobs, vectors)
+    assert [j.id for j in out] == ["j3", "j2"]
+    assert set(vectors) == {"h-j1", "h-j2", "h-j3"}
+
+    _enable(monkeypatch, top_k=2, min_similarity=0.9)
+    similarities = {}
+    out = pf.select_candidates(object(), "r1", "Python backend", jobs, vectors, similarities=similarities)
+    assert [j.id for j in out] == ["j3"]
+    assert list(similarities) == ["j3"] and similarities["j3"] >= 0.9
+
+
+def test_select_candidates_reuses_persisted_vectors_across_runs(monkeypatch):
+    _enable(monkeypatch, top_k=1)
+    store = _Store(monkeypatch)
+    calls = []
+
+    def counting_embed(text):
+        calls.append(text)
+        return _fake_embed(text)
+
+    monkeypatch.setattr(pf, "embed_text_titan", counting_embed)
+    jobs = [_Job("j1", description="Python"), _Job("j2", description="sales")]
+    pf.select_candidates(object(), "r1", "Python", jobs, {})
+    assert len(calls) == 3  # 1 resume + 2 jobs
+    assert set(store.jobs) == {"h-j1", "h-j2"}
+    assert isinstance(store.jobs["h-j1"], bytes)
+
+    # A new run (fresh in-run cache) with unchanged resume text embeds nothing.
+    out = pf.select_candidates(object(), "r1", "Python", jobs, {})
+    assert [j.id for j in out] == ["j1"]
+    assert len(calls) == 3
+
+    # Edited resume text is re-embedded; jobs still come from the store.
+    pf.select_candidates(object(), "r1", "Python and Go", jobs, {})
+    assert len(calls) == 4
+
+
+def test_select_candidates_falls_back_when_titan_fails(monkeypatch):
+    _enable(monkeypatch, top_k=1)
+    store = _Store(monkeypatch)
+    jobs = [_Job("j1", description="Python"), _Job("j2")]
+    monkeypatch.setattr(pf, "embed_text_titan", lambda text: (_ for _ in ()).throw(RuntimeError("no access")))
+    assert pf.select_candidates(object(), None, "resume", jobs) == jobs
+
+    def fail_on_second_job(text):
+        if "python" in text.lower() or text == "resume":
+            return [1.0, 0.0]
+        raise RuntimeError("throttled")
+
+    monkeypatch.setattr(pf, "embed_text_titan", fail_on_second_job)
+    assert pf.select_candidates(object(), None, "resume", jobs) == jobs
+    # The vector that did get computed is persisted for next time.
+    assert set(store.jobs) == {"h-j1"}
@@ -0,0 +1,82 @@
+import app.repos.embedding_repo as erepo
+from app.services.titan_embedding import vector_from_bytes, vector_to_bytes
+
+
+class _Query:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def delete(self, synchronize_session=False):
+        return len(self.rows)
+
+
+class _DB:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+        self.committed = 0
+
+    def query(self, *args):
+        return _Query(self.rows)
+
+    def execute(self, stmt):
+        self.executed.append(stmt)
+
+    def commit(self):
+        self.committed += 1
+
+
+def test_vector_bytes_round_trip_is_float32():
+    packed = vector_to_bytes([0.5, -1.25, 3.0])
+    assert len(packed) == 12
+    assert vector_from_bytes(packed).tolist() == [0.5, -1.25, 3.0]
+
+
+def test_get_and_save_job_vectors():
+    packed = vector_to_bytes([1.0, 2.0])
+    db = _DB(rows=[("h1", memoryview(packed))])
+    assert erepo.get_job_vectors(db, [], "m") == {}
+    assert erepo.get_job_vectors(db, ["h1", "h1"], "m") == {"h1": packed}
+
+    assert erepo.save_job_vectors(db, {}, "m") == 0
+    assert db.executed == []
+    assert erepo.save_job_vectors(db, {"h1": packed, "h2": packed}, "m") == 2
+    sql = str(db.executed[0].compile(dialect=_pg_dialect()))
+    assert "ON CONFLICT (job_hash, model_id) DO NOTHING" in sql
+    assert db.committed == 1
+
+
+def test_get_and_save_resume_vector():
+    packed = vector_to_bytes([1.0])
+    assert erepo.get_resume_vector(_DB(rows=[]), "r1", "hash", "m") is None
+    assert erepo.get_resume_vector(_DB(rows=[(packed,)]), "r1", "hash", "m") == packed
+
+    db = _DB()
+    erepo.save_resume_vector(db, "r1", "hash", "m", packed)
+    sql = str(db.executed[0].compile(dialect=_pg_dialect()))
+    assert "ON CONFLICT (resume_id, model_id) DO UPDATE" in sql
+    assert db.committed == 1
+
+
+def test_delete_stale_job_vectors_commits_only_when_deleted():
+    db = _DB(rows=[])
+    assert erepo.delete_stale_job_vectors(db, 14) == 0
+    assert db.committed == 0
+    db = _DB(rows=[object(), object()])
+    assert erepo.delete_stale_job_vectors(db, 14) == 2
+    assert db.committed == 1
+
+
+def _pg_dialect():
+    from sqlalchemy.dialects import postgresql
+
+    return postgresql.dialect()
@@ -1,8 +1,19 @@
+from datetime import datetime, timedelta, timezone
+
 import pandas as pd
+import pytest
 
 import app.services.job_collector as jc
 
 
+@pytest.fixture(autouse=True)
+def _no_stored_watermarks(monkeypatch):
+    saved = []
+    monkeypatch.setattr(jc, "get_watermarks", lambda db, category_ids: [])
+    monkeypatch.setattr(jc, "save_watermarks", lambda db, entries: saved.extend(entries) or len(entries))
+    return saved
+
+
 class _Category:
     def __init__(self, cat_id, slug):
         self.id = cat_id
@@ -62,6 +73,10 @@ def test_run_collector_dedupes_and_batches_by_category(monkeypatch):
     assert out["total_deduped"] == 2
     assert out["inserted"] == 2
     assert sorted(called) == [("c1", 1), ("c2", 1)]
+    assert out["by_category"] == {
+        "c1": {"fetched": 2, "deduped": 1, "inserted": 1},
+        "c2": {"fetched": 1, "deduped": 1, "inserted": 1},
+    }
 
 
 def test_run_collector_with_category_override_and_fetch_window(monkeypatch):
@@ -96,3 +111,155 @@ def test_run_collector_handles_thread_fetch_exception(monkeypatch):
     out = jc.run_collector(db=object())
     assert out["total_fetched"] == 0
     assert out["categories"] == 1
+
+
+def test_fetch_for_category_normalizes_missing_values_column_wise(monkeypatch):
+    df = pd.DataFrame(
+        [
+            {"title": None, "company": float("nan"), "company_name": "Y", "job_url": "u1",
+             "description": float("nan"), "job_description": "d1", "location": float("nan"), "date_posted": "2024-01-01"},
+            {"title": "B", "company": None, "company_name": None, "job_url": float("nan")},
+        ]
+    )
+    monkeypatch.setattr(jc, "fetch_and_deduplicate_jobs", lambda **kwargs: df)
+    out = jc._fetch_for_category("software_engineer", "c1")
+    assert len(out) == 1
+    row = out[0]
+    assert row["title"] == "Unknown Title"
+    assert row["company"] == "Y"
+    assert row["description"] == "d1"
+    assert row["location"] is None
+    assert row["posted_at"] == "2024-01-01"
+    assert row["job_hash"] == jc.compute_job_hash("Unknown Title", "Y", "u1")
+
+
+class _Watermark:
+    def __init__(self, cid, site, last_posted_at=None, last_scraped_at=None, recent_job_hashes=None):
+        self.search_category_id = cid
+        self.site = site
+        self.last_posted_at = last_posted_at
+        self.last_scraped_at = last_scraped_at
+        self.recent_job_hashes = recent_job_hashes
+
+
+def test_site_hours_old_narrows_window_to_watermark_plus_overlap(monkeypatch):
+    monkeypatch.setattr(jc.settings, "collector_watermark_overlap_hours", 1)
+    now = datetime(2024, 1, 2, 12, 0, tzinfo=timezone.utc)
+    windows = jc._site_hours_old(
+        {
+            "indeed": _Watermark("c1", "indeed", last_scraped_at=now - timedelta(minutes=30)),
+            "linkedin": _Watermark("c1", "linkedin", last_scraped_at=now - timedelta(days=3)),
+            "google": _Watermark("c1", "google"),
+        },
+        hours_old=24,
+        now=now,
+    )
+    assert windows == {"indeed": 2, "linkedin": 24}
+
+
+def test_watermark_window_narrows_despite_date_only_date_posted(monkeypatch):
+    monkeypatch.setattr(jc.settings, "collector_watermark_overlap_hours", 1)
+    scraped_at = datetime(2024, 1, 2, 22, 0, tzinfo=timezone.utc)
+    df = pd.DataFrame([{"title": "A", "company": "X", "job_url": "u1", "site": "indeed", "date_posted": "2024-01-02"}])
+    monkeypatch.setattr(jc, "fetch_and_deduplicate_jobs", lambda **kwargs: df)
+    rows = jc._fetch_for_category("software_engineer", "c1")
+
+    (entry,) = jc._advance_watermarks({}, rows, scraped_at)
+    assert entry["last_posted_at"] == datetime(2024, 1, 2, tzinfo=timezone.utc)  # midnight: date-only
+    wm = _Watermark("c1", "indeed", entry["last_posted_at"], entry["last_scraped_at"], entry["recent_job_hashes"])
+    windows = jc._site_hours_old({"indeed": wm}, hours_old=72, now=scraped_at + timedelta(hours=2))
+    assert windows == {"indeed": 3}  # 2h since the scrape + 1h overlap, not 24h since midnight
+
+
+def test_run_collector_skips_known_jobs_and_advances_watermarks(monkeypatch, _no_stored_watermarks):
+    cats = [_Category("c1", "software_engineer")]
+    monkeypatch.setattr(jc, "get_categories_with_active_users", lambda db: cats)
+    monkeypatch.setattr(jc.settings, "job_hours_old", 24)
+    known_hash = jc.compute_job_hash("Old", "X", "u-old")
+    seen_at = datetime.now(timezone.utc) - timedelta(hours=3)
+    monkeypatch.setattr(
+        jc,
+        "get_watermarks",
+        lambda db, ids: [_Watermark("c1", "indeed", last_scraped_at=seen_at, recent_job_hashes=[known_hash])],
+    )
+    captured = {}
+
+    def fake_fetch(slug, cid, site_hours_old=None):
+        captured["site_hours_old"] = site_hours_old
+        return [
+            {"title": "Old", "company": "X", "job_url": "u-old", "job_hash": known_hash,
+             "search_category_id": "c1", "site": "indeed", "posted_at": seen_at},
+            {"title": "New", "company": "X", "job_url": "u-new", "job_hash": "h-new",
+             "search_category_id": "c1", "site": "indeed", "posted_at": "2099-01-01T00:00:00Z"},
+        ]
+
+    monkeypatch.setattr(jc, "_fetch_for_category", fake_fetch)
+    upserted = []
+    monkeypatch.setattr(jc, "batch_upsert", lambda db, rows, cid: upserted.extend(r["job_hash"] for r in rows) or len(rows))
+    out = jc.run_collector(db=object())
+    assert captured["site_hours_old"] == {"indeed": 5}  # 3h since watermark (rounded up) + 1h overlap
+    assert upserted == ["h-new"]
+    assert out["skipped_known"] == 1
+    (entry,) = _no_stored_watermarks
+    assert (entry["search_category_id"], entry["site"]) == ("c1", "indeed")
+    assert entry["recent_job_hashes"] == [known_hash, "h-new"]
+    assert entry["last_posted_at"].year == 2099
+
+
+def test_bootstrap_run_with_explicit_hours_old_keeps_recently_seen_jobs(monkeypatch):
+    category = _Category("c1", "software_engineer")
+    monkeypatch.setattr(jc, "get_category_by_id", lambda db, cid: category)
+    known_hash = jc.compute_job_hash("Old", "X", "u-old")
+    monkeypatch.setattr(
+        jc, "get_watermarks", lambda db, ids: [_Watermark("c1", "indeed", recent_job_hashes=[known_hash])]
+    )
+    monkeypatch.setattr(
+        jc,
+        "_fetch_for_category",
+        lambda slug, cid, wanted, hours: [{"title": "Old", "company": "X", "job_url": "u-old", "job_hash": known_hash,
+                                           "search_category_id": "c1", "site": "indeed"}],
+    )
+    upserted = []
+    monkeypatch.setattr(jc, "batch_upsert", lambda db, rows, cid: upserted.extend(r["job_hash"] for r in rows) or len(rows))
+    out = jc.run_collector(db=object(), category_ids=["c1"], results_wanted=200, hours_old=10)
+    assert upserted == [known_hash]  # deleted as unmatched earlier; the new user still needs it
+    assert out["skipped_known"] == 0
+
+
+def test_run_collector_honors_explicit_hours_old_and_disabled_incremental(monkeypatch, _no_stored_watermarks):
+    cats = [_Category("c1", "software_engineer")]
+    monkeypatch.setattr(jc, "get_categories_with_active_users", lambda db: cats)
+    monkeypatch.setattr(jc.settings, "collector_incremental_enabled", False)
+    monkeypatch.setattr(jc, "get_watermarks", lambda db, ids: (_ for _ in ()).throw(AssertionError("not loaded")))
+    monkeypatch.setattr(
+        jc,
+        "_fetch_for_category",
+        lambda slug, cid, wanted, hours: [{"title": "A", "company": "X", "job_url": "u1", "job_hash": "h1",
+                                           "search_category_id": "c1", "site": "indeed"}],
+    )
+    monkeypatch.setattr(jc, "batch_upsert", lambda db, rows, cid: len(rows))
+    out = jc.run_collector(db=object(), hours_old=48)
+    assert out["inserted"] == 1
+    assert _no_stored_watermarks == []
+
+
+def test_run_collector_collapses_cross_posted_near_duplicates(monkeypatch):
+    cats = [_Category("c1", "software_engineer")]
+    monkeypatch.setattr(jc, "get_categories_with_active_users", lambda db: cats)
+    jd = "Build data pipelines in Python and Spark for our analytics platform; own SLAs and mentor engineers. " * 3
+    monkeypatch.setattr(
+        jc,
+        "_fetch_for_category",
+        lambda slug, cid: [
+            {"title": "Data Engineer", "company": "Acme Inc", "job_url": "u-indeed", "description": jd,
+             "search_category_id": "c1", "site": "indeed", "job_hash": "h1"},
+            {"title": "Data Engineer (Remote)", "company": "ACME", "job_url": "u-linkedin", "description": jd + " Remote.",
+             "search_category_id": "c1", "site": "linkedin", "job_hash": "h2"},
+        ],
+    )
+    upserted = []
+    monkeypatch.setattr(jc, "batch_upsert", lambda db, rows, cid: upserted.extend(rows) or len(rows))
+    out = jc.run_collector(db=object())
+    assert out["near_duplicates"] == 1
+    assert [r["job_url"] for r in upserted] == ["u-indeed"]
+    assert upserted[0]["extra_data"] == {"alternate_urls": [{"url": "u-linkedin", "site": "linkedin"}]}
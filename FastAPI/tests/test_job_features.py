@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+from app.services import job_features as jf
+from app.repos import job_listing_repo as jrepo
+
+
+class _Listing:
+    def __init__(self, job_id="j1", title="Backend Engineer", description="", extra_data=None, updated_at=None):
+        self.id = job_id
+        self.title = title
+        self.description = description
+        self.extra_data = extra_data
+        self.updated_at = updated_at
+
+
+def test_extract_required_years_normalizes_whitespace_and_takes_the_largest():
+    assert jf.extract_required_years("at least\n  3 years with   Python") == 3.0
+    assert jf.extract_required_years("Minimum of 2 years; at least 4.5 years preferred") == 4.5
+    assert jf.extract_required_years("No requirement stated") is None
+    assert jf.extract_required_years("") is None
+
+
+def test_job_features_round_trip_and_ignore_stale_versions():
+    features = jf.compute_job_features("Python Developer", "5+ years of experience with FastAPI and the cloud")
+    assert features.required_years == 5.0
+    assert {"python", "fastapi", "cloud"} <= features.tokens
+    assert "developer" not in features.tokens and "the" not in features.tokens
+    stored = features.to_json()
+    assert stored["tokens"] == sorted(stored["tokens"])
+    assert jf.JobFeatures.from_json(stored) == features
+    assert jf.JobFeatures.from_json({**stored, "version": jf.FEATURES_VERSION - 1}) is None
+    assert jf.JobFeatures.from_json({"version": jf.FEATURES_VERSION, "tokens": "x"}) is None
+    assert jf.JobFeatures.from_json(None) is None
+
+
+def test_get_job_features_prefers_stored_features_and_memoizes(monkeypatch):
+    stored = {"site": "indeed", "features": {"version": jf.FEATURES_VERSION, "required_years": 7, "tokens": ["go"]}}
+    job = _Listing(description="2 years of experience with python", extra_data=stored)
+    computed = []
+    real = jf.compute_job_features
+    monkeypatch.setattr(jf, "compute_job_features", lambda t, d: computed.append(t) or real(t, d))
+
+    features = jf.get_job_features(job)
+    assert features == jf.JobFeatures(required_years=7.0, tokens=frozenset({"go"}))
+    assert jf.get_job_features(job) is features
+    assert computed == []
+
+    legacy = _Listing("j2", description="2 years of experience with python")
+    assert jf.get_job_features(legacy).required_years == 2.0
+    jf.get_job_features(legacy)
+    assert computed == ["Backend Engineer"]  # computed once, then memoized by id
+
+    legacy.updated_at = datetime(2026, 1, 1, tzinfo=timezone.utc)  # edited listing: new key
+    jf.get_job_features(legacy)
+    assert len(computed) == 2
+
+
+def test_listing_values_store_features_alongside_existing_extra_data():
+    values = jrepo._listing_values(
+        {"title": "Data Engineer", "company": "C", "job_url": "u", "description": "at least 3 years Spark",
+         "extra_data": {"alternate_urls": []}},
+        "c1",
+    )
+    assert values["extra_data"]["alternate_urls"] == []
+    features = jf.JobFeatures.from_json(values["extra_data"]["features"])
+    assert features.required_years == 3.0
+    assert {"data", "spark"} <= features.tokens
+    assert values["required_years"] == 3.0  # indexed copy for the SQL-side hard gate
+
+
+def test_update_one_recomputes_features_when_description_changes(monkeypatch):
+    listing = _Listing(description="1 year experience", extra_data=jf.job_feature_columns({"site": "x"}, "T", "1 year experience")["extra_data"])
+
+    class _DB:
+        def commit(self):
+            pass
+
+        def refresh(self, obj):
+            pass
+
+    monkeypatch.setattr(jrepo, "get_by_id", lambda db, listing_id: listing)
+    jrepo.update_one(_DB(), "j1", description="6 years of experience")
+    assert listing.extra_data["site"] == "x"
+    assert jf.JobFeatures.from_json(listing.extra_data["features"]).required_years == 6.0
+    assert listing.required_years == 6.0
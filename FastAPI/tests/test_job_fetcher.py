@@ -1,6 +1,19 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
 import app.services.job_fetcher as jf
 
 
+@pytest.fixture(autouse=True)
+def _fresh_site_slots():
+    jf._site_slots.clear()
+    yield
+    jf._site_slots.clear()
+
+
 def test_site_names_from_settings_parses_csv(monkeypatch):
     monkeypatch.setattr(jf.settings, "job_site_names", "indeed, linkedin ,zip_recruiter")
     assert jf._site_names_from_settings() == ["indeed", "linkedin", "zip_recruiter"]
@@ -53,3 +66,99 @@ def test_fetch_and_deduplicate_jobs_normalizes_columns(monkeypatch):
     assert "description" in out.columns
     assert "company" in out.columns
     assert len(out) == 2
+
+
+def test_parse_site_overrides_ignores_malformed_entries():
+    assert jf._parse_site_overrides("linkedin:1, indeed : 3,bad,google:x") == {"linkedin": 1, "indeed": 3}
+    assert jf._parse_site_overrides(None) == {}
+
+
+def test_fetch_scrapes_each_site_separately_and_survives_one_failing(monkeypatch):
+    monkeypatch.setattr(jf.settings, "job_site_names", "indeed,linkedin")
+    calls = []
+
+    def fake_scrape(site_name, **kwargs):
+        calls.append(site_name)
+        if site_name == ["linkedin"]:
+            raise RuntimeError("blocked")
+        return pd.DataFrame([{"title": "Engineer", "company": "ACME", "job_url": "u1"}])
+
+    monkeypatch.setattr(jf, "scrape_jobs", fake_scrape)
+    out = jf.fetch_and_deduplicate_jobs()
+    assert sorted(calls) == [["indeed"], ["linkedin"]]
+    assert len(out) == 1
+    assert out.loc[0, "site"] == "indeed"
+
+
+def test_fetch_returns_without_waiting_for_a_stalled_site(monkeypatch):
+    monkeypatch.setattr(jf.settings, "job_site_names", "indeed,linkedin")
+    monkeypatch.setattr(jf.settings, "job_site_timeout_overrides", "linkedin:1")
+    release = threading.Event()
+
+    def fake_scrape(site_name, **kwargs):
+        if site_name == ["linkedin"]:
+            release.wait(10)
+            return pd.DataFrame()
+        return pd.DataFrame([{"title": "Engineer", "company": "ACME", "job_url": "u1", "site": "indeed"}])
+
+    monkeypatch.setattr(jf, "scrape_jobs", fake_scrape)
+    started = time.monotonic()
+    try:
+        out = jf.fetch_and_deduplicate_jobs()
+    finally:
+        release.set()
+    assert time.monotonic() - started < 5
+    assert list(out["site"]) == ["indeed"]
+
+
+def test_site_concurrency_cap_is_shared_across_fetches(monkeypatch):
+    monkeypatch.setattr(jf.settings, "job_site_names", "linkedin")
+    monkeypatch.setattr(jf.settings, "job_site_concurrency_overrides", "linkedin:1")
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def fake_scrape(site_name, **kwargs):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        return pd.DataFrame()
+
+    monkeypatch.setattr(jf, "scrape_jobs", fake_scrape)
+    threads = [threading.Thread(target=jf.fetch_and_deduplicate_jobs) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert state["peak"] == 1
+
+
+def test_site_timeout_counts_from_slot_acquisition_and_abandoned_tasks_skip_the_scrape(monkeypatch):
+    monkeypatch.setattr(jf.settings, "job_site_names", "linkedin")
+    monkeypatch.setattr(jf.settings, "job_site_concurrency_overrides", "linkedin:1")
+    monkeypatch.setattr(jf.settings, "job_site_timeout_overrides", "linkedin:1")
+    calls = []
+
+    def fake_scrape(site_name, **kwargs):
+        calls.append(site_name)
+        time.sleep(0.6)
+        return pd.DataFrame([{"title": "Engineer", "company": "ACME", "job_url": f"u{len(calls)}", "site": "linkedin"}])
+
+    monkeypatch.setattr(jf, "scrape_jobs", fake_scrape)
+    slot = jf._site_slot("linkedin")
+    slot.acquire()
+    threading.Timer(0.6, slot.release).start()
+    # 0.6s queued + 0.6s scraping exceeds the 1s timeout only if queue time counted
+    out = jf.fetch_and_deduplicate_jobs()
+    assert list(out["job_url"]) == ["u1"]
+
+    cancel = threading.Event()
+    slot.acquire()
+    worker = threading.Thread(target=jf._scrape_site, args=("linkedin", "t", "l", 10, 24, cancel))
+    worker.start()
+    cancel.set()
+    slot.release()
+    worker.join()
+    assert len(calls) == 1
@@ -24,20 +24,27 @@ class _Match:
 
 
 def test_run_pipeline_returns_500_when_internal_fails(monkeypatch, admin_client):
-    monkeypatch.setattr(jobs_mod, "run_collector", lambda db: (_ for _ in ()).throw(RuntimeError("collector boom")))
+    monkeypatch.setattr(jobs_mod, "run_pipeline_now", lambda: (_ for _ in ()).throw(RuntimeError("collector boom")))
     resp = admin_client.post("/jobs/run-pipeline")
     assert resp.status_code == 500
     assert "Pipeline run failed" in resp.json()["detail"]
 
 
 def test_run_pipeline_success(monkeypatch, admin_client):
-    monkeypatch.setattr("app.repos.search_category_repo.seed_default_categories", lambda db: ([], 0))
-    monkeypatch.setattr("app.repos.job_listing_repo.delete_unmatched", lambda db: 5)
-    monkeypatch.setattr(jobs_mod, "run_collector", lambda db: {"fetched": 10})
-    monkeypatch.setattr(jobs_mod, "run_deep_match_all", lambda db: {"scored": 3})
+    monkeypatch.setattr(
+        jobs_mod, "run_pipeline_now", lambda: {"run_id": "r1", "deep_match": {"scored": 3}, "cleanup_unmatched": 5}
+    )
     resp = admin_client.post("/jobs/run-pipeline")
     assert resp.status_code == 200
     assert resp.json()["cleanup_unmatched"] == 5
+    assert resp.json()["run_id"] == "r1"
+
+
+def test_run_pipeline_returns_409_while_lease_is_held(monkeypatch, admin_client):
+    monkeypatch.setattr(jobs_mod, "run_pipeline_now", lambda: {"skipped": "lease_held"})
+    resp = admin_client.post("/jobs/run-pipeline")
+    assert resp.status_code == 409
+    assert "already in progress" in resp.json()["detail"]
 
 
 def test_render_latex_pdf_sanitizes_errors(monkeypatch, client):
@@ -96,6 +103,15 @@ def test_get_matched_jobs_and_applied(monkeypatch, client):
     assert r3.status_code == 200 and len(r3.json()["active"]) == 1
 
 
+def test_matched_jobs_use_server_side_description_preview(monkeypatch, client):
+    match = _Match()
+    match.job_listing.description = None  # deferred in list queries; only the preview is loaded
+    match.job_listing.description_preview = "p" * 2500
+    monkeypatch.setattr(jobs_mod, "get_matches_for_user", lambda db, uid, status, limit: [match])
+    resp = client.get("/jobs/matched")
+    assert resp.json()[0]["description"] == "p" * 2000
+
+
 def test_delete_match_not_found(monkeypatch, client):
     monkeypatch.setattr(jobs_mod, "delete_match", lambda db, match_id, user_id: False)
     resp = client.delete("/jobs/matches/missing")
@@ -149,3 +165,61 @@ def test_render_latex_pdf_success(monkeypatch, client):
     resp = client.post("/jobs/render-latex-pdf", json={"latex": "\\documentclass{article}"})
     assert resp.status_code == 200
     assert resp.headers["content-type"].startswith("application/pdf")
+
+
+def test_matched_jobs_load_listings_in_one_query(stub_user, sqlite_engine):
+    """Regression: matches and their listings come from one SELECT per list (no per-match lazy load)."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import sessionmaker
+    from fastapi.testclient import TestClient
+
+    from app.database import Base, get_db
+    from app.dependencies import get_current_user_full_access
+    from app.main import app
+    from app.models.job_listing import JobListing
+    from app.models.search_category import SearchCategory
+    from app.models.user import User
+    from app.models.user_job_match import UserJobMatch
+
+    Base.metadata.create_all(
+        sqlite_engine, tables=[SearchCategory.__table__, User.__table__, JobListing.__table__, UserJobMatch.__table__]
+    )
+    db = sessionmaker(bind=sqlite_engine)()
+    db.add(User(id=stub_user.id, email=stub_user.email, password_hash="x"))
+    for i in range(5):
+        db.add(JobListing(
+            id=f"j{i}", job_hash=f"h{i}", search_category_id="c1", title=f"Job {i}", company="ACME",
+            job_url=f"https://example.com/{i}", description="d" * 5000, extra_data={"features": {"tokens": ["x"] * 50}},
+        ))
+        db.add(UserJobMatch(
+            id=f"m{i}", user_id=stub_user.id, job_listing_id=f"j{i}", match_score=90.0 - i,
+            status="applied" if i == 4 else "pending",
+        ))
+    db.commit()
+    db.expunge_all()
+
+    statements = []
+    event.listen(sqlite_engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+    def _db_override():
+        yield db
+
+    overrides = {get_db: _db_override, get_current_user_full_access: lambda: stub_user}
+    app.dependency_overrides.update(overrides)
+    try:
+        client = TestClient(app)
+        matched = client.get("/jobs/matched").json()
+        assert len(statements) == 1
+        assert [m["title"] for m in matched] == ["Job 0", "Job 1", "Job 2", "Job 3"]
+        assert all(m["description"] == "d" * 2000 for m in matched)
+        assert "extra_data" not in statements[0]
+
+        statements.clear()
+        db.expunge_all()
+        both = client.get("/jobs").json()
+        assert len(statements) == 2  # one per list (active, applied)
+        assert (len(both["active"]), len(both["applied"])) == (4, 1)
+    finally:
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+        db.close()
@@ -1,6 +1,15 @@
+import pytest
+
 import app.services.llm_client as llm
 
 
+@pytest.fixture(autouse=True)
+def _fresh_bedrock_clients():
+    llm._reset_bedrock_clients()
+    yield
+    llm._reset_bedrock_clients()
+
+
 def test_call_bedrock_llm_tries_typo_fallback_model(monkeypatch):
     class _Client:
         def __init__(self):
@@ -61,6 +70,12 @@ def test_llm_match_resume_job_parses_regex_fallback(monkeypatch):
     assert "solid skills" in reason
 
 
+def test_llm_match_resume_job_raises_when_no_score_can_be_parsed(monkeypatch):
+    monkeypatch.setattr(llm, "_call_bedrock_llm", lambda prompt: "I am unable to score this job.")
+    with pytest.raises(ValueError):
+        llm.llm_match_resume_job("resume", "title", "jd")
+
+
 def test_llm_assign_category_returns_slug_or_none(monkeypatch):
     monkeypatch.setattr(llm, "_call_bedrock_llm", lambda prompt: "software_engineer")
     assert llm.llm_assign_category("Backend Engineer", ["software_engineer", "data_scientist"]) == "software_engineer"
@@ -130,3 +145,196 @@ def test_llm_generate_tailored_resume_sections_raises_after_retries(monkeypatch)
         assert False, "expected ValueError"
     except ValueError:
         pass
+
+
+def test_bedrock_client_is_built_once_per_timeout_and_reused(monkeypatch):
+    import threading
+
+    built = []
+
+    class _Client:
+        def converse(self, modelId, messages, inferenceConfig):
+            return {"output": {"message": {"content": [{"text": "ok"}]}}}
+
+    def fake_client(service, region_name, config):
+        built.append(config)
+        return _Client()
+
+    monkeypatch.setattr(llm, "boto3", type("B", (), {"client": staticmethod(fake_client)}))
+    monkeypatch.setattr(llm.settings, "bedrock_llm_model_id", "mistral.x")
+    monkeypatch.setattr(llm.settings, "deep_match_concurrency", 16)
+
+    threads = [threading.Thread(target=llm._call_bedrock_llm, args=("p",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    llm._call_bedrock_llm("p")
+    assert len(built) == 1
+    assert built[0].max_pool_connections == 18
+    assert built[0].read_timeout == 60
+
+    llm._call_bedrock_llm("p", timeout=120.0)
+    assert len(built) == 2
+    assert llm.get_bedrock_client_stats() == {"clients_cached": 2, "client_constructions": 2}
+
+
+def test_call_bedrock_llm_backs_off_governor_on_throttling(monkeypatch):
+    from app.services.llm_governor import llm_governor
+
+    class ThrottlingException(Exception):
+        pass
+
+    attempts = []
+
+    class _Client:
+        def converse(self, modelId, messages, inferenceConfig):
+            attempts.append(modelId)
+            raise ThrottlingException("slow down")
+
+    monkeypatch.setattr(llm, "_get_bedrock_client", lambda timeout: _Client())
+    monkeypatch.setattr(llm.settings, "bedrock_llm_model_id", "mistral.ministral-x")
+    monkeypatch.setattr(llm.settings, "llm_max_retries", 0)
+    with pytest.raises(ThrottlingException):
+        llm._call_bedrock_llm("prompt")
+    assert attempts == ["mistral.ministral-x"]  # the alias shares the quota, so it is not tried
+    assert llm_governor.stats()["throttles"] == 1
+    assert llm_governor.stats()["in_flight"] == 0
+
+
+def test_llm_match_resume_job_charges_the_run_budget(monkeypatch):
+    from app.services.llm_governor import LLMBudgetExceeded, llm_governor
+
+    monkeypatch.setattr(llm, "_call_bedrock_llm", lambda prompt: '{"match_score": 80, "match_reason": "ok"}')
+    llm_governor.start_run(budget=1)
+    try:
+        assert llm.llm_match_resume_job("resume", "title", "jd")[0] == 0.8
+        with pytest.raises(LLMBudgetExceeded):
+            llm.llm_match_resume_job("resume", "title", "jd")
+    finally:
+        llm_governor.finish_run()
+
+
+def test_scoring_call_rejected_by_the_open_circuit_is_refunded(monkeypatch):
+    from app.services.llm_governor import LLMCircuitOpen, llm_governor
+
+    def rejected(prompt):
+        raise LLMCircuitOpen("open")
+
+    monkeypatch.setattr(llm, "_call_bedrock_llm", rejected)
+    llm_governor.start_run(budget=1)
+    try:
+        for _ in range(3):  # would raise LLMBudgetExceeded from the second call if charged
+            with pytest.raises(LLMCircuitOpen):
+                llm.llm_match_resume_job("resume", "title", "jd")
+    finally:
+        run = llm_governor.finish_run()
+    assert run["budget_used"] == 0
+
+
+def _flaky_client(errors):
+    """Client whose converse raises the queued errors in order, then succeeds."""
+    calls = []
+
+    class _Client:
+        def converse(self, modelId, messages, inferenceConfig):
+            calls.append(modelId)
+            if errors:
+                raise errors.pop(0)
+            return {"output": {"message": {"content": [{"text": "ok"}]}}}
+
+    return _Client(), calls
+
+
+def test_call_bedrock_llm_retries_transient_errors_with_jittered_backoff(monkeypatch):
+    class ReadTimeoutError(Exception):
+        pass
+
+    client, calls = _flaky_client([ReadTimeoutError("slow"), ReadTimeoutError("slow")])
+    monkeypatch.setattr(llm, "_get_bedrock_client", lambda timeout: client)
+    monkeypatch.setattr(llm.settings, "bedrock_llm_model_id", "mistral.x")
+    monkeypatch.setattr(llm.settings, "llm_retry_base_seconds", 1.0)
+    sleeps = []
+    monkeypatch.setattr(llm.time, "sleep", sleeps.append)
+    monkeypatch.setattr(llm.random, "uniform", lambda lo, hi: hi)
+    assert llm._call_bedrock_llm("p") == "ok"
+    assert len(calls) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_call_bedrock_llm_does_not_retry_fatal_errors(monkeypatch):
+    class ValidationException(Exception):
+        pass
+
+    client, calls = _flaky_client([ValidationException("bad input")])
+    monkeypatch.setattr(llm, "_get_bedrock_client", lambda timeout: client)
+    monkeypatch.setattr(llm.settings, "bedrock_llm_model_id", "mistral.x")
+    monkeypatch.setattr(llm.time, "sleep", lambda s: pytest.fail("fatal errors must not be retried"))
+    with pytest.raises(ValidationException):
+        llm._call_bedrock_llm("p")
+    assert len(calls) == 1
+
+
+def test_circuit_opens_after_consecutive_failures_and_fast_fails(monkeypatch):
+    from app.services.llm_governor import LLMCircuitOpen, llm_circuit
+
+    class ServiceUnavailable(Exception):
+        response = {"Error": {"Code": "ServiceUnavailableException"}}
+
+    client, calls = _flaky_client([ServiceUnavailable() for _ in range(4)])
+    monkeypatch.setattr(llm, "_get_bedrock_client", lambda timeout: client)
+    monkeypatch.setattr(llm.settings, "bedrock_llm_model_id", "mistral.x")
+    monkeypatch.setattr(llm.settings, "llm_max_retries", 3)
+    monkeypatch.setattr(llm.time, "sleep", lambda s: None)
+    monkeypatch.setattr(llm_circuit, "failure_threshold", 2)
+    # Each failed attempt counts, so the breaker opens mid-call and stops the remaining retries.
+    with pytest.raises(LLMCircuitOpen):
+        llm._call_bedrock_llm("p")
+    assert llm_circuit.stats()["state"] == "open"
+    with pytest.raises(LLMCircuitOpen):
+        llm._call_bedrock_llm("p")
+    assert len(calls) == 2  # the open circuit did not reach Bedrock
+
+
+def test_bedrock_client_disables_botocore_retries(monkeypatch):
+    configs = []
+    monkeypatch.setattr(llm, "boto3", type("B", (), {"client": lambda *args, **kwargs: configs.append(kwargs["config"])}))
+    llm._get_bedrock_client(60)
+    assert configs[0].retries == {"total_max_attempts": 1}
+
+
+def test_parse_batch_scores_validates_each_item():
+    text = """```json
+    [{"job": 1, "match_score": 85, "match_reason": "good"},
+     {"job": 2, "match_score": "n/a", "match_reason": "bad score"},
+     {"job": 1, "match_score": 10, "match_reason": "duplicate"},
+     {"job": 4, "match_score": 0.5, "match_reason": "out of range"},
+     {"job": 3, "match_score": 0.3, "match_reason": ""},
+     "junk"]
+    ```"""
+    assert llm._parse_batch_scores(text, 3) == [(0.85, "good"), None, None]
+    assert llm._parse_batch_scores("not json", 2) == [None, None]
+    assert llm._parse_batch_scores('{"job": 1}', 1) == [None]
+
+
+def test_llm_match_resume_jobs_batch_sends_resume_once_and_charges_budget_once(monkeypatch):
+    from app.services.llm_governor import llm_governor
+
+    prompts = []
+
+    def fake_call(prompt, max_tokens=1200):
+        prompts.append((prompt, max_tokens))
+        return '[{"job": 2, "match_score": 0.6, "match_reason": "ok"}, {"job": 1, "match_score": 90, "match_reason": "great"}]'
+
+    monkeypatch.setattr(llm, "_call_bedrock_llm", fake_call)
+    llm_governor.start_run(budget=5)
+    try:
+        out = llm.llm_match_resume_jobs_batch("RESUME-TEXT", [("T1", "JD1"), ("T2", "JD2")])
+        assert llm_governor.finish_run()["budget_used"] == 1
+    finally:
+        llm_governor.finish_run()
+    assert out == [(0.9, "great"), (0.6, "ok")]
+    prompt, _ = prompts[0]
+    assert prompt.count("RESUME-TEXT") == 1
+    assert "JOB 1:" in prompt and "JOB 2:" in prompt and "final_score" in prompt
+    assert llm.llm_match_resume_jobs_batch("r", []) == []
@@ -0,0 +1,152 @@
+import threading
+
+import pytest
+
+from app.services.llm_governor import (
+    CircuitBreaker,
+    LLMBudgetExceeded,
+    LLMCircuitOpen,
+    LLMGovernor,
+    classify_error,
+    is_throttle_error,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _governor(rate=2.0, burst=2, concurrency=0):
+    clock = _Clock()
+    return LLMGovernor(rate, burst, concurrency, clock=clock, sleep=clock.sleep), clock
+
+
+def test_token_bucket_paces_calls_after_burst_and_records_waits():
+    gov, clock = _governor(rate=2.0, burst=2)
+    waits = []
+    for _ in range(4):
+        with gov.slot() as waited:
+            waits.append(waited)
+    assert waits == [0.0, 0.0, 0.5, 0.5]
+    stats = gov.stats()
+    assert (stats["calls"], stats["waits"], stats["wait_seconds"]) == (4, 2, 1.0)
+    assert stats["in_flight"] == 0
+
+
+def test_throttle_halves_rate_pauses_callers_and_recovers_on_success():
+    gov, clock = _governor(rate=4.0, burst=1)
+    gov.on_throttle()
+    assert gov.stats()["rate_per_second"] == 2.0
+    assert gov.stats()["backing_off"] is True
+    waited = gov.acquire()
+    gov.release()
+    assert waited >= 1.0  # waited out the 1s backoff before the next token
+    gov.on_throttle()
+    gov.on_throttle()
+    assert gov.stats()["rate_per_second"] == 0.5
+    assert gov.stats()["throttles"] == 3
+    for _ in range(5):
+        gov.on_success()
+    assert gov.stats()["rate_per_second"] == 2.5
+    for _ in range(20):
+        gov.on_success()
+    assert gov.stats()["rate_per_second"] == 4.0
+
+
+def test_run_budget_is_enforced_only_while_a_run_is_open():
+    gov, _ = _governor(rate=0)
+    gov.charge_run_budget()  # no run open: unlimited
+    gov.start_run(budget=2)
+    gov.charge_run_budget()
+    gov.charge_run_budget()
+    assert gov.budget_exhausted()
+    with pytest.raises(LLMBudgetExceeded):
+        gov.charge_run_budget()
+    with gov.slot():
+        pass
+    run = gov.finish_run()
+    assert (run["budget"], run["budget_used"], run["budget_denied"], run["calls"]) == (2, 2, 1, 1)
+    assert not gov.budget_exhausted()
+    gov.charge_run_budget()
+
+
+def test_concurrency_cap_blocks_extra_callers():
+    gov = LLMGovernor(0, 1, 1)
+    gov.acquire()
+    entered = threading.Event()
+
+    def second():
+        with gov.slot():
+            entered.set()
+
+    t = threading.Thread(target=second)
+    t.start()
+    assert not entered.wait(0.1)
+    gov.release()
+    assert entered.wait(2)
+    t.join()
+
+
+def test_is_throttle_error_classifies_client_error_codes():
+    class ClientError(Exception):
+        def __init__(self, code):
+            self.response = {"Error": {"Code": code}}
+
+    class ThrottlingException(Exception):
+        pass
+
+    assert is_throttle_error(ClientError("ThrottlingException"))
+    assert is_throttle_error(ThrottlingException())
+    assert not is_throttle_error(ClientError("ValidationException"))
+    assert not is_throttle_error(TimeoutError())
+
+
+def test_classify_error_separates_throttle_transient_and_fatal():
+    class ClientError(Exception):
+        def __init__(self, code, status=400):
+            self.response = {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}
+
+    class EndpointConnectionError(Exception):
+        pass
+
+    assert classify_error(ClientError("ThrottlingException", 429)) == "throttle"
+    assert classify_error(ClientError("ModelNotReadyException")) == "transient"
+    assert classify_error(ClientError("Unknown", 503)) == "transient"
+    assert classify_error(EndpointConnectionError()) == "transient"
+    assert classify_error(ClientError("AccessDeniedException", 403)) == "fatal"
+    assert classify_error(ValueError("bad")) == "fatal"
+
+
+def test_circuit_breaker_half_open_probe_closes_or_reopens():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(LLMCircuitOpen):
+        breaker.before_call()
+    clock.now = 10
+    breaker.before_call()  # the single half-open probe
+    with pytest.raises(LLMCircuitOpen):
+        breaker.before_call()
+    breaker.record_failure()  # probe failed: open again
+    assert breaker.stats()["state"] == "open"
+    clock.now = 20
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.stats() == {"state": "closed", "consecutive_failures": 0, "opens": 2, "rejected": 2}
+    breaker.before_call()
+
+    disabled = CircuitBreaker(failure_threshold=0, reset_seconds=10, clock=clock)
+    for _ in range(5):
+        disabled.record_failure()
+    disabled.before_call()
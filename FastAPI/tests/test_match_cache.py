@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+
+import app.repos.match_cache_repo as repo
+import app.services.match_cache as mc
+from sqlalchemy.dialects import postgresql
+
+
+def test_match_cache_key_covers_all_inputs():
+    base = mc.match_cache_key("resume", "title", "jd", model_id="m1")
+    assert base == mc.match_cache_key("resume", "title", "jd", model_id="m1")
+    assert base != mc.match_cache_key("resume2", "title", "jd", model_id="m1")
+    assert base != mc.match_cache_key("resume", "title2", "jd", model_id="m1")
+    assert base != mc.match_cache_key("resume", "title", "jd2", model_id="m1")
+    assert base != mc.match_cache_key("resume", "title", "jd", model_id="m2")
+    assert base != mc.match_cache_key("resume", "title", "jd", model_id="m1", prompt_version="v999")
+
+
+def test_match_result_cache_lru_eviction_and_stats():
+    cache = mc.MatchResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 0.1, "a")
+    cache.put("b", 0.2, "b")
+    assert cache.get("a") == (0.1, "a")  # refreshes "a"
+    cache.put("c", 0.3, "c")  # evicts least recently used "b"
+    assert cache.get("b") is None
+    assert "a" in cache and "c" in cache
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 2}
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_match_result_cache_ttl_expiry(monkeypatch):
+    cache = mc.MatchResultCache(max_entries=10, ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr(mc.time, "time", lambda: now[0])
+    cache.put("a", 0.5, "r")
+    cache.put("old", 0.5, "r", stored_at=900.0)
+    assert "old" not in cache
+    assert cache.get("old") is None
+    now[0] = 1059.0
+    assert cache.get("a") == (0.5, "r")
+    now[0] = 1061.0
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_match_result_cache_disabled_when_max_entries_zero():
+    cache = mc.MatchResultCache(max_entries=0, ttl_seconds=60)
+    cache.put("a", 0.5, "r")
+    assert cache.get("a") is None
+
+
+class _Query:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def delete(self, synchronize_session=False):
+        return len(self.rows)
+
+
+class _DB:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.executed = []
+        self.committed = 0
+
+    def query(self, *args):
+        return _Query(self.rows)
+
+    def execute(self, stmt):
+        self.executed.append(stmt)
+
+    def commit(self):
+        self.committed += 1
+
+
+def test_match_cache_repo_get_save_delete():
+    created = datetime.now(timezone.utc)
+    db = _DB(rows=[("k1", 0.8, "good", created)])
+    assert repo.get_many(db, [], 60) == {}
+    assert repo.get_many(db, ["k1", "k2"], 60) == {"k1": (0.8, "good", created)}
+
+    assert repo.save_many(db, {}, "m") == 0
+    assert repo.save_many(db, {"k1": (0.8, "good"), "k2": (0.4, None)}, "m") == 2
+    sql = str(db.executed[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (cache_key) DO UPDATE" in sql
+    assert db.committed == 1
+
+    assert repo.delete_expired(_DB(rows=[]), 60) == 0
+    db = _DB(rows=[object()])
+    assert repo.delete_expired(db, 60) == 1
+    assert db.committed == 1
@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.match_priority import ScoringQueue, pair_priority
+
+
+def test_pair_priority_weighs_available_signals():
+    now = datetime.now(timezone.utc)
+    assert pair_priority(1.0, 1.0, now, now, now) == 1.0
+    assert pair_priority(0.0, 0.0, now - timedelta(days=30), None, now) < 0.01
+    # Missing similarity / freshness drop out rather than counting as zero.
+    assert pair_priority(keyword=1.0, last_active_at=now, now=now) == 1.0
+    # A day-old job is worth half a fresh one on freshness alone.
+    fresh = pair_priority(0.5, None, now, None, now)
+    day_old = pair_priority(0.5, None, (now - timedelta(hours=24)).replace(tzinfo=None), None, now)
+    assert fresh > day_old
+    assert pair_priority(None, 1.5, None, None, now) == pair_priority(None, 1.0, None, None, now)
+
+
+def test_scoring_queue_pops_highest_priority_first_and_keeps_ties_in_order():
+    q = ScoringQueue()
+    for item, priority in [("a", 0.2), ("b", 0.9), ("c", 0.2), ("d", 0.5)]:
+        q.push(item, priority)
+    assert len(q) == 4
+    assert [q.pop() for _ in range(4)] == ["b", "d", "a", "c"]
+    assert not q
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.near_duplicate import NearDuplicateIndex, normalize_company, shingles, title_level
+
+_JD = (
+    "We are hiring a backend engineer to build payment APIs in Python and Go. You will design services, "
+    "own reliability for our ledger, mentor engineers and work with product on the roadmap. Requirements: "
+    "5+ years building distributed systems, PostgreSQL, Kubernetes, AWS. Benefits include health, dental and 401k."
+)
+
+
+def test_normalizers():
+    assert normalize_company("Acme, Inc.") == normalize_company("ACME  LLC") == "acme"
+    assert title_level("Sr. Software Engineer II") == {"senior", "2"}
+    assert title_level("Software Engineer") == frozenset()
+    assert "t:python" in shingles("Python Dev", "")
+    assert shingles("", "just two") == {"just", "two"}
+
+
+def test_collapses_cross_posted_job_with_small_differences():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.add("indeed", "Backend Engineer (Payments)", "Acme, Inc.", _JD) is None
+    reposted = "  " + _JD.replace("401k", "401(k)").upper() + "\n\n"
+    assert index.add("linkedin", "Backend Engineer - Payments", "ACME", reposted) == "indeed"
+    assert len(index) == 1
+
+
+def test_keeps_distinct_jobs_companies_and_levels():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.add("a", "Backend Engineer", "Acme", _JD) is None
+    assert index.add("b", "Backend Engineer", "Globex", _JD) is None  # other company
+    assert index.add("c", "Senior Backend Engineer", "Acme", _JD) is None  # other level, same template
+    other = "Data scientist to build forecasting models with pandas, SQL and experimentation for marketing teams."
+    assert index.add("d", "Backend Engineer", "Acme", other) is None
+    assert len(index) == 4
+
+
+def test_similarity_estimate_tracks_jaccard():
+    index = NearDuplicateIndex(num_perm=128, bands=32)
+    a = {f"w{i}" for i in range(100)}
+    b = {f"w{i}" for i in range(50, 150)}  # Jaccard 1/3
+    assert index.similarity(index.signature(a), index.signature(b)) == pytest.approx(1 / 3, abs=0.12)
+    assert index.similarity(index.signature(a), index.signature(set(a))) == 1.0
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=10, bands=3)
@@ -0,0 +1,197 @@
+import threading
+
+import pytest
+
+import app.services.job_collector as jc
+import app.services.pipeline_engine as pe
+
+
+class _Category:
+    def __init__(self, cat_id, slug):
+        self.id = cat_id
+        self.slug = slug
+
+
+@pytest.fixture(autouse=True)
+def _collector_stubs(monkeypatch):
+    monkeypatch.setattr(jc, "get_watermarks", lambda db, ids: [])
+    monkeypatch.setattr(jc, "save_watermarks", lambda db, entries: len(entries))
+
+
+def _row(cid, n):
+    return {"title": f"T{n}", "company": "X", "job_url": f"u{n}", "job_hash": f"h{n}", "search_category_id": cid}
+
+
+def test_staged_pipeline_matches_a_category_while_others_still_scrape(monkeypatch):
+    cats = [_Category("fast", "a"), _Category("slow", "b")]
+    monkeypatch.setattr(pe, "select_categories", lambda db: cats)
+    monkeypatch.setattr(pe, "get_all_categories", lambda db: cats + [_Category("idle", "c")])
+    fast_matched = threading.Event()
+    events = []
+
+    def fake_fetch(slug, cid):
+        if cid == "slow":
+            # Only returns once the fast category has been deep-matched: proves the overlap.
+            assert fast_matched.wait(5)
+            events.append("scraped slow")
+            return [_row(cid, 2), _row(cid, 1) | {"job_hash": "dup"}]
+        events.append("scraped fast")
+        return [_row(cid, 1)]
+
+    monkeypatch.setattr(jc, "_fetch_for_category", fake_fetch)
+    upserts = []
+    monkeypatch.setattr(pe, "batch_upsert", lambda db, rows, cid: upserts.append((cid, len(rows))) or len(rows))
+
+    def fake_match(db, cid):
+        events.append(f"matched {cid}")
+        if cid == "fast":
+            fast_matched.set()
+        return {"users": 1, "jobs": 2, "scored": 1, "pairs": 2, "llm_scored_pairs": 1, "cache_hits": 1}
+
+    monkeypatch.setattr(pe, "run_deep_match_for_category", fake_match)
+    reported = []
+    out = pe.run_staged_pipeline(db=object(), on_category_done=lambda cid, metrics: reported.append(metrics))
+
+    assert events == ["scraped fast", "matched fast", "scraped slow", "matched slow", "matched idle"]
+    assert upserts == [("fast", 1), ("slow", 1)]  # cross-category exact dedup still applies
+    assert out["collector"]["total_fetched"] == 3
+    assert out["collector"]["inserted"] == 2
+    assert out["deep_match"] == {"users": 3, "jobs": 6, "pairs": 6, "scored": 3, "llm_scored_pairs": 3, "cache_hits": 3}
+    assert reported == out["categories"]
+    by_cat = {m["search_category_id"]: m for m in reported}
+    assert (by_cat["slow"]["fetched"], by_cat["slow"]["deduped"], by_cat["slow"]["inserted"]) == (2, 1, 1)
+    assert by_cat["fast"]["scrape_seconds"] >= 0 and by_cat["fast"]["store_seconds"] >= 0
+    assert by_cat["idle"]["scrape_seconds"] is None and by_cat["idle"]["match_seconds"] >= 0
+    stages = out["stages"]["stages"]
+    assert {s: stages[s]["completed"] for s in pe.STAGES} == {"scrape": 2, "store": 2, "match": 3}
+    assert all(stages[s]["queue_depth"] == 0 and stages[s]["in_flight"] == 0 for s in pe.STAGES)
+    assert pe.pipeline_stats.snapshot()["current_run"] is None
+
+
+def test_staged_pipeline_survives_scrape_failure_and_no_categories(monkeypatch):
+    monkeypatch.setattr(pe, "get_all_categories", lambda db: [])
+    monkeypatch.setattr(pe, "select_categories", lambda db: [])
+    out = pe.run_staged_pipeline(db=object())
+    assert out["collector"]["categories"] == 0
+    assert out["deep_match"] == {"users": 0, "jobs": 0, "pairs": 0, "scored": 0, "llm_scored_pairs": 0, "cache_hits": 0}
+
+    cats = [_Category("c1", "a")]
+    monkeypatch.setattr(pe, "select_categories", lambda db: cats)
+    monkeypatch.setattr(jc, "_fetch_for_category", lambda slug, cid: (_ for _ in ()).throw(RuntimeError("boom")))
+    monkeypatch.setattr(pe, "batch_upsert", lambda db, rows, cid: (_ for _ in ()).throw(AssertionError("no rows")))
+    monkeypatch.setattr(pe, "run_deep_match_for_category", lambda db, cid: {"users": 1, "jobs": 0, "scored": 0})
+    out = pe.run_staged_pipeline(db=object())
+    assert out["collector"]["total_fetched"] == 0
+    assert out["deep_match"]["users"] == 1
+
+
+def test_staged_pipeline_writes_near_duplicates_of_earlier_categories_through(monkeypatch):
+    cats = [_Category("c1", "a"), _Category("c2", "b")]
+    monkeypatch.setattr(pe, "select_categories", lambda db: cats)
+    monkeypatch.setattr(pe, "get_all_categories", lambda db: cats)
+    monkeypatch.setattr(jc.settings, "near_duplicate_enabled", True)
+    jd = "Build data pipelines in Python and Spark for our analytics platform; own SLAs and mentor engineers. " * 3
+    c1_stored = threading.Event()
+
+    def fake_fetch(slug, cid):
+        if cid == "c1":
+            return [{"title": "Data Engineer", "company": "Acme Inc", "job_url": "u-indeed", "description": jd,
+                     "search_category_id": cid, "site": "indeed", "job_hash": "h1"}]
+        assert c1_stored.wait(5)
+        return [{"title": "Data Engineer (Remote)", "company": "ACME", "job_url": "u-linkedin",
+                 "description": jd + " Remote.", "search_category_id": cid, "site": "linkedin", "job_hash": "h2"}]
+
+    monkeypatch.setattr(jc, "_fetch_for_category", fake_fetch)
+    events = []
+
+    def fake_upsert(db, rows, cid):
+        events.append(("upsert", cid, len(rows)))
+        c1_stored.set()
+        return len(rows)
+
+    monkeypatch.setattr(pe, "batch_upsert", fake_upsert)
+    monkeypatch.setattr(jc, "add_alternate_urls", lambda db, urls: events.append(("alternates", urls)) or len(urls))
+    monkeypatch.setattr(pe, "run_deep_match_for_category", lambda db, cid: {"users": 0, "jobs": 0, "scored": 0})
+    out = pe.run_staged_pipeline(db=object())
+
+    assert events == [
+        ("upsert", "c1", 1),
+        ("alternates", {"h1": [{"url": "u-linkedin", "site": "linkedin"}]}),
+    ]
+    assert out["collector"]["near_duplicates"] == 1
+
+
+def test_match_stage_records_the_same_per_category_metrics_as_the_staged_path(monkeypatch):
+    cats = [_Category("c1", "a"), _Category("c2", "b"), _Category("c3", "c")]
+    monkeypatch.setattr(pe, "get_all_categories", lambda db: cats)
+    monkeypatch.setattr(
+        pe,
+        "run_deep_match_for_category",
+        lambda db, cid: {"users": 1, "jobs": 2, "scored": 1, "pairs": 2, "llm_scored_pairs": 1, "cache_hits": 1},
+    )
+    reported = []
+    totals = pe.run_match_stage(
+        db=object(),
+        collector_counts={"c2": {"fetched": 5, "deduped": 4, "inserted": 3}},
+        skip_category_ids={"c1"},
+        on_category_done=lambda cid, metrics: reported.append(metrics),
+    )
+    assert totals == {"users": 2, "jobs": 4, "pairs": 4, "scored": 2, "llm_scored_pairs": 2, "cache_hits": 2}
+    assert [m["search_category_id"] for m in reported] == ["c2", "c3"]
+    assert set(reported[0]) == set(pe._category_metrics("x"))
+    assert (reported[0]["fetched"], reported[0]["deduped"], reported[0]["inserted"]) == (5, 4, 3)
+    assert reported[1]["fetched"] == 0 and reported[1]["scrape_seconds"] is None
+    assert reported[0]["pairs"] == 2 and reported[0]["match_seconds"] >= 0
+
+
+def test_staged_pipeline_scrape_workers_never_read_orm_rows(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    main = threading.current_thread()
+
+    class _CallerOnly:
+        """Stands in for an ORM row that a caller-side commit expired."""
+
+        def __init__(self, **values):
+            self.__dict__.update(values)
+
+        def __getattribute__(self, name):
+            if threading.current_thread() is not main and not name.startswith("__"):
+                raise AssertionError(f"scrape worker read {name}")
+            return super().__getattribute__(name)
+
+    cats = [_CallerOnly(id="c1", slug="a"), _CallerOnly(id="c2", slug="b")]
+    watermark = _CallerOnly(
+        search_category_id="c1", site="indeed", last_posted_at=None, recent_job_hashes=[],
+        last_scraped_at=datetime.now(timezone.utc) - timedelta(minutes=30),
+    )
+    monkeypatch.setattr(pe, "select_categories", lambda db: cats)
+    monkeypatch.setattr(pe, "get_all_categories", lambda db: cats)
+    monkeypatch.setattr(jc, "get_watermarks", lambda db, ids: [watermark])
+    monkeypatch.setattr(jc.settings, "collector_incremental_enabled", True)
+    fetched = {}
+    monkeypatch.setattr(
+        jc, "_fetch_for_category",
+        lambda slug, cid, site_hours_old=None: fetched.setdefault(cid, (slug, site_hours_old)) and [_row(cid, cid)],
+    )
+    monkeypatch.setattr(pe, "batch_upsert", lambda db, rows, cid: len(rows))
+    monkeypatch.setattr(pe, "run_deep_match_for_category", lambda db, cid: {"users": 0, "jobs": 0, "scored": 0})
+    out = pe.run_staged_pipeline(db=object())
+    assert fetched["c1"][0] == "a" and fetched["c1"][1]["indeed"] >= 1
+    assert fetched["c2"] == ("b", None)
+    assert out["collector"]["inserted"] == 2
+
+
+def test_pipeline_stats_reports_live_queue_depths():
+    stats = pe.PipelineStats()
+    stats.enqueue("scrape")  # ignored outside a run
+    stats.start_run()
+    stats.enqueue("scrape", 3)
+    stats.begin("scrape")
+    live = stats.snapshot()["current_run"]["stages"]["scrape"]
+    assert live["queue_depth"] == 2 and live["in_flight"] == 1
+    stats.end("scrape", 0.5)
+    stats.finish_run()
+    snap = stats.snapshot()
+    assert snap["current_run"] is None
+    assert snap["last_run"]["stages"]["scrape"]["seconds"] == 0.5
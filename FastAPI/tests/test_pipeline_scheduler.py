@@ -1,34 +1,198 @@
 from datetime import datetime, timezone
 
+import pytest
+
 import app.services.pipeline_scheduler as sched
 
 
 class _DB:
     def __init__(self):
         self.closed = False
+        self.rolled_back = False
 
     def close(self):
         self.closed = True
 
+    def rollback(self):
+        self.rolled_back = True
 
-def test_run_pipeline_once_calls_components(monkeypatch):
-    db = _DB()
+
+class _Run:
+    def __init__(self, run_id="r1", cursor=None, attempts=1):
+        self.id = run_id
+        self.cursor = cursor or {}
+        self.attempts = attempts
+        self.started_at = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def durable(monkeypatch):
+    """Stub the lease/run-history repo; returns a dict recording what the scheduler did."""
+    state = {
+        "lease": True, "resumable": None, "latest": None, "finished": [], "cursors": [], "metrics": [], "released": 0,
+    }
     monkeypatch.setattr(sched, "init_db", lambda: None)
-    monkeypatch.setattr(sched, "SessionLocal", lambda: db)
     monkeypatch.setattr(sched, "seed_default_categories", lambda db: ([], 0))
-    monkeypatch.setattr(sched, "run_collector", lambda db: {"fetched": 1})
-    monkeypatch.setattr(sched, "run_deep_match_all", lambda db: {"scored": 2})
+    monkeypatch.setattr(sched, "acquire_lease", lambda db, name, owner, ttl: state["lease"])
+    monkeypatch.setattr(sched, "release_lease", lambda db, name, owner: state.__setitem__("released", state["released"] + 1))
+    monkeypatch.setattr(sched, "get_resumable_run", lambda db: state["resumable"])
+    monkeypatch.setattr(sched, "get_latest_run", lambda db, finished_only=False: state["latest"])
+    monkeypatch.setattr(sched, "create_run", lambda db, owner: _Run())
+    monkeypatch.setattr(sched, "resume_run", lambda db, run, owner: setattr(run, "attempts", run.attempts + 1) or run)
+    monkeypatch.setattr(
+        sched,
+        "record_category_done",
+        lambda db, run, cursor, metrics=None: state["cursors"].append(dict(cursor)) or state["metrics"].append(metrics),
+    )
+    monkeypatch.setattr(
+        sched, "finish_run", lambda db, run, status, result=None, error=None: state["finished"].append((status, error))
+    )
     monkeypatch.setattr(sched, "delete_unmatched_job_listings", lambda db: 3)
+    monkeypatch.setattr(sched, "delete_stale_job_vectors", lambda db, days: 4)
+    monkeypatch.setattr(sched, "delete_expired_match_cache", lambda db, ttl: 5)
+    return state
+
+
+def test_run_pipeline_once_calls_components(monkeypatch, durable):
+    db = _DB()
+    monkeypatch.setattr(sched, "SessionLocal", lambda: db)
+    monkeypatch.setattr(sched.settings, "pipeline_staged_enabled", False)
+    monkeypatch.setattr(
+        sched, "run_collector", lambda db: {"fetched": 1, "by_category": {"c1": {"fetched": 1, "inserted": 1}}}
+    )
+
+    def fake_match_stage(db, collector_counts, skip_category_ids, on_category_done):
+        on_category_done("c1", {"search_category_id": "c1", **collector_counts["c1"], "pairs": 2, "cache_hits": 1})
+        return {"scored": 2}
+
+    monkeypatch.setattr(sched, "run_match_stage", fake_match_stage)
 
     out = sched._run_pipeline_once()
     assert out["collector"]["fetched"] == 1
     assert out["deep_match"]["scored"] == 2
+    assert durable["metrics"] == [
+        None,  # cursor saved after collection
+        {"search_category_id": "c1", "fetched": 1, "inserted": 1, "pairs": 2, "cache_hits": 1},
+    ]
     assert out["cleanup_unmatched"] == 3
+    assert out["pruned_job_vectors"] == 4
+    assert out["pruned_match_cache"] == 5
+    assert out["run_id"] == "r1" and out["resumed"] is False
+    assert durable["finished"] == [("succeeded", None)]
+    assert durable["released"] == 1
     assert db.closed is True
 
 
+def test_run_pipeline_once_uses_staged_engine_when_enabled(monkeypatch, durable):
+    monkeypatch.setattr(sched, "SessionLocal", _DB)
+    monkeypatch.setattr(sched.settings, "pipeline_staged_enabled", True)
+    monkeypatch.setattr(sched, "run_collector", lambda db: (_ for _ in ()).throw(AssertionError("sequential path")))
+    monkeypatch.setattr(
+        sched,
+        "run_staged_pipeline",
+        lambda db, skip_category_ids, on_category_done: {"collector": {"inserted": 7}, "deep_match": {"scored": 8}, "stages": {}},
+    )
+    out = sched._run_pipeline_once()
+    assert out["collector"] == {"inserted": 7}
+    assert out["deep_match"] == {"scored": 8}
+
+
+def test_run_pipeline_once_skips_without_lease_or_when_not_due(monkeypatch, durable):
+    monkeypatch.setattr(sched, "SessionLocal", _DB)
+    monkeypatch.setattr(sched, "create_run", lambda db, owner: (_ for _ in ()).throw(AssertionError("must not run")))
+    durable["lease"] = False
+    assert sched._run_pipeline_once() == {"skipped": "lease_held"}
+    assert durable["released"] == 0
+
+    durable["lease"] = True
+    durable["latest"] = _Run()  # started just now; next run is an interval away
+    out = sched._run_pipeline_once()
+    assert out["skipped"] == "not_due"
+    assert durable["released"] == 1
+
+
+def test_run_pipeline_now_ignores_interval_but_not_the_lease(monkeypatch, durable):
+    monkeypatch.setattr(sched, "SessionLocal", _DB)
+    monkeypatch.setattr(sched.settings, "pipeline_staged_enabled", True)
+    monkeypatch.setattr(
+        sched,
+        "run_staged_pipeline",
+        lambda db, skip_category_ids, on_category_done: {"collector": {}, "deep_match": {}, "stages": {}},
+    )
+    durable["latest"] = _Run()  # a scheduled cycle would be not_due
+    durable["lease"] = False
+    assert sched.run_pipeline_now() == {"skipped": "lease_held"}
+
+    durable["lease"] = True
+    out = sched.run_pipeline_now()
+    assert out["run_id"] == "r1"
+    assert durable["finished"] == [("succeeded", None)]
+    assert durable["released"] == 1
+
+
+def test_run_pipeline_once_resumes_crashed_run_from_cursor(monkeypatch, durable):
+    monkeypatch.setattr(sched, "SessionLocal", _DB)
+    monkeypatch.setattr(sched.settings, "pipeline_staged_enabled", True)
+    durable["resumable"] = _Run("crashed", cursor={"done_categories": ["c1"]})
+    seen = {}
+
+    def fake_staged(db, skip_category_ids, on_category_done):
+        seen["skip"] = skip_category_ids
+        on_category_done("c2", {"search_category_id": "c2", "scored": 4})
+        return {"collector": {}, "deep_match": {}, "stages": {}}
+
+    monkeypatch.setattr(sched, "run_staged_pipeline", fake_staged)
+    out = sched._run_pipeline_once()
+    assert seen["skip"] == {"c1"}
+    assert durable["cursors"] == [{"done_categories": ["c1", "c2"]}]
+    assert durable["metrics"] == [{"search_category_id": "c2", "scored": 4}]
+    assert out["run_id"] == "crashed" and out["resumed"] is True
+    assert durable["resumable"].attempts == 2
+
+
+def test_run_pipeline_once_resumes_sequential_run_without_recollecting(monkeypatch, durable):
+    monkeypatch.setattr(sched, "SessionLocal", _DB)
+    monkeypatch.setattr(sched.settings, "pipeline_staged_enabled", False)
+    monkeypatch.setattr(sched, "run_collector", lambda db: {"inserted": 7})
+    seen = {}
+
+    def fake_match_stage(db, collector_counts, skip_category_ids, on_category_done):
+        seen["skip"] = skip_category_ids
+        on_category_done("c1", {"search_category_id": "c1"})
+        raise RuntimeError("crash")
+
+    monkeypatch.setattr(sched, "run_match_stage", fake_match_stage)
+    with pytest.raises(RuntimeError):
+        sched._run_pipeline_once()
+    assert seen["skip"] == set()
+    assert durable["cursors"] == [
+        {"collector": {"inserted": 7}},
+        {"collector": {"inserted": 7}, "done_categories": ["c1"]},
+    ]
+
+    durable["resumable"] = _Run("crashed", cursor=durable["cursors"][-1])
+    monkeypatch.setattr(sched, "run_collector", lambda db: (_ for _ in ()).throw(AssertionError("already collected")))
+    monkeypatch.setattr(sched, "run_match_stage", lambda db, counts, skip_category_ids, on_category_done: {"scored": 1})
+    out = sched._run_pipeline_once()
+    assert out["collector"] == {"inserted": 7}
+    assert out["resumed"] is True
+
+
+def test_run_pipeline_once_records_failure_and_releases_lease(monkeypatch, durable):
+    db = _DB()
+    monkeypatch.setattr(sched, "SessionLocal", lambda: db)
+    monkeypatch.setattr(sched.settings, "pipeline_staged_enabled", False)
+    monkeypatch.setattr(sched, "run_collector", lambda db: (_ for _ in ()).throw(RuntimeError("boom")))
+    with pytest.raises(RuntimeError):
+        sched._run_pipeline_once()
+    assert durable["finished"] == [("failed", "boom")]
+    assert durable["released"] == 1
+    assert db.rolled_back is True
+
+
 def test_start_stop_status_and_double_start(monkeypatch):
     monkeypatch.setattr(sched, "_scheduler_loop", lambda: None)
+    monkeypatch.setattr(sched, "_durable_status", lambda: {"lease_owner": "other", "next_run": "x"})
     sched._running = False
     sched._thread = None
     sched._last_run = datetime.now(timezone.utc)
@@ -43,6 +207,10 @@ def test_start_stop_status_and_double_start(monkeypatch):
     assert ok2 is False and "already" in msg2
     assert ok3 is True and "stop requested" in msg3
     assert status["running"] is False
+    assert "client_constructions" in status["bedrock_clients"]
+    assert set(status["pipeline_stages"]) == {"current_run", "last_run"}
+    assert status["lease_owner"] == "other"
+    assert status["next_run"] is None  # not running here: no next run reported
 
 
 def test_start_scheduler_seconds_human_message(monkeypatch):
@@ -62,7 +230,7 @@ def test_stop_scheduler_when_not_running():
     assert "not running" in msg
 
 
-def test_scheduler_loop_runs_once_and_stops(monkeypatch):
+def test_scheduler_loop_polls_until_stopped_and_creates_schema_once(monkeypatch):
     calls = {"n": 0}
 
     def fake_run_once():
@@ -70,10 +238,43 @@ def test_scheduler_loop_runs_once_and_stops(monkeypatch):
         return {}
 
     def fake_sleep(_seconds):
-        sched._running = False
+        if calls["n"] >= 2:
+            sched._running = False
 
     sched._running = True
+    monkeypatch.setattr(sched, "init_db", lambda: calls.update(init=calls.get("init", 0) + 1))
     monkeypatch.setattr(sched, "_run_pipeline_once", fake_run_once)
     monkeypatch.setattr(sched.time, "sleep", fake_sleep)
     sched._scheduler_loop()
-    assert calls["n"] == 1
+    assert calls == {"n": 2, "init": 1}
+
+
+def test_durable_status_reads_last_run_and_live_lease(monkeypatch):
+    from datetime import timedelta
+
+    now = datetime.now(timezone.utc)
+    run = _Run()
+    run.status = "succeeded"
+    lease = type("L", (), {"owner": "host:1:abc", "expires_at": now + timedelta(minutes=5)})()
+    db = _DB()
+    monkeypatch.setattr(sched, "SessionLocal", lambda: db)
+    monkeypatch.setattr(sched, "get_latest_run", lambda db, finished_only=False: run)
+    monkeypatch.setattr(sched, "get_lease", lambda db, name: lease)
+    out = sched._durable_status()
+    assert out["last_run_status"] == "succeeded"
+    assert out["lease_owner"] == "host:1:abc"
+    assert out["next_run"] > out["last_run"]
+    assert db.closed is True
+
+    monkeypatch.setattr(sched, "get_lease", lambda db, name: (_ for _ in ()).throw(RuntimeError("db down")))
+    assert sched._durable_status() == {}
+
+
+def test_lease_heartbeat_renews_until_exit(monkeypatch):
+    import threading
+
+    renewed = threading.Event()
+    monkeypatch.setattr(sched, "SessionLocal", _DB)
+    monkeypatch.setattr(sched, "acquire_lease", lambda db, name, owner, ttl: renewed.set() or False)
+    with sched._LeaseHeartbeat(ttl_seconds=3):  # renews every second
+        assert renewed.wait(5)
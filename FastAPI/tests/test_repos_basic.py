@@ -45,6 +45,9 @@ class _Query:
     def join(self, *args, **kwargs):
         return self
 
+    def group_by(self, *args, **kwargs):
+        return self
+
     def distinct(self):
         return self
 
@@ -63,7 +66,7 @@ class _DB:
         self.executed = []
         self.committed = 0
 
-    def query(self, model):
+    def query(self, *models):
         return _Query(self.data)
 
     def add(self, obj):
@@ -74,7 +77,7 @@ class _DB:
 
     def execute(self, *args, **kwargs):
         self.executed.append((args, kwargs))
-        return type("R", (), {"rowcount": 1})()
+        return type("R", (), {"rowcount": 1, "fetchall": lambda self: [("j1",)]})()
 
     def commit(self):
         self.committed += 1
@@ -130,6 +133,13 @@ def test_user_job_match_repo_core_paths(monkeypatch):
     created = mrepo.create(db, "u1", "j1", 88.0, "great", 4.2)
     assert created.id == "m1"
     assert mrepo.get_existing_match(db, "u1", "j1") is not None
+    assert mrepo.get_matched_job_ids(db, ["u1"], []) == {}
+    assert mrepo.bulk_create(db, []) == 0
+    db_pairs = _DB(data=[("u1", "j1"), ("u1", "j2"), ("u2", "j1")])
+    assert mrepo.get_matched_job_ids(db_pairs, ["u1", "u2"], ["j1", "j2"]) == {"u1": {"j1", "j2"}, "u2": {"j1"}}
+    acted = datetime.now(timezone.utc)
+    assert mrepo.get_last_activity(db, []) == {}
+    assert mrepo.get_last_activity(_DB(data=[("u1", acted), ("u2", None)]), ["u1", "u2"]) == {"u1": acted}
     assert mrepo.get_matches_for_user(db, "u1", status="pending", limit=10)
     assert mrepo.get_match_for_user(db, "m1", "u1") is not None
     assert mrepo.delete_match(db, "m1", "u1") is True
@@ -185,6 +195,39 @@ def test_job_listing_repo_get_jobs_by_category_since():
     assert isinstance(out, list)
 
 
+def test_job_listing_repo_get_jobs_by_category_since_gates_on_required_years():
+    from sqlalchemy.dialects import postgresql
+
+    class _GateQuery(_Query):
+        def filter(self, *args, **kwargs):
+            self.clauses.extend(args)
+            return self
+
+    query = _GateQuery([])
+    query.clauses = []
+    db = _DB()
+    db.query = lambda *models: query
+    jrepo.get_jobs_by_category_since(db, "c1", since_hours=2, experience_years=2.5, margin_years=1.0)
+    sql = " ".join(str(c.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})) for c in query.clauses)
+    assert "job_listings.required_years IS NULL OR job_listings.required_years <= 3.5" in sql
+
+    query.clauses = []
+    jrepo.get_jobs_by_category_since(db, "c1", since_hours=2)
+    assert len(query.clauses) == 2  # category + freshness only
+
+
+def test_job_listing_list_queries_truncate_descriptions_server_side():
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.orm import Session
+
+    q = Session().query(jrepo.JobListing).options(*jrepo.description_preview_options(500))
+    sql = str(q.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    columns = sql.split(" FROM ")[0]
+    assert "substr(coalesce(job_listings.description, '')" in columns
+    assert ", job_listings.description," not in columns and "job_listings.extra_data" not in columns
+    assert "job_listings.title" in columns
+
+
 def test_user_repo_additional_list_and_delete(monkeypatch):
     user = type("U", (), {"id": "u1", "created_at": None})()
     db = _DB(data=[user])
@@ -204,3 +247,120 @@ def test_search_category_repo_getters(monkeypatch):
     assert crepo.get_by_slug(db, "software_engineer") is not None
     assert crepo.get_by_id(db, "c1") is not None
     assert isinstance(crepo.get_categories_with_active_users(db), list)
+
+
+def test_job_listing_repo_batch_upsert_is_chunked_multi_row_insert(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+
+    class _Result:
+        def __init__(self, n):
+            self.n = n
+
+        def fetchall(self):
+            # Pretend one row per statement already existed (conflict -> not returned).
+            return [("id",)] * (self.n - 1)
+
+    class _BulkDB(_DB):
+        def execute(self, stmt, *args, **kwargs):
+            self.executed.append(stmt)
+            params = stmt.compile(dialect=postgresql.dialect()).params
+            return _Result(len([k for k in params if k.startswith("job_hash")]))
+
+    monkeypatch.setattr(jrepo, "BATCH_UPSERT_CHUNK_SIZE", 2)
+    ids = iter(range(100))
+    monkeypatch.setattr(jrepo, "generate_id", lambda: f"id-{next(ids)}")
+    rows = [{"title": f"T{i}", "company": "C", "job_url": f"u{i}", "extra_data": {"site": "indeed"}} for i in range(5)]
+    rows.append(dict(rows[0]))  # duplicate hash inside the batch is sent once
+    db = _BulkDB()
+    inserted = jrepo.batch_upsert(db, rows, "c1")
+    assert len(db.executed) == 3  # 5 unique rows / chunk size 2
+    assert inserted == 2  # (2-1) + (2-1) + (1-1)
+    assert db.committed == 1
+    sql = str(db.executed[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (job_hash) DO NOTHING" in sql
+    assert "RETURNING job_listings.id" in sql
+
+
+def test_job_listing_repo_add_alternate_urls_merges_into_stored_extra_data():
+    listing = type("L", (), {"job_hash": "h1", "extra_data": {"features": {"version": 1}, "alternate_urls": [{"url": "u2"}]}})()
+    db = _DB(data=[listing])
+    assert jrepo.add_alternate_urls(db, {}) == 0
+    assert jrepo.add_alternate_urls(db, {"h1": [{"url": "u2", "site": "x"}, {"url": "u3", "site": "linkedin"}]}) == 1
+    assert listing.extra_data == {"features": {"version": 1}, "alternate_urls": [{"url": "u2"}, {"url": "u3", "site": "linkedin"}]}
+    assert db.committed == 1
+
+
+def test_user_job_match_repo_bulk_create_is_idempotent_insert(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+
+    db = _DB()
+    monkeypatch.setattr(mrepo, "generate_id", lambda: "m1")
+    rows = [{"user_id": "u1", "job_listing_id": "j1", "match_score": 90.0, "match_reason": "ok"}]
+    assert mrepo.bulk_create(db, rows) == 1
+    assert db.committed == 1
+    (stmt,), _ = db.executed[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, job_listing_id) DO NOTHING" in sql
+    assert "RETURNING user_job_matches.id" in sql
+
+
+def test_collector_watermark_repo_reads_and_upserts():
+    from sqlalchemy.dialects import postgresql
+
+    import app.repos.collector_watermark_repo as wrepo
+
+    assert wrepo.get_for_categories(_DB(), []) == []
+    assert wrepo.get_for_categories(_DB(data=["wm"]), ["c1", "c1"]) == ["wm"]
+    db = _DB()
+    assert wrepo.save_many(db, []) == 0
+    assert wrepo.save_many(db, [{"search_category_id": "c1", "site": "indeed", "recent_job_hashes": ("h1",)}]) == 1
+    assert db.committed == 1
+    (stmt,), _ = db.executed[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (search_category_id, site) DO UPDATE" in sql
+
+
+def test_pipeline_run_repo_lease_and_run_lifecycle(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+
+    import app.repos.pipeline_run_repo as prepo
+
+    class _LeaseDB(_DB):
+        def __init__(self, granted):
+            super().__init__()
+            self.granted = granted
+
+        def execute(self, stmt, *args, **kwargs):
+            self.executed.append(stmt)
+            return type("R", (), {"first": lambda _self: ("me",) if self.granted else None})()
+
+    db = _LeaseDB(granted=True)
+    assert prepo.acquire_lease(db, "job_pipeline", "me", 60) is True
+    sql = str(db.executed[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (name) DO UPDATE" in sql
+    assert "WHERE pipeline_leases.expires_at < now() OR pipeline_leases.owner =" in sql
+    assert prepo.acquire_lease(_LeaseDB(granted=False), "job_pipeline", "me", 60) is False
+    prepo.release_lease(db, "job_pipeline", "me")
+    assert "UPDATE pipeline_leases" in str(db.executed[-1].compile(dialect=postgresql.dialect()))
+
+    monkeypatch.setattr(prepo, "generate_id", lambda: "run1")
+    run = prepo.create_run(_DB(), "me")
+    assert (run.id, run.status, run.attempts) == ("run1", "running", 1)
+    prepo.resume_run(_DB(), run, "other")
+    assert (run.owner, run.attempts) == ("other", 2)
+    metrics_db = _DB()
+    prepo.record_category_done(metrics_db, run, {"done_categories": ["c1"]}, {"search_category_id": "c1", "fetched": 3})
+    assert metrics_db.added[0].run_id == "run1" and metrics_db.added[0].fetched == 3
+    from datetime import timedelta
+    run.started_at = datetime.now(timezone.utc) - timedelta(seconds=5)
+    prepo.finish_run(_DB(), run, "failed", error="x" * 3000)
+    assert run.duration_seconds >= 5
+    assert run.cursor == {"done_categories": ["c1"]}
+    assert run.status == "failed" and len(run.error) == 2000 and run.finished_at is not None
+    listed = _DB(data=[run])
+    assert prepo.get_resumable_run(listed) is run
+    assert prepo.get_latest_run(listed, finished_only=True) is run
+    assert prepo.get_lease(listed, "job_pipeline") is run
+    assert prepo.get_runs_paginated(listed, limit=5, offset=0) == ([run], 1)
+    assert prepo.get_run(listed, "run1") is run
+    assert prepo.get_run_categories(listed, "run1") == [run]
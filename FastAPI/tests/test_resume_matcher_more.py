@@ -1,3 +1,4 @@
+import app.services.llm_client as llm
 import app.services.resume_matcher as rm
 
 
@@ -30,3 +31,116 @@ def test_fallback_keyword_score_handles_empty_and_overlap():
 def test_extract_required_years_range_pattern():
     jd = "Looking for 3-5 years of experience and minimum of 2 years in cloud."
     assert rm._extract_required_years_from_jd(jd) == 3.0 or rm._extract_required_years_from_jd(jd) == 5.0
+
+
+def test_llm_match_reuses_cached_llm_answer(monkeypatch):
+    monkeypatch.setattr(rm, "is_llm_enabled", lambda: True)
+    calls = []
+    monkeypatch.setattr(rm, "llm_match_resume_job", lambda text, title, jd: calls.append(title) or (0.81, "fit"))
+    first = rm.llm_match({"experience": []}, "Backend", "Python services")
+    second = rm.llm_match({"experience": []}, "Backend", "Python services")
+    other = rm.llm_match({"experience": []}, "Backend", "Go services")
+    assert calls == ["Backend", "Backend"]
+    assert first["cache_key"] and "cache_hit" not in first
+    assert second["cache_hit"] is True and second["match_score"] == 0.81
+    assert other["cache_key"] != first["cache_key"]
+
+
+def test_llm_match_does_not_cache_an_unparsed_llm_answer(monkeypatch):
+    monkeypatch.setattr(rm, "is_llm_enabled", lambda: True)
+    monkeypatch.setattr(llm, "_call_scoring_llm", lambda prompt: "Sorry, I cannot help with that.")
+    result = rm.llm_match({"experience": []}, "Backend", "Python services")
+    assert "cache_key" not in result and "llm_score" not in result
+    assert result["match_reason"].startswith("Fallback")
+    key = rm.match_cache_key(rm._resume_to_full_text({"experience": []}), "Backend", "Python services")
+    assert rm.match_cache.get(key) is None
+
+
+def test_llm_match_batch_sends_one_prompt_and_scores_invalid_items_singly(monkeypatch):
+    monkeypatch.setattr(rm, "is_llm_enabled", lambda: True)
+    resume = {"experience": [{"title": "Dev", "company": "ACME", "start": "2023", "end": "2024", "bullets": ["python"]}]}
+    batches, singles = [], []
+    monkeypatch.setattr(
+        rm,
+        "llm_match_resume_jobs_batch",
+        lambda text, jobs: batches.append([t for t, _ in jobs]) or [(0.9, "strong"), None, (0.4, "weak")],
+    )
+    monkeypatch.setattr(rm, "llm_match_resume_job", lambda text, title, jd: singles.append(title) or (0.7, "single"))
+    rm.match_cache.put(rm.match_cache_key(rm._resume_to_full_text(resume), "Cached", "python"), 0.66, "cached")
+    jobs = [
+        ("A", "python apis"),
+        ("Cached", "python"),
+        ("B", "go services"),
+        ("Senior", "Requires 10+ years of experience."),  # hard gate: never sent to the LLM
+        ("C", "rust"),
+        ("Long", "x" * (rm.BATCH_MAX_JOB_CHARS + 1)),  # too long for the batch prompt
+    ]
+    out = rm.llm_match_batch(resume, jobs)
+    assert batches == [["A", "B", "C"]]
+    assert singles == ["B", "Long"]
+    assert [r["match_score"] for r in out] == [0.9, 0.66, 0.7, 0.0, 0.4, 0.7]
+    assert out[0]["cache_key"] and out[1]["cache_hit"] is True and out[3]["hard_gate_blocked"] is True
+
+
+def test_llm_match_batch_keyword_scores_the_batch_when_the_batch_call_fails(monkeypatch):
+    monkeypatch.setattr(rm, "is_llm_enabled", lambda: True)
+    monkeypatch.setattr(rm, "llm_match_resume_jobs_batch", lambda text, jobs: (_ for _ in ()).throw(RuntimeError("boom")))
+    singles = []
+    monkeypatch.setattr(rm, "llm_match_resume_job", lambda text, title, jd: singles.append(title) or (0.8, "ok"))
+    out = rm.llm_match_batch({}, [("A", "a"), ("B", "b"), ("Long", "x" * (rm.BATCH_MAX_JOB_CHARS + 1))])
+    assert singles == ["Long"]  # only the job that was never in the batch is scored on its own
+    assert [r["match_reason"] for r in out[:2]] == ["Fallback similarity score (LLM unavailable)."] * 2
+    assert out[2]["match_score"] == 0.8
+    assert "cache_key" not in out[0]
+
+
+def test_resume_features_are_memoized_per_resume_version(monkeypatch):
+    from datetime import datetime, timezone
+
+    built = []
+    real = rm.ResumeFeatures.from_data.__func__
+    monkeypatch.setattr(rm.ResumeFeatures, "from_data", classmethod(lambda cls, data: built.append(1) or real(cls, data)))
+    v1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    data = {
+        "experience": [{"title": "Eng", "company": "ACME", "start": "Jan 2020", "end": "Jan 2023", "bullets": ["Python APIs"]}],
+        "skills": {"Languages": ["Python", "Go"], "Cloud/DevOps": "AWS, Docker"},
+    }
+    first = rm.get_resume_features(data, "r1", v1)
+    assert rm.get_resume_features(data, "r1", v1) is first
+    assert len(built) == 1
+    assert first.total_years == rm._compute_resume_total_years(data)
+    assert {"python", "apis"} <= first.tokens
+    assert {"python", "go", "aws", "docker"} <= first.skills
+    assert first.text == rm._resume_to_full_text(data)
+
+    updated = rm.get_resume_features({"experience": []}, "r1", datetime(2026, 2, 1, tzinfo=timezone.utc))
+    assert updated is not first and len(built) == 2
+    rm.get_resume_features(data)  # no id: computed, never cached
+    rm.get_resume_features(data)
+    assert len(built) == 4
+    assert rm.resume_features(first) is first
+
+
+def test_llm_match_uses_precomputed_features(monkeypatch):
+    monkeypatch.setattr(rm, "is_llm_enabled", lambda: False)
+    features = rm.ResumeFeatures.from_data({"experience": [{"title": "Dev", "company": "X", "bullets": ["python fastapi"]}]})
+    monkeypatch.setattr(rm, "_resume_to_full_text", lambda data: (_ for _ in ()).throw(AssertionError("recomputed")))
+    out = rm.llm_match(features, "Backend", "python fastapi postgres")
+    assert out["match_score"] > 0.35
+
+
+def test_llm_match_batch_keeps_scored_jobs_when_the_llm_budget_runs_out(monkeypatch):
+    from app.services.llm_governor import LLMBudgetExceeded
+
+    monkeypatch.setattr(rm, "is_llm_enabled", lambda: True)
+    monkeypatch.setattr(rm, "llm_match_resume_jobs_batch", lambda text, jobs: [(0.9, "strong"), None, None])
+
+    def fake_single(text, title, jd):
+        if title == "C":
+            raise LLMBudgetExceeded("spent")
+        return 0.7, "single"
+
+    monkeypatch.setattr(rm, "llm_match_resume_job", fake_single)
+    out = rm.llm_match_batch({}, [("A", "a"), ("B", "b"), ("C", "c"), ("D", "x" * (rm.BATCH_MAX_JOB_CHARS + 1))])
+    assert [r and r["match_score"] for r in out] == [0.9, 0.7, None, None]  # D is never tried once C hits the budget
+    assert out[1]["cache_key"]
@@ -1,5 +1,6 @@
 import json
 
+import numpy as np
 import pytest
 
 import app.services.titan_embedding as titan
@@ -46,3 +47,44 @@ def test_cosine_similarity_edge_cases():
     assert titan.cosine_similarity([], [1.0]) == 0.0
     assert titan.cosine_similarity([1.0, 0.0], [1.0, 0.0]) == 1.0
     assert titan.cosine_similarity([1.0, 0.0], [-1.0, 0.0]) == -1.0
+
+
+def test_cosine_similarity_zero_vector():
+    assert titan.cosine_similarity([0.0, 0.0], [1.0, 0.0]) == 0.0
+
+
+def test_normalize_rows_unit_length_and_zero_rows():
+    out = titan.normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+    assert out.dtype == np.float32
+    assert np.allclose(out, [[0.6, 0.8], [0.0, 0.0]])
+    assert np.allclose(titan.normalize_rows([0.0, 2.0]), [0.0, 1.0])
+
+
+def test_cosine_similarity_batch_vector_and_matrix_queries():
+    matrix = titan.normalize_rows([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [1.0, 1.0]])
+    query = titan.normalize_rows([1.0, 0.0])
+    scores = titan.cosine_similarity_batch(query, matrix)
+    assert scores.shape == (4,)
+    assert np.allclose(scores, [1.0, 0.0, -1.0, 2 ** -0.5])
+
+    queries = titan.normalize_rows([[1.0, 0.0], [0.0, 1.0]])
+    grid = titan.cosine_similarity_batch(queries, matrix)
+    assert grid.shape == (2, 4)
+    assert np.allclose(grid[1], [0.0, 1.0, 0.0, 2 ** -0.5])
+    # Agrees with the scalar helper.
+    assert grid[0, 3] == pytest.approx(titan.cosine_similarity([1.0, 0.0], [1.0, 1.0]), abs=1e-6)
+
+    empty = np.zeros((0, 2), dtype=np.float32)
+    assert titan.cosine_similarity_batch(query, empty).shape == (0,)
+    assert titan.cosine_similarity_batch(queries, empty).shape == (2, 0)
+
+
+def test_top_k_returns_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    idx, top = titan.top_k(scores, 2)
+    assert idx.tolist() == [1, 3]
+    assert np.allclose(top, [0.9, 0.7])
+    idx_all, _ = titan.top_k(scores, 10)
+    assert idx_all.tolist() == [1, 3, 2, 0]
+    idx_none, top_none = titan.top_k(scores, 0)
+    assert idx_none.size == 0 and top_none.size == 0